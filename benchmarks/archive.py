@@ -0,0 +1,114 @@
+"""Feed the chat archive a steady synthetic message rate and check it keeps up.
+
+Messages are added from the event loop at `rate` per second for `seconds`,
+with a timeout and a deletion mixed in every second. Reports the cost of
+queueing a message on the loop, how far the writer lags behind, drops and
+search latency. Exits with status 1 if the writer fell behind or dropped
+anything.
+
+python -m benchmarks.archive [rate] [seconds]
+"""
+
+from __future__ import annotations
+from types import SimpleNamespace
+import statistics
+import tempfile
+import asyncio
+import random
+import time
+import sys
+import os
+
+os.environ.setdefault("TWITCH_BOT_HEADLESS", "1")
+
+from twitch_bot.archive import ChatArchive
+
+WORDS = (
+    "pog kappa hello gg clip that raid hype lol what is this game chat "
+    "streamer when are we going to play the next level boss fight"
+).split()
+
+
+def message(i: int) -> SimpleNamespace:
+    author = f"viewer{random.randrange(2000)}"
+    content = " ".join(random.choices(WORDS, k=random.randint(3, 14))) + f" #{i}"
+    return SimpleNamespace(
+        id=f"msg-{i}",
+        channel=SimpleNamespace(name="srpboyz"),
+        author=SimpleNamespace(name=author),
+        content=content,
+    )
+
+
+async def run(archive: ChatArchive, rate: int, seconds: float) -> dict:
+    costs = []
+    max_pending = 0
+    lags = []
+    tick = 0.05
+    per_tick = rate * tick
+    sent = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        due = int(elapsed / tick * per_tick) + int(per_tick)
+        for i in range(sent, due):
+            msg = message(i)
+            t = time.perf_counter()
+            archive.add(msg)
+            costs.append(time.perf_counter() - t)
+            if i % rate == 0:
+                archive.purge("srpboyz", msg.author.name)
+                archive.delete(f"msg-{i - 1}")
+        sent = due
+        max_pending = max(max_pending, archive.pending)
+        lags.append(archive.lag)
+        await asyncio.sleep(tick)
+
+    searches = []
+    for word in random.sample(WORDS, 10):
+        t = time.perf_counter()
+        found = await archive.search(f"{word} {random.choice(WORDS)}", limit=20)
+        searches.append(time.perf_counter() - t)
+    return {
+        "sent": sent,
+        "rate": sent / seconds,
+        "add_p50_us": statistics.median(costs) * 1e6,
+        "add_p99_us": statistics.quantiles(costs, n=100)[98] * 1e6,
+        "max_pending": max_pending,
+        "writer_lag_max_ms": max(lags) * 1000,
+        "search_p50_ms": statistics.median(searches) * 1000,
+        "last_search_hits": len(found),
+    }
+
+
+def main() -> None:
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    with tempfile.TemporaryDirectory() as directory:
+        client = SimpleNamespace(
+            loop=asyncio.new_event_loop(),
+            window=SimpleNamespace(log=print),
+        )
+        archive = ChatArchive(client, os.path.join(directory, "chat.db"))
+        archive.start()
+        result = client.loop.run_until_complete(run(archive, rate, seconds))
+        start = time.perf_counter()
+        archive.stop()
+        result["drain_ms"] = (time.perf_counter() - start) * 1000
+        result["written"] = archive.written
+        result["dropped"] = archive.dropped
+        result["db_mib"] = os.path.getsize(archive.path) / 2**20
+
+    for key, value in result.items():
+        print(
+            f"{key:>20} {value:.1f}"
+            if isinstance(value, float)
+            else f"{key:>20} {value}"
+        )
+    # a writer that keeps up never has more than a couple of flushes queued
+    ok = not result["dropped"] and result["max_pending"] < rate * 2
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
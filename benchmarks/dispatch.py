@@ -0,0 +1,142 @@
+"""Time command dispatch per message, the prefix/alias fast path vs twitchio's.
+
+Plain chat, known commands with converted arguments, aliases, unknown
+commands and commands in other cases go through `Client.handle_commands`,
+with and without `case_insensitive`, then through the path
+event_message took before: twitchio's get_context and converters resolved
+on every call. Commands only record what they were called with, so both
+paths must record the same calls. Exits with status 1 if they don't or the
+fast path is slower for plain chat.
+
+python -m benchmarks.dispatch [messages per kind]
+"""
+
+from __future__ import annotations
+from unittest import mock
+import asyncio
+import time
+import sys
+import os
+
+os.environ.setdefault("TWITCH_BOT_HEADLESS", "1")
+
+from twitchio import Channel
+from twitchio.chatter import PartialChatter
+from twitchio.ext.commands import Bot, core as twitchio_core
+from twitch_bot import Client, Message
+from twitch_bot.ext import commands
+
+KINDS = {
+    "chat": ("hello chat", "is this the new level", "gg that was close lol"),
+    "commands": ("*roll 20", "*echo hello there", "*pick 3", "*pick someone"),
+    "aliases": ("*say hello there", "*dice 12", "*r"),
+    "unknown": ("*nope", "*", "* roll"),
+    # commands with case_insensitive set, unknown otherwise
+    "case": ("*ROLL 4", "*Say hi there", "*Pick 2"),
+}
+
+
+class Commands(commands.Cog):
+    def __init__(self, client: Client) -> None:
+        super().__init__(client)
+        self.calls: list[tuple] = []
+
+    @commands.command(aliases=("dice", "r"))
+    async def roll(self, ctx: commands.Context, sides: int = 6) -> None:
+        self.calls.append(("roll", sides))
+
+    @commands.command(aliases=("say",))
+    async def echo(self, ctx: commands.Context, *, text: str) -> None:
+        self.calls.append(("echo", text))
+
+    @commands.command()
+    async def pick(self, ctx: commands.Context, target: int | str) -> None:
+        self.calls.append(("pick", target))
+
+
+def messages(count: int) -> dict[str, list[Message]]:
+    channel = Channel("streamer", None)
+    authors = [PartialChatter(None, name=f"chatter{i}") for i in range(100)]
+    return {
+        kind: [
+            Message(
+                content=contents[i % len(contents)],
+                author=authors[i % len(authors)],
+                channel=channel,
+                tags={"id": f"{i:032x}", "tmi-sent-ts": "0"},
+            )
+            for i in range(count)
+        ]
+        for kind, contents in KINDS.items()
+    }
+
+
+async def twitchio(client: Client, message: Message) -> None:
+    """What event_message did before: twitchio's context building, then invoke."""
+    context = await Bot.get_context(client, message, cls=commands.Context)
+    await client.invoke(context)
+
+
+async def run(handle, client: Client, feed: list[Message]) -> float:
+    start = time.perf_counter()
+    for i, message in enumerate(feed):
+        await handle(message)
+        if i % 100 == 99:
+            # let the command_error events run
+            await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0)
+    return elapsed / len(feed)
+
+
+async def compare(client: Client, cog: Commands, feeds: dict) -> bool:
+    ok = True
+    print(f"{'':<10}{'fast path':>12}{'twitchio':>12}")
+    for kind, feed in feeds.items():
+        fast = old = float("inf")
+        # alternate a few rounds and keep the best of each
+        for _ in range(3):
+            cog.calls.clear()
+            fast = min(fast, await run(client.handle_commands, client, feed))
+            calls = list(cog.calls)
+            cog.calls.clear()
+            with mock.patch.object(
+                commands.Command,
+                "_convert_types",
+                twitchio_core.Command._convert_types,
+            ), mock.patch.object(
+                commands.Command,
+                "resolve_union_callback",
+                twitchio_core.Command.resolve_union_callback,
+            ):
+                old = min(old, await run(lambda m: twitchio(client, m), client, feed))
+        same = calls == cog.calls
+        if kind == "case":
+            # and they only run when the client is case insensitive
+            same = same and bool(calls) == client._case_insensitive
+        print(
+            f"{kind:<10}{fast * 1e6:>10.2f}µs{old * 1e6:>10.2f}µs  "
+            f"{old / fast:.1f}x{'' if same else '  calls differ'}"
+        )
+        ok = ok and same and (kind != "chat" or fast < old)
+    return ok
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    feeds = messages(count)
+    ok = True
+    for case_insensitive in (False, True):
+        print(f"case_insensitive={case_insensitive}")
+        client = Client(
+            token="benchmark", prefix="*", case_insensitive=case_insensitive
+        )
+        cog = Commands(client)
+        client.add_cog(cog)
+        ok = client.loop.run_until_complete(compare(client, cog, feeds)) and ok
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
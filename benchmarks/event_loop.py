@@ -0,0 +1,107 @@
+"""Compare the old processEvents polling routine with QtEventLoop.
+
+Reports selector wakeups per second and CPU usage while idle, and the latency
+of a GUI event posted from another thread.
+
+    python -m benchmarks.event_loop [seconds]
+"""
+
+from __future__ import annotations
+import statistics
+import selectors
+import threading
+import asyncio
+import time
+import sys
+
+from twitch_bot.QtCore import QCoreApplication, QEvent, QObject
+from twitch_bot.QtWidgets import QApplication
+from twitch_bot.eventloop import QtEventLoop, QtSelector
+
+LATENCY_SAMPLES = 200
+
+
+class CountingSelector(selectors.DefaultSelector):
+    wakeups = 0
+
+    def select(self, timeout=None):
+        self.wakeups += 1
+        return super().select(timeout)
+
+
+class CountingQtSelector(QtSelector):
+    wakeups = 0
+
+    def select(self, timeout=None):
+        self.wakeups += 1
+        return super().select(timeout)
+
+
+class Receiver(QObject):
+    def __init__(self) -> None:
+        super().__init__()
+        self.latencies: list[float] = []
+
+    def event(self, event: QEvent) -> bool:
+        if event.type() == QEvent.Type.User:
+            self.latencies.append(time.perf_counter() - event.sent)
+            return True
+        return super().event(event)
+
+
+def post_events(receiver: Receiver) -> None:
+    for _ in range(LATENCY_SAMPLES):
+        time.sleep(0.005)
+        event = QEvent(QEvent.Type.User)
+        event.sent = time.perf_counter()
+        QCoreApplication.postEvent(receiver, event)
+
+
+async def idle(app: QApplication, seconds: float, poll: bool) -> None:
+    if not poll:
+        return await asyncio.sleep(seconds)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        app.processEvents()
+        await asyncio.sleep(1e-4)
+
+
+def measure(app: QApplication, name: str, seconds: float, poll: bool) -> None:
+    if poll:
+        selector = CountingSelector()
+        loop = asyncio.SelectorEventLoop(selector)
+    else:
+        selector = CountingQtSelector()
+        loop = QtEventLoop(selector)
+    asyncio.set_event_loop(loop)
+
+    cpu = time.process_time()
+    loop.run_until_complete(idle(app, seconds, poll))
+    cpu = time.process_time() - cpu
+    wakeups = selector.wakeups
+
+    receiver = Receiver()
+    thread = threading.Thread(target=post_events, args=(receiver,))
+    thread.start()
+    loop.run_until_complete(idle(app, LATENCY_SAMPLES * 0.005 + 0.2, poll))
+    thread.join()
+    loop.close()
+
+    latencies = sorted(receiver.latencies) or [float("nan")]
+    print(
+        f"{name:<10} wakeups/s: {wakeups / seconds:>9.1f}  "
+        f"idle cpu: {cpu / seconds * 100:>5.1f}%  "
+        f"input p50: {statistics.median(latencies) * 1000:.3f}ms  "
+        f"p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.3f}ms"
+    )
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    app = QApplication([])
+    measure(app, "polling", seconds, poll=True)
+    measure(app, "qt-loop", seconds, poll=False)
+
+
+if __name__ == "__main__":
+    main()
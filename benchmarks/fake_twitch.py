@@ -0,0 +1,497 @@
+"""A local stand-in for Twitch's IRC websocket, EventSub websocket and the Helix endpoints the client uses.
+
+Enough of the protocol for a real Client to log in, join channels, receive
+chat, send messages and subscribe to EventSub topics. Call `use(port)` in
+the process running the client to point twitchio at it, or `serve` to run
+the fake in a process of its own.
+
+Every line pushed with `send` or `chat` carries a `sent-at` tag, the
+time.time_ns() it left the fake, and EventSub notifications carry the
+same time as their message_timestamp, so the client side can tell how
+long delivery and handling took.
+"""
+
+from __future__ import annotations
+from collections import Counter
+from multiprocessing.connection import Connection
+from typing import Any, Awaitable, Callable, Iterable
+import datetime
+import asyncio
+import time
+import uuid
+
+from aiohttp import web, WSMsgType
+
+__all__ = ("FakeTwitch", "serve", "use")
+
+NICK = "srpbotz"
+
+
+def user(login: str) -> dict:
+    return {
+        "id": str(1000 + sum(map(ord, login)) * 7919 % 10**6),
+        "login": login,
+        "display_name": login.capitalize(),
+        "type": "",
+        "broadcaster_type": "",
+        "description": "",
+        "profile_image_url": "",
+        "offline_image_url": "",
+        "view_count": 0,
+        "created_at": "2020-01-01T00:00:00Z",
+    }
+
+
+def timestamp(seconds: float | None = None) -> str:
+    when = datetime.datetime.fromtimestamp(
+        time.time() if seconds is None else seconds, datetime.timezone.utc
+    )
+    return when.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _line(tags: dict, prefix: str, command: str) -> str:
+    return (
+        "@"
+        + ";".join(f"{key}={value}" for key, value in tags.items())
+        + f" :{prefix} {command}"
+    )
+
+
+def privmsg(channel: str, author: str, content: str, tags: dict | None = None) -> str:
+    """A chat message, `tags` are added to or override the usual ones."""
+    defaults = {
+        "badge-info": "",
+        "badges": "",
+        "color": "",
+        "display-name": author.capitalize(),
+        "emotes": "",
+        "first-msg": "0",
+        "flags": "",
+        "id": str(uuid.uuid4()),
+        "mod": "0",
+        "returning-chatter": "0",
+        "room-id": user(channel)["id"],
+        "subscriber": "0",
+        "tmi-sent-ts": str(int(time.time() * 1000)),
+        "turbo": "0",
+        "user-id": user(author)["id"],
+        "user-type": "",
+    }
+    return _line(
+        {**defaults, **(tags or {})},
+        f"{author}!{author}@{author}.tmi.twitch.tv",
+        f"PRIVMSG #{channel} :{content}",
+    )
+
+
+def usernotice(
+    channel: str, author: str, kind: str, content: str = "", tags: dict | None = None
+) -> str:
+    """A sub, raid or other notice, `kind` is the msg-id tag."""
+    defaults = {
+        "badge-info": "",
+        "badges": "",
+        "color": "",
+        "display-name": author.capitalize(),
+        "emotes": "",
+        "flags": "",
+        "id": str(uuid.uuid4()),
+        "login": author,
+        "mod": "0",
+        "msg-id": kind,
+        "room-id": user(channel)["id"],
+        "subscriber": "0",
+        "system-msg": f"{author}\\s{kind}",
+        "tmi-sent-ts": str(int(time.time() * 1000)),
+        "turbo": "0",
+        "user-id": user(author)["id"],
+        "user-type": "",
+    }
+    return _line(
+        {**defaults, **(tags or {})},
+        "tmi.twitch.tv",
+        f"USERNOTICE #{channel}" + (f" :{content}" if content else ""),
+    )
+
+
+def clearmsg(channel: str, author: str, id: str) -> str:
+    tags = {
+        "login": author,
+        "room-id": user(channel)["id"],
+        "target-msg-id": id,
+        "tmi-sent-ts": str(int(time.time() * 1000)),
+    }
+    return _line(tags, "tmi.twitch.tv", f"CLEARMSG #{channel} :deleted")
+
+
+def clearchat(channel: str, login: str | None = None, duration: int = 600) -> str:
+    tags = {
+        "room-id": user(channel)["id"],
+        "tmi-sent-ts": str(int(time.time() * 1000)),
+    }
+    if login is None:
+        return _line(tags, "tmi.twitch.tv", f"CLEARCHAT #{channel}")
+    tags["ban-duration"] = str(duration)
+    tags["target-user-id"] = user(login)["id"]
+    return _line(tags, "tmi.twitch.tv", f"CLEARCHAT #{channel} :{login}")
+
+
+def _broadcaster(login: str, prefix: str = "broadcaster_user") -> dict:
+    return {
+        f"{prefix}_id": user(login)["id"],
+        f"{prefix}_login": login,
+        f"{prefix}_name": login.capitalize(),
+    }
+
+
+def stream_online(channel: str) -> tuple[str, str, dict]:
+    """EventSub (type, version, event) for a stream going live."""
+    return (
+        "stream.online",
+        "1",
+        {
+            **_broadcaster(channel),
+            "id": "1",
+            "type": "live",
+            "started_at": timestamp(),
+        },
+    )
+
+
+def raid(channel: str, raider: str, viewers: int) -> tuple[str, str, dict]:
+    return (
+        "channel.raid",
+        "1",
+        {
+            **_broadcaster(raider, "from_broadcaster_user"),
+            **_broadcaster(channel, "to_broadcaster_user"),
+            "viewers": viewers,
+        },
+    )
+
+
+def hype_train(
+    channel: str,
+    stage: str,
+    level: int,
+    total: int,
+    contributions: list[tuple[str, str, int]],
+    started: float,
+) -> tuple[str, str, dict]:
+    """A hype train "begin", "progress" or "end", `contributions` are (login, type, total)."""
+    top = [
+        {**_broadcaster(login, "user"), "type": kind, "total": amount}
+        for login, kind, amount in sorted(contributions, key=lambda c: -c[2])[:3]
+    ]
+    event = {
+        **_broadcaster(channel),
+        "id": "1",
+        "total": total,
+        "level": level,
+        "started_at": timestamp(started),
+        "top_contributions": top,
+    }
+    if stage == "end":
+        event["ended_at"] = timestamp()
+        event["cooldown_ends_at"] = timestamp(time.time() + 3600)
+    else:
+        login, kind, amount = contributions[-1]
+        event["progress"] = total % 1000
+        event["goal"] = 1000
+        event["expires_at"] = timestamp(time.time() + 300)
+        event["last_contribution"] = {
+            **_broadcaster(login, "user"),
+            "type": kind,
+            "total": amount,
+        }
+    return f"channel.hype_train.{stage}", "1", event
+
+
+def _stamp(line: str, now: int) -> str:
+    # last, twitchio keeps the "@" in the first tag's name
+    if line.startswith("@"):
+        tags, _, rest = line.partition(" ")
+        return f"{tags};sent-at={now} {rest}"
+    return f"@sent-at={now} {line}"
+
+
+class FakeTwitch:
+    def __init__(self, nick: str = NICK, live: Iterable[str] = ()) -> None:
+        self.nick = nick
+        self.live = set(live)
+        self.port: int | None = None
+        self.sockets: dict[web.WebSocketResponse, set[str]] = {}
+        # EventSub session id -> socket, subscription id -> subscription
+        self.sessions: dict[str, web.WebSocketResponse] = {}
+        self.subscriptions: dict[str, dict] = {}
+        # channel -> how often it was joined / how many PRIVMSGs the bot sent to it
+        self.joins: Counter[str] = Counter()
+        self.sent: Counter[str] = Counter()
+        self.received: dict[str, list[str]] = {}
+        self.requests = 0
+        self._runner: web.AppRunner | None = None
+
+    async def start(self, port: int = 0) -> int:
+        app = web.Application()
+        app.router.add_get("/irc", self.irc)
+        app.router.add_get("/eventsub", self.eventsub)
+        app.router.add_get("/helix/users", self.users)
+        app.router.add_get("/helix/streams", self.streams)
+        app.router.add_post("/helix/eventsub/subscriptions", self.subscribe)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        for ws in (*self.sockets, *self.sessions.values()):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def irc(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                for line in msg.data.split("\r\n"):
+                    if line:
+                        await self._handle(ws, line)
+        finally:
+            self.sockets.pop(ws, None)
+        return ws
+
+    async def _handle(self, ws: web.WebSocketResponse, line: str) -> None:
+        if line.startswith("@"):
+            line = line.split(" ", 1)[1]
+        command, _, rest = line.partition(" ")
+        nick = self.nick
+        if command == "NICK":
+            await ws.send_str(
+                "\r\n".join(
+                    (
+                        f":tmi.twitch.tv 001 {nick} :Welcome, GLHF!",
+                        f":tmi.twitch.tv 002 {nick} :Your host is tmi.twitch.tv",
+                        f":tmi.twitch.tv 003 {nick} :This server is rather new",
+                        f":tmi.twitch.tv 004 {nick} :-",
+                        f":tmi.twitch.tv 375 {nick} :-",
+                        f":tmi.twitch.tv 372 {nick} :You are in a maze of twisty passages.",
+                        f":tmi.twitch.tv 376 {nick} :>",
+                    )
+                )
+                + "\r\n"
+            )
+        elif command == "CAP":
+            caps = rest.partition(":")[2]
+            await ws.send_str(f":tmi.twitch.tv CAP * ACK :{caps}\r\n")
+        elif command == "PING":
+            await ws.send_str("PONG :tmi.twitch.tv\r\n")
+        elif command == "JOIN":
+            for channel in rest.split(","):
+                channel = channel.strip().lstrip("#")
+                self.sockets[ws].add(channel)
+                self.joins[channel] += 1
+                await ws.send_str(
+                    f":{nick}!{nick}@{nick}.tmi.twitch.tv JOIN #{channel}\r\n"
+                    f":{nick}.tmi.twitch.tv 353 {nick} = #{channel} :{nick}\r\n"
+                    f":{nick}.tmi.twitch.tv 366 {nick} #{channel} :End of /NAMES list\r\n"
+                )
+        elif command == "PRIVMSG":
+            channel, _, content = rest.partition(" :")
+            channel = channel.lstrip("#")
+            self.sent[channel] += 1
+            self.received.setdefault(channel, []).append(content)
+
+    async def send(self, channel: str | None, lines: Iterable[str]) -> int:
+        """Send raw IRC `lines` to every connection that joined `channel`, or to all of them.
+
+        Returns how many lines were sent, counting once per connection.
+        """
+        now = time.time_ns()
+        lines = [_stamp(line, now) for line in lines]
+        sent = 0
+        for ws, channels in tuple(self.sockets.items()):
+            if channel is None or channel in channels:
+                for i in range(0, len(lines), 50):
+                    await ws.send_str("\r\n".join(lines[i : i + 50]) + "\r\n")
+                sent += len(lines)
+        return sent
+
+    async def chat(
+        self, channel: str, messages: Iterable[str], author: str = "viewer"
+    ) -> int:
+        """Send `messages` to every connection that joined `channel`. Returns how many were sent."""
+        return await self.send(
+            channel, (privmsg(channel, author, content) for content in messages)
+        )
+
+    async def eventsub(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        session = str(uuid.uuid4())
+        self.sessions[session] = ws
+        await ws.send_json(
+            {
+                "metadata": {
+                    "message_id": str(uuid.uuid4()),
+                    "message_type": "session_welcome",
+                    "message_timestamp": timestamp(),
+                },
+                "payload": {
+                    "session": {
+                        "id": session,
+                        "status": "connected",
+                        "connected_at": timestamp(),
+                        "keepalive_timeout_seconds": 600,
+                        "reconnect_url": None,
+                    }
+                },
+            }
+        )
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self.sessions.pop(session, None)
+            for id, subscription in tuple(self.subscriptions.items()):
+                if subscription["transport"]["session_id"] == session:
+                    del self.subscriptions[id]
+        return ws
+
+    async def subscribe(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.json()
+        if body["transport"]["session_id"] not in self.sessions:
+            return web.json_response({"message": "unknown session"}, status=400)
+        subscription = {
+            "id": str(uuid.uuid4()),
+            "status": "enabled",
+            "type": body["type"],
+            "version": body["version"],
+            "condition": body["condition"],
+            "transport": body["transport"],
+            "created_at": timestamp(),
+            "cost": 0,
+        }
+        self.subscriptions[subscription["id"]] = subscription
+        return web.json_response(
+            {
+                "data": [subscription],
+                "total": len(self.subscriptions),
+                "total_cost": 0,
+                "max_total_cost": 10_000,
+            },
+            status=202,
+        )
+
+    async def notify(self, type: str, version: str, event: dict) -> int:
+        """Send an EventSub notification to every subscription it matches. Returns how many."""
+        sent = 0
+        for subscription in tuple(self.subscriptions.values()):
+            if subscription["type"] != type or any(
+                event.get(key, value) != value
+                for key, value in subscription["condition"].items()
+            ):
+                continue
+            ws = self.sessions.get(subscription["transport"]["session_id"])
+            if ws is None:
+                continue
+            await ws.send_json(
+                {
+                    "metadata": {
+                        "message_id": str(uuid.uuid4()),
+                        "message_type": "notification",
+                        "message_timestamp": timestamp(),
+                        "subscription_type": type,
+                        "subscription_version": version,
+                    },
+                    "payload": {"subscription": subscription, "event": event},
+                }
+            )
+            sent += 1
+        return sent
+
+    async def users(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        logins = request.query.getall("login", [])
+        return web.json_response({"data": [user(login) for login in logins]})
+
+    async def streams(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        ids = set(request.query.getall("user_id", []))
+        data = [
+            {
+                "id": "1",
+                "user_id": user(login)["id"],
+                "user_login": login,
+                "user_name": login.capitalize(),
+                "game_id": "0",
+                "game_name": "",
+                "type": "live",
+                "title": "",
+                "viewer_count": 0,
+                "started_at": "2020-01-01T00:00:00Z",
+                "language": "en",
+                "thumbnail_url": "",
+                "tag_ids": [],
+                "tags": [],
+                "is_mature": False,
+            }
+            for login in self.live
+            if user(login)["id"] in ids
+        ]
+        return web.json_response({"data": data, "pagination": {}})
+
+
+def serve(conn: Connection, nick: str = NICK, live: Iterable[str] = ()) -> None:
+    """Run a FakeTwitch until told to stop, for a multiprocessing.Process.
+
+    Sends the port back through `conn`, then runs every `(func, kwargs)` it
+    receives as `await func(fake, **kwargs)` and sends back the result.
+    None stops the server.
+    """
+
+    async def main() -> None:
+        fake = FakeTwitch(nick, live)
+        conn.send(await fake.start())
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request: tuple[Callable[..., Awaitable[Any]], dict] | None = (
+                    await loop.run_in_executor(None, conn.recv)
+                )
+                if request is None:
+                    break
+                func, kwargs = request
+                conn.send(await func(fake, **kwargs))
+        finally:
+            await fake.stop()
+
+    asyncio.run(main())
+
+
+def use(port: int, nick: str = NICK) -> None:
+    """Point twitchio in this process at a FakeTwitch listening on `port`."""
+    import aiohttp
+    import twitchio.websocket
+    from twitchio.ext.eventsub.websocket import Websocket
+    from twitchio.http import Route, TwitchHTTP
+
+    twitchio.websocket.HOST = f"ws://127.0.0.1:{port}/irc"
+    Websocket.URL = f"ws://127.0.0.1:{port}/eventsub"
+    Route.BASE_URL = f"http://127.0.0.1:{port}/helix"
+
+    async def validate(self, *, token: str = None) -> dict:
+        if not self.session:
+            self.session = aiohttp.ClientSession()
+        self.nick = nick
+        self.user_id = int(user(nick)["id"])
+        self.client_id = "fake"
+        return {"login": nick, "user_id": str(self.user_id), "client_id": "fake"}
+
+    TwitchHTTP.validate = validate
@@ -0,0 +1,184 @@
+"""Match chat against 10k banned terms and patterns, shared filter vs per-cog checks.
+
+The rules are split across `cogs` owners the way moderation cogs would
+register them: mostly terms, one in a hundred a regex. Messages are fed
+from the event loop at `rate` per second for `seconds`, some of them with a
+banned term in leetspeak or full-width letters. Reports the time per
+message, the share of one core that is at that rate, event loop lag and
+hits, then the same messages through per-cog substring and regex checks,
+and how long adding and removing a cog's rules takes to apply. Exits with
+status 1 if the shared filter missed a planted term or couldn't keep up.
+
+python -m benchmarks.filter [rules] [rate] [seconds] [cogs]
+"""
+
+from __future__ import annotations
+from types import SimpleNamespace
+import statistics
+import asyncio
+import random
+import string
+import time
+import sys
+import re
+import os
+
+os.environ.setdefault("TWITCH_BOT_HEADLESS", "1")
+
+from twitch_bot.filters import MessageFilter, fold
+
+WORDS = (
+    "pog kappa hello gg clip that raid hype lol what is this game chat "
+    "streamer when are we going to play the next level boss fight"
+).split()
+DISGUISES = (
+    str.upper,
+    lambda term: term.translate(str.maketrans("aeios", "4310$")),
+    lambda term: "".join(chr(ord(c) + 0xFEE0) if c.isalpha() else c for c in term),
+)
+
+
+def rules(count: int, cogs: int) -> dict[str, tuple[list[str], list[str]]]:
+    random.seed(0)
+    owned: dict[str, tuple[list[str], list[str]]] = {
+        f"Cog{i}": ([], []) for i in range(cogs)
+    }
+    owners = list(owned)
+    seen = set()
+    for i in range(count):
+        terms, patterns = owned[owners[i % cogs]]
+        if i % 100 == 99:
+            word = "".join(random.choices(string.ascii_lowercase, k=6))
+            patterns.append(rf"{word[:3]}\W*{word[3:]}\d+")
+            continue
+        while (
+            term := "".join(
+                random.choices(string.ascii_lowercase, k=random.randint(5, 10))
+            )
+        ) in seen:
+            pass
+        seen.add(term)
+        terms.append(term if i % 20 else f"{term} {random.choice(WORDS)}")
+    return owned
+
+
+def messages(count: int, terms: list[str]) -> list[tuple[SimpleNamespace, bool]]:
+    """Chat where one message in fifty hides a banned term."""
+    random.seed(1)
+    result = []
+    for i in range(count):
+        words = random.choices(WORDS, k=random.randint(3, 14))
+        planted = i % 50 == 0
+        if planted:
+            words.insert(
+                random.randrange(len(words) + 1),
+                random.choice(DISGUISES)(random.choice(terms)),
+            )
+        content = " ".join(words)
+        result.append((SimpleNamespace(id=f"msg-{i}", content=content), planted))
+    return result
+
+
+class PerCog:
+    """What each moderation cog does on its own: lowercase, then every term and pattern."""
+
+    def __init__(self, terms: list[str], patterns: list[str]) -> None:
+        self.terms = [term.lower() for term in terms]
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+    def check(self, content: str) -> bool:
+        lowered = content.lower()
+        return any(term in lowered for term in self.terms) or any(
+            pattern.search(content) for pattern in self.patterns
+        )
+
+
+async def run(filters: MessageFilter, feed: list, rate: int, seconds: float) -> dict:
+    costs = []
+    lags = []
+    hits = missed = 0
+    tick = 0.05
+    sent = 0
+    total = min(len(feed), int(rate * seconds))
+    start = time.perf_counter()
+    while sent < total:
+        due = min(total, int((time.perf_counter() - start) * rate) + int(rate * tick))
+        for message, planted in feed[sent:due]:
+            t = time.perf_counter()
+            hit = filters.check(message)
+            costs.append(time.perf_counter() - t)
+            hits += hit is not None
+            missed += planted and hit is None
+        sent = max(sent, due)
+        t = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(time.perf_counter() - t - tick)
+    return {"costs": costs, "lags": lags, "hits": hits, "missed": missed}
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rate = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    cogs = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+
+    owned = rules(count, cogs)
+    terms = [term for owner_terms, _ in owned.values() for term in owner_terms]
+    feed = messages(int(rate * seconds), terms)
+
+    filters = MessageFilter()
+    start = time.perf_counter()
+    for owner, (owner_terms, patterns) in owned.items():
+        filters.add(owner, owner_terms, patterns)
+    added = time.perf_counter() - start
+    filters.build()
+    print(
+        f"{len(filters)} rules from {cogs} cogs: registered in {added * 1000:.0f}ms, "
+        f"built in {filters.build_time * 1000:.0f}ms"
+    )
+
+    result = asyncio.run(run(filters, feed, rate, seconds))
+    costs = result["costs"]
+    mean = statistics.fmean(costs)
+    p99 = statistics.quantiles(costs, n=100)[98]
+    print(
+        f"shared:  {len(costs)} messages at {rate}/s, mean {mean * 1e6:.1f}µs "
+        f"p99 {p99 * 1e6:.1f}µs, {mean * rate * 100:.1f}% of a core, "
+        f"loop lag max {max(result['lags']) * 1000:.1f}ms, "
+        f"{result['hits']} hits, {result['missed']} planted terms missed"
+    )
+
+    naive = [PerCog(owner_terms, patterns) for owner_terms, patterns in owned.values()]
+    sample = feed[: min(len(feed), 2000)]
+    start = time.perf_counter()
+    naive_hits = sum(
+        any([cog.check(message.content) for cog in naive]) for message, _ in sample
+    )
+    per_message = (time.perf_counter() - start) / len(sample)
+    print(
+        f"per cog: mean {per_message * 1e6:.1f}µs, {per_message * rate * 100:.1f}% "
+        f"of a core at {rate}/s, {naive_hits}/{len(sample)} hits without folding"
+    )
+
+    extra = [fold(f"extra{i}word") for i in range(100)]
+    start = time.perf_counter()
+    filters.add("Extra", extra)
+    filters.build()
+    grown = time.perf_counter() - start
+    start = time.perf_counter()
+    filters.remove("Cog0")
+    filters.build()
+    shrunk = time.perf_counter() - start
+    print(
+        f"adding a cog's 100 terms: {grown * 1000:.1f}ms, "
+        f"removing a cog's {len(owned['Cog0'][0]) + len(owned['Cog0'][1])} rules: "
+        f"{shrunk * 1000:.1f}ms"
+    )
+
+    ok = result["missed"] == 0 and mean * rate < 0.5
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
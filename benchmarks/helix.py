@@ -0,0 +1,100 @@
+"""Look up users through a local fake Helix server, directly and through HelixCache.
+
+Each round fires `lookups` concurrent user lookups over `users` distinct
+logins and counts the HTTP requests the server saw.
+
+python -m benchmarks.helix [lookups] [users] [rounds]
+"""
+
+from __future__ import annotations
+import asyncio
+import random
+import time
+import sys
+import os
+
+os.environ.setdefault("TWITCH_BOT_HEADLESS", "1")
+
+from aiohttp import web
+from twitch_bot import Client
+from twitch_bot.helix import HelixCache
+from twitchio.http import Route, TwitchHTTP
+
+
+class FakeHelix:
+    def __init__(self, latency: float = 0.02) -> None:
+        self.latency = latency
+        self.requests = 0
+
+    @staticmethod
+    def user(login: str) -> dict:
+        return {
+            "id": str(abs(hash(login)) % 10**9),
+            "login": login,
+            "display_name": login.capitalize(),
+            "type": "",
+            "broadcaster_type": "",
+            "description": "",
+            "profile_image_url": "",
+            "offline_image_url": "",
+            "view_count": 0,
+            "created_at": "2020-01-01T00:00:00Z",
+        }
+
+    async def users(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        logins = request.query.getall("login", [])
+        return web.json_response({"data": [self.user(login) for login in logins]})
+
+
+async def run(cached: bool, lookups: int, users: int, rounds: int) -> dict:
+    fake = FakeHelix()
+    app = web.Application()
+    app.router.add_get("/helix/users", fake.users)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    Route.BASE_URL = f"http://127.0.0.1:{port}/helix"
+
+    # only the HTTP client and create_task are used
+    client = Client.__new__(Client)
+    client._http = TwitchHTTP(client, api_token="x", client_id="x")
+    client._http.nick = "bench"
+    client._tasks = set()
+    client.loop = asyncio.get_running_loop()
+    helix = HelixCache(client)
+
+    logins = [f"chatter{i}" for i in range(users)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        names = random.choices(logins, k=lookups)
+        if cached:
+            await asyncio.gather(*(helix.user(name) for name in names))
+        else:
+            await asyncio.gather(*(client.fetch_users(names=[name]) for name in names))
+    elapsed = time.perf_counter() - start
+
+    await client._http.session.close()
+    await runner.cleanup()
+    return {"elapsed": elapsed, "requests": fake.requests, "stats": helix.stats()}
+
+
+def main() -> None:
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    for name, cached in (("direct", False), ("cached", True)):
+        result = asyncio.run(run(cached, lookups, users, rounds))
+        print(
+            f"{name:<7} {result['requests']:>5} requests in {result['elapsed']:.2f}s "
+            f"for {lookups * rounds} lookups"
+        )
+        if cached:
+            print(f"        {result['stats']['login']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""Drive a real Client with sample cogs through a local fake Twitch and report how it holds up.
+
+The fake runs in a process of its own so its work isn't counted against the
+bot. Every scenario reports the chat handled per second, the time from the
+fake sending a message or EventSub notification to a handler seeing it (p50
+and p99), the profiler's slowest handlers, event-loop lag, CPU and RSS.
+Adding the sample cogs is timed too.
+
+Results are saved as JSON. `--compare` checks them against an earlier run
+and exits with status 1 if anything got worse by more than `--tolerance`.
+
+    python -m benchmarks.load [flood] [commands] [raid] [hype_train] [replay]
+        [--rate 500] [--seconds 10] [--channels 3] [--replay PATH] [--speed 1]
+        [--output PATH] [--compare PATH] [--tolerance 0.25] [--gui]
+        [--twitch-limits]
+
+`--record PATH` runs the bot with data/settings.json instead and appends
+the chat and EventSub traffic it receives to PATH, for `--replay`.
+"""
+
+from __future__ import annotations
+from multiprocessing.connection import Connection
+from pathlib import Path
+import multiprocessing
+import statistics
+import platform
+import argparse
+import datetime
+import tempfile
+import asyncio
+import json
+import time
+import sys
+import os
+
+from benchmarks import traffic
+from benchmarks.fake_twitch import NICK, serve, use
+
+SCENARIOS = ("flood", "commands", "raid", "hype_train", "replay")
+# metric -> whether bigger is better, and the smallest change worth reporting
+COMPARED = {
+    "throughput": (True, 5.0),
+    "latency_p50_ms": (False, 0.5),
+    "latency_p99_ms": (False, 1.0),
+    "event_latency_p99_ms": (False, 1.0),
+    "lag_p99_ms": (False, 1.0),
+    "drain_seconds": (False, 0.1),
+    "cpu_percent": (False, 5.0),
+    "rss_peak_mib": (False, 5.0),
+}
+
+
+def quantiles(values: list[float]) -> tuple[float, float]:
+    if len(values) < 2:
+        value = values[0] if values else 0.0
+        return value, value
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[98]
+
+
+class Harness:
+    def __init__(self, client, conn: Connection, args: argparse.Namespace) -> None:
+        self.client = client
+        self.conn = conn
+        self.args = args
+        self.results: dict = {}
+        self.probe = None
+
+    async def fake(self, func, **kwargs):
+        """Run `func` in the fake's process and wait for what it returns."""
+        self.conn.send((func, kwargs))
+        return await self.client.loop.run_in_executor(None, self.conn.recv)
+
+    async def wait_for(self, check, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not check():
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(0.02)
+        return True
+
+    def synced(self) -> bool:
+        states = list(self.client.channels)
+        return all(
+            state.joined
+            and state.streamer
+            and not self.client.subscriptions.missing(state.streamer)
+            for state in states
+        )
+
+    async def run(self) -> None:
+        from benchmarks.sample_cogs import Alerts, Chat, Probe
+
+        client = self.client
+        try:
+            if not await self.wait_for(
+                lambda: all(state.joined for state in client.channels), 30
+            ):
+                raise RuntimeError("The fake's channels were never joined")
+
+            added = {}
+            for cls in (Probe, Chat, Alerts):
+                start = time.perf_counter()
+                client.add_cog(cls(client))
+                added[cls.__name__] = (time.perf_counter() - start) * 1000
+            self.probe = client.get_cog("Probe")
+            cycles = []
+            for _ in range(20):
+                start = time.perf_counter()
+                client.remove_cog(client.get_cog("Chat"))
+                client.add_cog(Chat(client))
+                cycles.append((time.perf_counter() - start) * 1000)
+            self.results["add_cog"] = {
+                "first_ms": added,
+                "remove_and_add_ms": statistics.median(cycles),
+            }
+            if not await self.wait_for(self.synced, 30):
+                raise RuntimeError("EventSub subscriptions never synced")
+
+            for name in self.args.scenarios:
+                self.results.setdefault("scenarios", {})[name] = await self.scenario(
+                    name
+                )
+            self.results["fake"] = await self.fake(traffic.status)
+        except Exception as e:
+            self.results["error"] = repr(e)
+        finally:
+            client.window.close()
+
+    def options(self, name: str) -> dict:
+        args = self.args
+        channels = list(self.client.channels.names)
+        if name == "replay":
+            return {"path": args.replay, "speed": args.speed}
+        if name == "raid":
+            return {
+                "channels": channels,
+                "viewers": int(args.rate * args.seconds / 5),
+                "seconds": args.seconds,
+            }
+        if name == "hype_train":
+            return {
+                "channels": channels,
+                "seconds": args.seconds,
+                "chat": args.rate / 2,
+            }
+        return {"channels": channels, "rate": args.rate, "seconds": args.seconds}
+
+    async def scenario(self, name: str) -> dict:
+        from twitch_bot.metrics import _rss
+
+        client, probe = self.client, self.probe
+        probe.reset()
+        client.profiler.reset()
+        lags: list[float] = []
+        # 0 where memory can't be read, see _rss
+        peak = _rss() or 0
+
+        async def sample() -> None:
+            nonlocal peak
+            ticks = 0
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(max(0.0, time.perf_counter() - start - 0.01) * 1000)
+                ticks += 1
+                if ticks % 10 == 0:
+                    peak = max(peak, _rss() or 0)
+
+        sampler = client.loop.create_task(sample())
+        cpu = time.process_time()
+        start = time.perf_counter()
+        try:
+            sent = await self.fake(getattr(traffic, name), **self.options(name))
+            finished = time.perf_counter()
+            drained = await self.wait_for(
+                lambda: probe.messages >= sent["messages"]
+                and probe.events >= sent["events"],
+                30,
+            )
+        finally:
+            sampler.cancel()
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+
+        p50, p99 = quantiles(probe.latencies)
+        event_p50, event_p99 = quantiles(probe.event_latencies)
+        lag_p50, lag_p99 = quantiles(lags)
+        return {
+            "sent": sent,
+            "handled": {"messages": probe.messages, "events": probe.events},
+            "complete": drained,
+            "seconds": elapsed,
+            "drain_seconds": time.perf_counter() - finished if drained else None,
+            "throughput": probe.messages / elapsed,
+            "latency_p50_ms": p50,
+            "latency_p99_ms": p99,
+            "event_latency_p50_ms": event_p50,
+            "event_latency_p99_ms": event_p99,
+            "lag_p50_ms": lag_p50,
+            "lag_p99_ms": lag_p99,
+            "lag_max_ms": max(lags, default=0.0),
+            "cpu_percent": cpu / elapsed * 100,
+            "rss_mib": (_rss() or 0) / 2**20,
+            "rss_peak_mib": peak / 2**20,
+            "handlers": [stats.to_dict() for stats in client.profiler.slowest(8)],
+        }
+
+
+def report(results: dict) -> None:
+    if "add_cog" in results:
+        cogs = results["add_cog"]
+        print(
+            "add_cog: "
+            + ", ".join(f"{name} {ms:.2f}ms" for name, ms in cogs["first_ms"].items())
+            + f", remove and add again {cogs['remove_and_add_ms']:.2f}ms"
+        )
+    for name, result in results.get("scenarios", {}).items():
+        sent, handled = result["sent"], result["handled"]
+        print(
+            f"{name:<11} {handled['messages']}/{sent['messages']} messages, "
+            f"{handled['events']}/{sent['events']} events in {result['seconds']:.2f}s "
+            f"({result['throughput']:,.0f}/s)"
+            + ("" if result["complete"] else "  INCOMPLETE")
+        )
+        print(
+            f"{'':<11} latency p50 {result['latency_p50_ms']:.2f}ms "
+            f"p99 {result['latency_p99_ms']:.2f}ms, events p99 "
+            f"{result['event_latency_p99_ms']:.2f}ms, lag p99 "
+            f"{result['lag_p99_ms']:.2f}ms max {result['lag_max_ms']:.2f}ms, "
+            f"cpu {result['cpu_percent']:.0f}%, rss {result['rss_peak_mib']:.1f}MiB"
+        )
+        for handler in result["handlers"][:3]:
+            print(
+                f"{'':<11} {handler['kind']:<8} {handler['name']:<40} "
+                f"{handler['count']:>6}x  mean {handler['mean'] * 1000:.3f}ms "
+                f"max {handler['max'] * 1000:.2f}ms"
+            )
+    if "error" in results:
+        print(f"error: {results['error']}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """What got worse than `baseline` by more than `tolerance`, as lines to print."""
+    regressions = []
+    for name, result in results.get("scenarios", {}).items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for metric, (bigger_is_better, floor) in COMPARED.items():
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            worse = old - new if bigger_is_better else new - old
+            if worse > floor and worse > abs(old) * tolerance:
+                regressions.append(
+                    f"{name} {metric}: {old:.2f} -> {new:.2f} "
+                    f"({(new - old) / old * 100 if old else float('inf'):+.0f}%)"
+                )
+    return regressions
+
+
+def record(path: str) -> None:
+    from twitch_bot import Client
+
+    client = Client(**Client.load_settings())
+    traffic.Recorder(client, path)
+    client.run()
+
+
+def run(args: argparse.Namespace) -> dict:
+    context = multiprocessing.get_context("spawn")
+    ours, theirs = context.Pipe()
+    server = context.Process(
+        target=serve, args=(theirs, NICK), name="fake-twitch", daemon=True
+    )
+    server.start()
+    theirs.close()
+    use(ours.recv())
+
+    from twitch_bot import Client
+
+    if not args.twitch_limits:
+        from twitchio.cooldowns import RateBucket
+
+        # the fake doesn't enforce them, and at 20 a channel every 30s the
+        # replies would still be queued minutes after a scenario
+        RateBucket.IRCLIMIT = RateBucket.MODLIMIT = 1_000_000
+
+    if args.replay:
+        channels = traffic.channels(args.replay)
+    else:
+        channels = [f"channel{i}" for i in range(args.channels)]
+
+    stdout, stderr = sys.stdout, sys.stderr
+    with tempfile.TemporaryDirectory() as cwd:
+        for directory in ("data", "cogs", "icons"):
+            os.mkdir(os.path.join(cwd, directory))
+        Path(cwd, "data", "styles.qss").touch()
+        os.chdir(cwd)
+        # the bursts are meant to be heavy, don't report them as stalls
+        client = Client(
+            token="fake",
+            prefix="*",
+            # the fake accepts any token, as if every broadcaster had authorized the bot
+            channels={name: {"token": "fake"} for name in channels},
+            profile=True,
+            profile_interval=3600.0,
+            watchdog_threshold=5.0,
+        )
+        harness = Harness(client, ours, args)
+        client.loop.create_task(harness.run())
+        with open(os.devnull, "w") as devnull:
+            # cog prints would flood the terminal, in the GUI they go to the Logs window
+            if not args.gui:
+                sys.stdout = devnull
+            try:
+                client.run()
+            finally:
+                # the Logs window doesn't give them back
+                sys.stdout, sys.stderr = stdout, stderr
+
+    ours.send(None)
+    server.join(5)
+    return harness.results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="benchmarks.load")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario")
+    parser.add_argument(
+        "--rate", type=float, default=500, help="chat messages a second"
+    )
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--channels", type=int, default=3)
+    parser.add_argument("--replay", help="a recording made with --record")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed")
+    parser.add_argument("--output", default="load.json", help="where to save results")
+    parser.add_argument("--compare", help="results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--gui", action="store_true", help="run with the window, offscreen"
+    )
+    parser.add_argument(
+        "--twitch-limits",
+        action="store_true",
+        help="keep Twitch's chat rate limits for the bot's replies",
+    )
+    parser.add_argument("--record", metavar="PATH", help="record live traffic instead")
+    args = parser.parse_args()
+
+    if args.record:
+        return record(args.record)
+    if unknown := set(args.scenarios) - set(SCENARIOS):
+        parser.error(f"unknown scenarios {', '.join(sorted(unknown))}")
+    if not args.scenarios:
+        args.scenarios = list(SCENARIOS[:4]) + (["replay"] if args.replay else [])
+    if "replay" in args.scenarios and not args.replay:
+        parser.error("the replay scenario needs --replay PATH")
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+    if args.gui:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    else:
+        os.environ["TWITCH_BOT_HEADLESS"] = "1"
+
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    results = {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mode": "gui" if args.gui else "headless",
+        "options": {
+            "rate": args.rate,
+            "seconds": args.seconds,
+            "channels": args.channels,
+            "replay": args.replay,
+            "speed": args.speed,
+        },
+    }
+    cwd = os.getcwd()
+    try:
+        results.update(run(args))
+    finally:
+        os.chdir(cwd)
+    report(results)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"saved to {output}")
+
+    failed = "error" in results or not all(
+        result["complete"] for result in results.get("scenarios", {}).values()
+    )
+    if baseline is not None:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"regression: {line}")
+        print(f"{len(regressions)} regressions against {baseline}")
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Print lines through the Logs window and report time and peak memory.
+
+python -m benchmarks.logs [lines]
+"""
+
+from __future__ import annotations
+import tracemalloc
+import time
+import sys
+
+from twitch_bot.QtWidgets import QApplication
+from twitch_bot.ui.logs import Logs
+
+
+def run(app: QApplication, count: int, visible: bool) -> None:
+    stdout = sys.stdout
+    logs = Logs(None)
+    logs.show() if visible else ...
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(count):
+        print(f"[cog] line {i}: something happened in chat")
+        if i % 1000 == 0:
+            app.processEvents()
+    logs.flush()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sys.stdout, sys.stderr = stdout, sys.__stderr__
+    print(
+        f"{'visible' if visible else 'hidden':<8} lines: {count}  "
+        f"kept: {len(logs._lines)}/{logs.capacity}  time: {elapsed:.2f}s "
+        f"({count / elapsed:,.0f} lines/s)  peak memory: {peak / 2**20:.1f}MiB"
+    )
+    logs.deleteLater()
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    app = QApplication([])
+    run(app, count, visible=False)
+    run(app, count, visible=True)
+
+
+if __name__ == "__main__":
+    main()
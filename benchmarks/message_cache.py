@@ -0,0 +1,42 @@
+"""Feed synthetic messages through MessageCache and report time and memory.
+
+python -m benchmarks.message_cache [count] [max_size]
+"""
+
+from __future__ import annotations
+import tracemalloc
+import time
+import sys
+
+from twitchio.chatter import PartialChatter
+from twitch_bot import Message
+from twitch_bot.cache import MessageCache
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    max_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    authors = [PartialChatter(None, name=f"chatter{i}") for i in range(500)]
+
+    cache = MessageCache(max_size=max_size)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(count):
+        tags = {"id": f"{i:032x}", "tmi-sent-ts": "0"}
+        message = Message(
+            content=f"synthetic message number {i}",
+            author=authors[i % len(authors)],
+            tags=tags,
+        )
+        cache.add(message)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"messages: {count}  cached: {len(cache)}  max_size: {max_size}")
+    print(f"time: {elapsed:.2f}s ({count / elapsed:,.0f} msg/s)")
+    print(f"memory: {current / 2**20:.1f}MiB current, {peak / 2**20:.1f}MiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Push bursts of chat messages at a local fake IRC server, directly and through SendQueue.
+
+The server enforces Twitch's rule (at most `limit` PRIVMSGs in any sliding
+`period`) and counts what it would have dropped. The period is scaled down
+from 30s so a run takes seconds, not minutes.
+
+python -m benchmarks.outbound [messages] [period] [--mod]
+"""
+
+from __future__ import annotations
+from collections import deque
+from types import SimpleNamespace
+import asyncio
+import time
+import sys
+
+from twitch_bot.outbound import Priority, SendQueue
+from twitchio.cooldowns import RateBucket
+
+
+class FakeServer:
+    def __init__(self, limit: int, period: float) -> None:
+        self.limit = limit
+        self.period = period
+        self.accepted: list[float] = []
+        self.dropped = 0
+        self._window: deque[float] = deque()
+        self.closed = asyncio.Event()
+
+    async def handle(self, reader: asyncio.StreamReader, _) -> None:
+        while line := await reader.readline():
+            if not line.startswith(b"PRIVMSG"):
+                continue
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= self.period:
+                self._window.popleft()
+            if len(self._window) >= self.limit:
+                self.dropped += 1
+            else:
+                self._window.append(now)
+                self.accepted.append(now)
+        self.closed.set()
+
+
+class FakeChannel:
+    def __init__(self, name: str, writer: asyncio.StreamWriter, mod: bool) -> None:
+        self.name = name
+        self.writer = writer
+        self.mod = mod
+
+    def _fetch_channel(self) -> FakeChannel:
+        return self
+
+    def _bot_is_mod(self) -> bool:
+        return self.mod
+
+    async def send(self, content: str) -> None:
+        self.writer.write(f"PRIVMSG #{self.name} :{content}\r\n".encode())
+        await self.writer.drain()
+
+
+async def run(queued: bool, messages: int, period: float, mod: bool) -> dict:
+    limit = RateBucket.MODLIMIT if mod else RateBucket.IRCLIMIT
+    fake = FakeServer(limit, period)
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    _, writer = await asyncio.open_connection("127.0.0.1", port)
+    channel = FakeChannel(f"bench{int(queued)}{int(mod)}", writer, mod)
+
+    client = SimpleNamespace(
+        loop=asyncio.get_running_loop(), run_event=lambda *args: None
+    )
+    # same jitter slack as the real 30s window, scaled down
+    slack = period / RateBucket.IRC
+    outbound = SendQueue(client, max_pending=limit, merge=False, period=period + slack)
+    start = time.monotonic()
+    if queued:
+        # chatter first, moderation still has to overtake it
+        await asyncio.gather(
+            *(
+                outbound.send(
+                    channel,
+                    f"message {i}",
+                    Priority.MODERATION if i % 10 == 0 else Priority.CHAT,
+                )
+                for i in range(messages)
+            )
+        )
+        await outbound.stop()
+    else:
+        await asyncio.gather(*(channel.send(f"message {i}") for i in range(messages)))
+    elapsed = time.monotonic() - start
+
+    writer.close()
+    await fake.closed.wait()
+    server.close()
+    await server.wait_closed()
+    return {
+        "elapsed": elapsed,
+        "accepted": len(fake.accepted),
+        "dropped": fake.dropped,
+        "ceiling": limit / period,
+        # the first `limit` go out as a burst, the rest are paced
+        "rate": (len(fake.accepted) - limit) / elapsed if elapsed else float("inf"),
+    }
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    messages = int(args[0]) if args else 300
+    period = float(args[1]) if len(args) > 1 else 3.0
+    mod = "--mod" in sys.argv
+    for name, queued in (("direct", False), ("queued", True)):
+        result = asyncio.run(run(queued, messages, period, mod))
+        print(
+            f"{name:<7} {result['accepted']:>5} sent {result['dropped']:>5} dropped "
+            f"in {result['elapsed']:.2f}s, sustained {result['rate']:.1f}/s "
+            f"(limit {result['ceiling']:.1f}/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
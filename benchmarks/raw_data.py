@@ -0,0 +1,80 @@
+"""Compare the old CLEARMSG regex with the irc tag parser over a mix of raw lines.
+
+python -m benchmarks.raw_data [rounds]
+"""
+
+from __future__ import annotations
+import timeit
+import sys
+import re
+
+from twitch_bot import irc
+
+PRIVMSG = (
+    "@badge-info=subscriber/12;badges=subscriber/12,premium/1;color=#1E90FF;"
+    "display-name=Chatter{i};emotes=;first-msg=0;flags=;id=8f0c{i:028x};mod=0;"
+    "returning-chatter=0;room-id=12345;subscriber=1;tmi-sent-ts=1697500000000;"
+    "turbo=0;user-id={i};user-type= :chatter{i}!chatter{i}@chatter{i}.tmi.twitch.tv "
+    "PRIVMSG #streamer :this is chat message number {i} with some words in it"
+)
+CLEARMSG = (
+    "@login=chatter{i};room-id=;target-msg-id=8f0c{i:028x};tmi-sent-ts=1697500000000 "
+    ":tmi.twitch.tv CLEARMSG #streamer :this is chat message number {i}"
+)
+CLEARCHAT = (
+    "@ban-duration=600;room-id=12345;target-user-id={i};tmi-sent-ts=1697500000000 "
+    ":tmi.twitch.tv CLEARCHAT #streamer :chatter{i}"
+)
+USERNOTICE = (
+    "@badge-info=;badges=;color=;display-name=Raider;emotes=;id=ab{i:030x};login=raider;"
+    "msg-id=raid;msg-param-viewerCount=42;room-id=12345;system-msg=42\\sraiders;"
+    "tmi-sent-ts=1697500000000;user-id=1 :tmi.twitch.tv USERNOTICE #streamer"
+)
+
+
+def recording() -> list[str]:
+    lines = []
+    for i in range(1000):
+        lines.append(PRIVMSG.format(i=i))
+        if i % 50 == 0:
+            lines.append(CLEARMSG.format(i=i))
+        if i % 200 == 0:
+            lines.append(CLEARCHAT.format(i=i))
+            lines.append(USERNOTICE.format(i=i))
+    return lines
+
+
+def old(data: str):
+    match = re.match(r"[\S\s]+target-msg-id=([\S\s]+);[\S\s]+CLEARMSG[\S\s]+", data)
+    if match:
+        return match.groups()[0]
+    return "CLEARCHAT" in data
+
+
+def new(data: str):
+    if "CLEAR" not in data:
+        return
+    for line in irc.split_lines(data):
+        tags, _, command, params = irc.split_line(line)
+        if command == "CLEARMSG":
+            return irc.parse_tags(tags, irc.CLEARMSG_TAGS).get("target-msg-id")
+        if command == "CLEARCHAT":
+            return irc.parse_tags(tags, irc.CLEARCHAT_TAGS)
+
+
+def main() -> None:
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lines = recording()
+    for name, func in (("regex", old), ("parser", new)):
+        elapsed = min(
+            timeit.repeat(
+                lambda: [func(line) for line in lines], number=1, repeat=rounds
+            )
+        )
+        print(
+            f"{name:<7} {elapsed / len(lines) * 1e6:.2f}us/line over {len(lines)} lines"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Cogs for benchmarks.load, a stand-in for what a channel usually runs plus a probe.
+
+Imported after the harness picked GUI or headless mode.
+"""
+
+from __future__ import annotations
+from collections import Counter
+import random
+import time
+
+from twitch_bot import Message
+from twitch_bot.ext import commands
+
+
+class Chat(commands.Cog):
+    """Commands and a chat listener doing the usual per message bookkeeping."""
+
+    def __init__(self, client) -> None:
+        super().__init__(client)
+        self.words: Counter[str] = Counter()
+        self.chatters: dict[str, set[str]] = {}
+
+    @commands.Cog.event()
+    async def event_message(self, message: Message) -> None:
+        if message.echo:
+            return
+        self.words.update(message.content.lower().split())
+        self.chatters.setdefault(message.channel.name, set()).add(message.author.name)
+
+    @commands.command()
+    async def ping(self, ctx: commands.Context) -> None:
+        await ctx.reply("pong")
+
+    @commands.command()
+    async def roll(self, ctx: commands.Context, sides: int = 6) -> None:
+        rolled = random.randint(1, max(sides, 1))
+        # through print, so the GUI run covers the Logs window's Stdout
+        print(f"[Chat] {ctx.author.name} rolled {rolled}")
+        await ctx.send(f"{ctx.author.name} rolled a {rolled}")
+
+    @commands.command(aliases=("say",))
+    async def echo(self, ctx: commands.Context, *, text: str) -> None:
+        await ctx.send(text)
+
+
+class Alerts(commands.Cog):
+    """Thanks raiders and announces hype train levels."""
+
+    subscriptions = ("raid", "hypetrain_begin", "hypetrain_progress", "hypetrain_end")
+
+    def __init__(self, client) -> None:
+        super().__init__(client)
+        self.level = 0
+
+    @commands.Cog.event()
+    async def event_eventsub_notification_raid(self, event) -> None:
+        raider = event.data.raider.name
+        print(f"[Alerts] raid from {raider}")
+        channel = self.client.get_channel(event.data.reciever.name)
+        await self.client.outbound.send(channel, f"Thanks for the raid {raider}!")
+
+    @commands.Cog.event()
+    async def event_eventsub_notification_hypetrain_progress(self, event) -> None:
+        if event.data.level > self.level:
+            self.level = event.data.level
+            channel = self.client.get_channel(event.data.broadcaster.name)
+            await self.client.outbound.send(channel, f"Hype train level {self.level}!")
+
+    @commands.Cog.event()
+    async def event_eventsub_notification_hypetrain_end(self, event) -> None:
+        self.level = 0
+
+
+class Probe(commands.Cog):
+    """Counts what reached the handlers and how long after the fake sent it."""
+
+    def __init__(self, client) -> None:
+        super().__init__(client)
+        self.reset()
+
+    def reset(self) -> None:
+        self.messages = 0
+        self.events = 0
+        # milliseconds from the fake sending to this handler starting
+        self.latencies: list[float] = []
+        self.event_latencies: list[float] = []
+
+    @commands.Cog.event()
+    async def event_message(self, message: Message) -> None:
+        if message.echo:
+            return
+        self.messages += 1
+        if sent := message.tags.get("sent-at"):
+            self.latencies.append((time.time_ns() - int(sent)) / 1e6)
+
+    @commands.Cog.event()
+    async def event_eventsub_notification(self, event) -> None:
+        self.events += 1
+        self.event_latencies.append(
+            (time.time() - event.headers.timestamp.timestamp()) * 1000
+        )
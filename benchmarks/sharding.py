@@ -0,0 +1,122 @@
+"""Serve many channels from sharded worker processes against a local fake Twitch.
+
+Checks every channel is joined exactly once, by the shard it hashes to,
+that chat reaches the workers and that the supervisor collects their
+metrics. Exits with status 1 on failure.
+
+python -m benchmarks.sharding [channels] [shards] [messages per channel]
+"""
+
+from __future__ import annotations
+from functools import partial
+import threading
+import asyncio
+import time
+import sys
+import os
+
+os.environ.setdefault("TWITCH_BOT_HEADLESS", "1")
+
+from benchmarks.fake_twitch import FakeTwitch, use
+from twitch_bot.sharding import Supervisor, assign
+
+
+def wait_for(supervisor: Supervisor, check, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        supervisor.poll(0.1)
+    return check()
+
+
+def live_in(supervisor: Supervisor) -> set[str]:
+    return {
+        state["name"]
+        for shard in supervisor.stats()
+        for state in shard["channels"]
+        if state["live"]
+    }
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    shards = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    messages = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    channels = [f"partner{i}" for i in range(count)]
+
+    fake = FakeTwitch(live=channels[:2])
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    port = asyncio.run_coroutine_threadsafe(fake.start(), loop).result()
+
+    # the bursts are meant to be heavy, don't report them as stalls
+    settings = {
+        "token": "fake",
+        "prefix": "*",
+        "channels": channels,
+        "watchdog_threshold": 5.0,
+    }
+    supervisor = Supervisor(
+        settings, shards, interval=0.5, initializer=partial(use, port)
+    )
+    supervisor.start()
+    try:
+        joined = wait_for(
+            supervisor, lambda: all(fake.sent[name] for name in channels), 30
+        )
+        start = time.perf_counter()
+        for name in channels:
+            asyncio.run_coroutine_threadsafe(
+                fake.chat(name, (f"message {i}" for i in range(messages))), loop
+            ).result()
+        elapsed = time.perf_counter() - start
+        # the stream check runs after the join, wait for it to be reported too
+        reported = wait_for(
+            supervisor,
+            lambda: all(shard.report for shard in supervisor.shards)
+            and live_in(supervisor) == set(channels[:2]),
+            10,
+        )
+        # two reports, so the chat shows up in at least one sample
+        supervisor.poll(supervisor.interval * 3)
+        metrics = supervisor.metrics()
+        stats = supervisor.stats()
+    finally:
+        supervisor.stop()
+    time.sleep(0.5)
+    asyncio.run_coroutine_threadsafe(fake.stop(), loop).result()
+
+    expected = assign(channels, shards)
+    placed = all(
+        sorted(state["name"] for state in shard["channels"])
+        == sorted(expected[shard["shard"]])
+        for shard in stats
+    )
+    once = all(fake.joins[name] == 1 for name in channels)
+    live = {
+        state["name"] for shard in stats for state in shard["channels"] if state["live"]
+    }
+    left = sum(
+        "Srpbotz has left the chat" in fake.received.get(name, ()) for name in channels
+    )
+    for shard in stats:
+        names = ", ".join(state["name"] for state in shard["channels"])
+        print(f"shard {shard['shard']} pid {shard['pid']}: {names}")
+    print(
+        f"{count} channels on {shards} shards, pushed {count * messages} messages "
+        f"in {elapsed:.2f}s"
+    )
+    print(
+        "combined: "
+        + ", ".join(f"{name} {value:.1f}" for name, value in sorted(metrics.items()))
+    )
+    print(f"live {sorted(live)}, left message in {left}/{count} channels")
+    ok = joined and reported and placed and once and live == set(channels[:2])
+    ok = ok and left == count
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare import and Client construction time in GUI and headless mode.
+
+Each mode runs in a fresh interpreter inside a scratch directory. Then
+`python -m twitch_bot --headless` itself runs without a display and must
+not import Qt; it fails to connect with the fake token, which is fine.
+Exits with status 1 if it imported Qt.
+
+    python -m benchmarks.startup [runs]
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import subprocess
+import statistics
+import tempfile
+import sys
+import os
+
+SCRIPT = """
+import time, sys
+start = time.perf_counter()
+from twitch_bot import Client
+imported = time.perf_counter()
+Client(token="benchmark", prefix="*")
+print(imported - start, time.perf_counter() - start, file=sys.__stdout__)
+"""
+
+
+def measure(cwd: str, headless: bool) -> tuple[float, float]:
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).parents[1]))
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    if headless:
+        env["TWITCH_BOT_HEADLESS"] = "1"
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    imported, total = map(float, output.split()[-2:])
+    return imported, total
+
+
+def entry_point(cwd: str) -> bool:
+    """Whether `python -m twitch_bot --headless` started without importing Qt."""
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).parents[1]))
+    for name in (
+        "DISPLAY",
+        "WAYLAND_DISPLAY",
+        "QT_QPA_PLATFORM",
+        "TWITCH_BOT_HEADLESS",
+    ):
+        env.pop(name, None)
+    try:
+        # every import is listed on stderr
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "twitch_bot", "--headless"],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=30,
+        ).stderr
+    except subprocess.TimeoutExpired as e:
+        # still trying to connect
+        stderr = e.stderr.decode() if isinstance(e.stderr, bytes) else e.stderr or ""
+    qt = [line for line in stderr.splitlines() if "PyQt6" in line]
+    print(f"-m twitch_bot --headless imported {len(qt)} Qt modules")
+    return not qt and "Qt platform plugin" not in stderr
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as cwd:
+        os.mkdir(os.path.join(cwd, "data"))
+        Path(cwd, "data", "styles.qss").touch()
+        Path(cwd, "data", "settings.json").write_text(
+            '{"token": "oauth:benchmark", "prefix": "*"}'
+        )
+        for name, headless in (("gui", False), ("headless", True)):
+            results = [measure(cwd, headless) for _ in range(runs)]
+            imported = statistics.median(r[0] for r in results)
+            total = statistics.median(r[1] for r in results)
+            print(
+                f"{name:<9} import: {imported * 1000:7.1f}ms  startup: {total * 1000:7.1f}ms"
+            )
+        ok = entry_point(cwd)
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
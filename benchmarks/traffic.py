@@ -0,0 +1,346 @@
+"""Synthetic and recorded Twitch traffic, played by a FakeTwitch.
+
+Every scenario is `async def scenario(fake, **options) -> dict` and runs in
+the fake's process through `fake_twitch.serve`. It returns how much it sent:
+"lines" of IRC, "messages" the client will see as chat, "commands" among
+them, "events" from EventSub and the "seconds" it took.
+
+Recordings are JSON lines, one per IRC line or EventSub notification:
+`{"t": seconds since the first, "irc": raw line}` or
+`{"t": ..., "eventsub": [type, version, event]}`. `Recorder` writes them
+from a live client.
+"""
+
+from __future__ import annotations
+from collections import Counter, defaultdict
+from typing import AsyncIterator, TYPE_CHECKING
+import asyncio
+import random
+import json
+import time
+import uuid
+import os
+
+from benchmarks.fake_twitch import (
+    FakeTwitch,
+    clearchat,
+    clearmsg,
+    hype_train as hype_train_event,
+    privmsg,
+    raid as raid_event,
+    user,
+    usernotice,
+)
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+
+__all__ = (
+    "Recorder",
+    "channels",
+    "commands",
+    "flood",
+    "hype_train",
+    "raid",
+    "replay",
+    "status",
+)
+
+VIEWERS = [f"viewer{i}" for i in range(500)]
+WORDS = (
+    "hello chat lol pog what is this game gg that was close nice play "
+    "monkaS KEKW LUL first time here love the stream can we get a"
+).split()
+COMMANDS = ("*ping", "*roll 20", "*echo hello there", "*nope", "*")
+# what a recording keeps, the client's own traffic and pings aren't chat
+RECORDED = frozenset(("PRIVMSG", "USERNOTICE", "CLEARMSG", "CLEARCHAT"))
+
+
+async def paced(rate: float, seconds: float) -> AsyncIterator[int]:
+    """How many items are due, every few milliseconds, to send `rate` a second for `seconds`."""
+    total = int(rate * seconds)
+    sent = 0
+    start = time.perf_counter()
+    while sent < total:
+        due = min(total, int((time.perf_counter() - start) * rate) + 1) - sent
+        if due > 0:
+            yield due
+            sent += due
+        await asyncio.sleep(0.005)
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(1, 12)))
+
+
+def _result(counts: Counter, start: float) -> dict:
+    return {
+        "lines": counts["lines"],
+        "messages": counts["messages"],
+        "commands": counts["commands"],
+        "events": counts["events"],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+async def status(fake: FakeTwitch) -> dict:
+    return {
+        "subscriptions": len(fake.subscriptions),
+        "joins": dict(fake.joins),
+        "sent": dict(fake.sent),
+        "requests": fake.requests,
+    }
+
+
+async def flood(
+    fake: FakeTwitch,
+    *,
+    channels: list[str],
+    rate: float = 500,
+    seconds: float = 10,
+    commands: float = 0.05,
+    moderation: float = 0.005,
+    seed: int = 0,
+) -> dict:
+    """Chat spread over `channels`, with a share of commands, deletions and timeouts."""
+    rng = random.Random(seed)
+    counts: Counter[str] = Counter()
+    start = time.perf_counter()
+    async for due in paced(rate, seconds):
+        batches: defaultdict[str, list[str]] = defaultdict(list)
+        for _ in range(due):
+            channel = rng.choice(channels)
+            author = rng.choice(VIEWERS)
+            roll = rng.random()
+            if roll < moderation / 2:
+                line = clearchat(channel, author)
+            elif roll < moderation:
+                line = clearmsg(channel, author, str(uuid.uuid4()))
+            else:
+                if roll < moderation + commands:
+                    content = rng.choice(COMMANDS)
+                    counts["commands"] += 1
+                else:
+                    content = _sentence(rng)
+                line = privmsg(channel, author, content)
+                counts["messages"] += 1
+            batches[channel].append(line)
+        for channel, lines in batches.items():
+            counts["lines"] += await fake.send(channel, lines)
+    return _result(counts, start)
+
+
+async def commands(fake: FakeTwitch, **options) -> dict:
+    """A flood of nothing but commands, including unknown ones and a bare prefix."""
+    return await flood(fake, **{**options, "commands": 1.0, "moderation": 0.0})
+
+
+async def raid(
+    fake: FakeTwitch,
+    *,
+    channels: list[str],
+    viewers: int = 1000,
+    seconds: float = 5,
+    commands: float = 0.1,
+    seed: int = 0,
+) -> dict:
+    """A raid on the first channel, then every raider says something within `seconds`."""
+    rng = random.Random(seed)
+    counts: Counter[str] = Counter()
+    channel = channels[0]
+    start = time.perf_counter()
+    counts["events"] += await fake.notify(*raid_event(channel, "raider", viewers))
+    counts["lines"] += await fake.send(
+        channel,
+        [
+            usernotice(
+                channel,
+                "raider",
+                "raid",
+                tags={"msg-param-viewerCount": str(viewers)},
+            )
+        ],
+    )
+    raiders = iter(range(viewers))
+    async for due in paced(viewers / seconds, seconds):
+        lines = []
+        for _ in range(due):
+            author = f"raider{next(raiders)}"
+            if rng.random() < commands:
+                content = rng.choice(COMMANDS)
+                counts["commands"] += 1
+            else:
+                content = "raid hype " + _sentence(rng)
+            lines.append(privmsg(channel, author, content, {"first-msg": "1"}))
+        counts["messages"] += len(lines)
+        counts["lines"] += await fake.send(channel, lines)
+    return _result(counts, start)
+
+
+async def hype_train(
+    fake: FakeTwitch,
+    *,
+    channels: list[str],
+    seconds: float = 5,
+    contributions: float = 40,
+    chat: float = 200,
+    seed: int = 0,
+) -> dict:
+    """A hype train on the first channel, subs and cheers with a progress event each, and chat."""
+    rng = random.Random(seed)
+    counts: Counter[str] = Counter()
+    channel = channels[0]
+    start = time.perf_counter()
+    started = time.time()
+    total = 0
+    level = 1
+    top: list[tuple[str, str, int]] = []
+
+    def contribute() -> str:
+        nonlocal total, level
+        author = rng.choice(VIEWERS)
+        if rng.random() < 0.5:
+            kind, amount = "subscription", 500
+            line = usernotice(
+                channel, author, "sub", tags={"msg-param-sub-plan": "1000"}
+            )
+        else:
+            kind, amount = "bits", rng.choice((100, 500, 1000))
+            line = privmsg(
+                channel, author, f"Cheer{amount} choo choo", {"bits": str(amount)}
+            )
+            counts["messages"] += 1
+        total += amount
+        level = 1 + total // 1000
+        top.append((author, kind, amount))
+        return line
+
+    top.append(("viewer0", "bits", 100))
+    total = 100
+    counts["events"] += await fake.notify(
+        *hype_train_event(channel, "begin", level, total, top, started)
+    )
+    async for due in paced(contributions + chat, seconds):
+        lines = []
+        contributed = False
+        for _ in range(due):
+            if rng.random() < contributions / (contributions + chat):
+                lines.append(contribute())
+                contributed = True
+            else:
+                lines.append(privmsg(channel, rng.choice(VIEWERS), _sentence(rng)))
+                counts["messages"] += 1
+        counts["lines"] += await fake.send(channel, lines)
+        if contributed:
+            counts["events"] += await fake.notify(
+                *hype_train_event(channel, "progress", level, total, top, started)
+            )
+    counts["events"] += await fake.notify(
+        *hype_train_event(channel, "end", level, total, top, started)
+    )
+    return _result(counts, start)
+
+
+def _split(line: str) -> tuple[str, str]:
+    """The command and channel of a raw IRC line. Kept apart from twitch_bot, the fake's process doesn't import it."""
+    if line[:1] == "@":
+        line = line.partition(" ")[2]
+    if line[:1] == ":":
+        line = line.partition(" ")[2]
+    command, _, params = line.partition(" ")
+    channel = params.partition(" ")[0]
+    return command, channel[1:] if channel[:1] == "#" else ""
+
+
+def _records(path: str | os.PathLike) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return sorted(
+            (json.loads(line) for line in f if line.strip()), key=lambda r: r["t"]
+        )
+
+
+def _localize(event: dict) -> dict:
+    """Swap recorded user ids for the fake's, so subscription conditions match."""
+    event = dict(event)
+    for key, value in tuple(event.items()):
+        if key.endswith("_login") and key[:-6] + "_id" in event:
+            event[key[:-6] + "_id"] = user(value)["id"]
+        elif isinstance(value, dict):
+            event[key] = _localize(value)
+        elif isinstance(value, list):
+            event[key] = [_localize(v) if isinstance(v, dict) else v for v in value]
+    return event
+
+
+def channels(path: str | os.PathLike) -> list[str]:
+    """The channels a recording's chat happened in, to join before replaying it."""
+    found: dict[str, None] = {}
+    for record in _records(path):
+        if "irc" in record and (channel := _split(record["irc"])[1]):
+            found[channel] = None
+    return list(found)
+
+
+async def replay(fake: FakeTwitch, *, path: str, speed: float = 1.0) -> dict:
+    """Play a recording back with its original timing, `speed` times as fast."""
+    counts: Counter[str] = Counter()
+    records = _records(path)
+    start = time.perf_counter()
+    first = records[0]["t"] if records else 0.0
+    index = 0
+    while index < len(records):
+        elapsed = (time.perf_counter() - start) * speed
+        lines = []
+        while index < len(records) and records[index]["t"] - first <= elapsed:
+            record = records[index]
+            index += 1
+            if "eventsub" in record:
+                type, version, event = record["eventsub"]
+                counts["events"] += await fake.notify(type, version, _localize(event))
+                continue
+            lines.append(record["irc"])
+            if _split(record["irc"])[0] == "PRIVMSG":
+                counts["messages"] += 1
+        if lines:
+            counts["lines"] += await fake.send(None, lines)
+        if index < len(records):
+            wait = (records[index]["t"] - first - elapsed) / speed
+            await asyncio.sleep(max(0.0, min(wait, 0.05)))
+    return _result(counts, start)
+
+
+class Recorder:
+    """Writes the chat and EventSub notifications a live client receives, for `replay`."""
+
+    def __init__(self, client: Client, path: str | os.PathLike) -> None:
+        self.file = open(path, "a", encoding="utf-8")
+        self.start: float | None = None
+        client.add_event(self.event_raw_data, "event_raw_data")
+        client.add_event(
+            self.event_eventsub_notification, "event_eventsub_notification"
+        )
+
+    def _write(self, record: dict) -> None:
+        now = time.monotonic()
+        if self.start is None:
+            self.start = now
+        self.file.write(json.dumps({"t": round(now - self.start, 6), **record}) + "\n")
+
+    async def event_raw_data(self, data: str) -> None:
+        for line in data.split("\r\n"):
+            if line and _split(line)[0] in RECORDED:
+                self._write({"irc": line})
+        self.file.flush()
+
+    async def event_eventsub_notification(self, event) -> None:
+        subscription = event.subscription
+        self._write(
+            {
+                "eventsub": [
+                    subscription.type,
+                    str(subscription.version),
+                    event._raw_data["payload"]["event"],
+                ]
+            }
+        )
+        self.file.flush()
@@ -0,0 +1,73 @@
+"""Block the event loop from a cog on purpose and check the watchdog reports it.
+
+Exits with status 1 if a stall goes unreported or is blamed on the wrong
+cog. Also reports the watchdog's CPU cost while the loop is idle.
+
+python -m benchmarks.watchdog [stalls] [block seconds]
+"""
+
+from __future__ import annotations
+import asyncio
+import logging
+import time
+import sys
+import os
+
+os.environ.setdefault("TWITCH_BOT_HEADLESS", "1")
+
+from twitch_bot import Client
+from twitch_bot.ext import commands
+
+
+class Blocking(commands.Cog):
+    def block(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+async def run(client: Client, stalls: int, seconds: float) -> list[str]:
+    reports = []
+    log = client.window.log
+
+    def record(text: str, level=logging.ERROR) -> None:
+        reports.append(text)
+        log(text, level)
+
+    client.window.log = record
+    cog = Blocking(client)
+
+    client.watchdog.start()
+    idle = time.process_time()
+    await asyncio.sleep(2)
+    idle = time.process_time() - idle
+    for _ in range(stalls):
+        cog.block(seconds)
+        await asyncio.sleep(0.2)
+    client.watchdog.stop()
+    print(f"idle cpu {idle / 2 * 100:.2f}% with the watchdog running")
+    return reports
+
+
+def main() -> None:
+    stalls = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    # just over the threshold, a report may take up to an interval longer
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.35
+    client = Client(token="oauth:benchmark", prefix="*", initial_channels=[])
+    reports = client.loop.run_until_complete(run(client, stalls, seconds))
+
+    blocked = [r for r in reports if r.startswith("Event loop blocked")]
+    recovered = [r for r in reports if r.startswith("Event loop was blocked")]
+    ok = (
+        client.watchdog.stalls == stalls
+        and len(blocked) == len(recovered) == stalls
+        and all("Blocking" in report and "time.sleep" in report for report in blocked)
+    )
+    print(
+        f"{client.watchdog.stalls}/{stalls} stalls reported, "
+        f"max lag {client.watchdog.max_lag * 1000:.0f}ms"
+    )
+    print("ok" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
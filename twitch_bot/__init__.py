@@ -1,3 +1,6 @@
+import sys
+import os
+
 from twitchio.user import *
 from twitchio.channel import Channel
 from twitchio.chatter import Chatter, PartialChatter
@@ -7,7 +10,26 @@ from twitchio.message import Message, HypeChatData
 from twitchio.models import *
 from twitchio.rewards import *
 from twitchio.utils import *
-from .ui import *
+from .irc import *
+
+
+def _headless() -> bool:
+    if os.environ.get("TWITCH_BOT_HEADLESS") == "1":
+        return True
+    # `python -m twitch_bot` imports the package before __main__ runs,
+    # argv[0] stays "-m" until then
+    if sys.argv[:1] != ["-m"]:
+        return False
+    from .cli import parser
+
+    args, _ = parser().parse_known_args(sys.argv[1:])
+    return args.headless or args.shards > 1
+
+
+HEADLESS = _headless()
+
+if not HEADLESS:
+    from .ui import *
 from .client import *
 
 from twitchio import (
@@ -1,3 +1,24 @@
-from twitch_bot import Client
+import os
 
-Client(**Client.load_settings()).run()
+from twitch_bot.cli import parser
+
+
+def main() -> None:
+    args = parser().parse_args()
+    # for spawned workers, the package already read the arguments itself
+    if args.headless or args.shards > 1:
+        os.environ["TWITCH_BOT_HEADLESS"] = "1"
+
+    from twitch_bot import Client
+
+    if args.shards > 1:
+        from twitch_bot.sharding import Supervisor
+
+        return Supervisor(Client.load_settings(), args.shards).run()
+
+    Client(**Client.load_settings()).run()
+
+
+# spawned process pool workers import this module too, they mustn't start a bot
+if __name__ == "__main__":
+    main()
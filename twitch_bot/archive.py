@@ -0,0 +1,315 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import traceback
+import threading
+import sqlite3
+import queue
+import time
+import sys
+import os
+
+if TYPE_CHECKING:
+    from twitch_bot import Client, Message
+
+__all__ = ("ArchivedMessage", "ChatArchive")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT UNIQUE,
+    channel TEXT NOT NULL,
+    author TEXT,
+    content TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS messages_channel ON messages (channel, timestamp);
+CREATE INDEX IF NOT EXISTS messages_author ON messages (author, channel, timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.rowid, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content)
+    VALUES ('delete', old.rowid, old.content);
+END;
+"""
+
+INSERT = (
+    "INSERT OR IGNORE INTO messages (id, channel, author, content, timestamp)"
+    " VALUES (?, ?, ?, ?, ?)"
+)
+
+
+class ArchivedMessage:
+    __slots__ = ("id", "channel", "author", "content", "timestamp", "deleted")
+
+    def __init__(
+        self,
+        id: str,
+        channel: str,
+        author: str | None,
+        content: str,
+        timestamp: float,
+        deleted: bool,
+    ) -> None:
+        self.id = id
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.timestamp = timestamp
+        self.deleted = deleted
+
+    def __repr__(self) -> str:
+        return f"<ArchivedMessage id={self.id} author={self.author}>"
+
+
+def _match(query: str) -> str:
+    """Every word of `query` as an FTS phrase, so user input can't be FTS syntax."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+class ChatArchive:
+    """Keeps chat in a SQLite database with a full-text index over the content.
+
+    Messages, deletions, clears and timeouts are queued without touching the
+    disk and written by a background thread, in one transaction per batch.
+    When the queue is full new entries are dropped and counted, chat never
+    waits on the disk. Deleted messages are kept and marked, moderators can
+    still find them. Anything older than `retention` seconds is pruned every
+    `prune_interval` seconds.
+
+    Queries open their own read-only connection on a worker thread, the WAL
+    lets them run while the writer commits. If the database can't be opened
+    the archive turns itself off: nothing is queued and searches find
+    nothing until it's started again.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        path: str | os.PathLike = "data/chat.db",
+        *,
+        retention: float | None = 90 * 86400.0,
+        queue_size: int = 50_000,
+        batch_size: int = 1000,
+        flush_interval: float = 0.5,
+        prune_interval: float = 3600.0,
+    ) -> None:
+        self.client = client
+        self.path = os.fspath(path)
+        self.retention = retention
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        self.written = 0
+        self.dropped = 0
+        # False once the database couldn't be opened
+        self.enabled = True
+        # seconds between queueing the last batch's oldest entry and its commit
+        self.lag = 0.0
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+        self._pruned = 0.0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _put(self, item: tuple) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def add(self, message: Message) -> None:
+        if message.id is None or message.channel is None:
+            return
+        author = message.author.name if message.author else None
+        now = time.time()
+        self._put(
+            (
+                now,
+                INSERT,
+                (message.id, message.channel.name, author, message.content, now),
+            )
+        )
+
+    def delete(self, id: str) -> None:
+        self._put((time.time(), "UPDATE messages SET deleted = 1 WHERE id = ?", (id,)))
+
+    def clear(self, channel: str) -> None:
+        now = time.time()
+        self._put(
+            (
+                now,
+                "UPDATE messages SET deleted = 1 WHERE channel = ? AND timestamp <= ?",
+                (channel, now),
+            )
+        )
+
+    def purge(self, channel: str, author: str) -> None:
+        """Mark what `author` said in `channel` so far as deleted, for timeouts and bans."""
+        now = time.time()
+        self._put(
+            (
+                now,
+                "UPDATE messages SET deleted = 1"
+                " WHERE author = ? AND channel = ? AND timestamp <= ?",
+                (author, channel, now),
+            )
+        )
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._ready.clear()
+        self.enabled = True
+        self._thread = threading.Thread(
+            target=self._run, name="twitch-bot-archive", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        """Write everything still queued and close the database. Blocks, run it off the loop."""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if directory := os.path.dirname(self.path):
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        return db
+
+    def _run(self) -> None:
+        try:
+            db = self._connect()
+        except (sqlite3.Error, OSError) as e:
+            self.enabled = False
+            self.client.window.log(f"Couldn't open the chat archive {self.path}: {e}")
+            return
+        finally:
+            self._ready.set()
+        try:
+            while not (self._stopping.is_set() and self._queue.empty()):
+                self._maybe_prune(db)
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._write_batch(db, batch)
+                except sqlite3.Error:
+                    traceback.print_exc(file=sys.__stderr__)
+        finally:
+            db.close()
+
+    def _write_batch(self, db: sqlite3.Connection, batch: list[tuple]) -> None:
+        db.execute("BEGIN")
+        try:
+            # runs of inserts go through executemany, the rest keep their order
+            index = 0
+            while index < len(batch):
+                sql = batch[index][1]
+                end = index
+                while end < len(batch) and batch[end][1] == sql:
+                    end += 1
+                db.executemany(sql, (params for _, _, params in batch[index:end]))
+                index = end
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        self.written += len(batch)
+        self.lag = time.time() - batch[0][0]
+
+    def _maybe_prune(self, db: sqlite3.Connection) -> None:
+        if self.retention is None or time.time() - self._pruned < self.prune_interval:
+            return
+        self._pruned = time.time()
+        cutoff = self._pruned - self.retention
+        # in chunks, a single huge delete would hold the write lock for long
+        while True:
+            with db:
+                deleted = db.execute(
+                    "DELETE FROM messages WHERE rowid IN"
+                    " (SELECT rowid FROM messages WHERE timestamp < ? LIMIT 5000)",
+                    (cutoff,),
+                ).rowcount
+            if deleted < 5000:
+                break
+
+    def _search(
+        self,
+        query: str,
+        channel: str | None,
+        author: str | None,
+        since: float | None,
+        limit: int,
+    ) -> list[ArchivedMessage]:
+        self._ready.wait(5.0)
+        sql = (
+            "SELECT m.id, m.channel, m.author, m.content, m.timestamp, m.deleted"
+            " FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid"
+            " WHERE messages_fts MATCH ?"
+        )
+        params: list = [_match(query)]
+        if channel is not None:
+            sql += " AND m.channel = ?"
+            params.append(channel)
+        if author is not None:
+            sql += " AND m.author = ?"
+            params.append(author.lower())
+        if since is not None:
+            sql += " AND m.timestamp >= ?"
+            params.append(since)
+        sql += " ORDER BY m.timestamp DESC LIMIT ?"
+        params.append(limit)
+
+        db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            return [
+                ArchivedMessage(*row[:5], bool(row[5]))
+                for row in db.execute(sql, params)
+            ]
+        finally:
+            db.close()
+
+    async def search(
+        self,
+        query: str,
+        *,
+        channel: str | None = None,
+        author: str | None = None,
+        since: float | None = None,
+        limit: int = 20,
+    ) -> list[ArchivedMessage]:
+        """Messages containing every word of `query`, newest first."""
+        if not (self.enabled and query.split()):
+            return []
+        return await self.client.loop.run_in_executor(
+            None, self._search, query, channel, author, since, limit
+        )
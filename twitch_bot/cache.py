@@ -0,0 +1,239 @@
+from __future__ import annotations
+from typing import Any, Generic, Hashable, Iterator, TypeVar, TYPE_CHECKING
+from collections import OrderedDict
+import time
+
+if TYPE_CHECKING:
+    from twitch_bot import Message
+
+__all__ = ("CachedMessage", "MessageCache", "TTLCache")
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+MISSING: Any = object()
+
+
+class CachedMessage:
+    __slots__ = ("id", "author", "content", "timestamp", "channel")
+
+    def __init__(
+        self,
+        id: str,
+        author: str | None,
+        content: str,
+        timestamp: float,
+        channel: str | None = None,
+    ):
+        self.id = id
+        self.author = author
+        self.content = content
+        self.timestamp = timestamp
+        self.channel = channel
+
+    @classmethod
+    def from_message(cls, message: Message) -> CachedMessage:
+        author = message.author.name if message.author else None
+        channel = message.channel.name if message.channel else None
+        return cls(message.id, author, message.content, time.time(), channel)
+
+    def __repr__(self) -> str:
+        return (
+            f"<CachedMessage id={self.id} author={self.author} channel={self.channel}>"
+        )
+
+
+class MessageCache:
+    """Recent chat messages keyed by id, bounded by count and by age.
+
+    The least recently used record is evicted once `max_size` is reached and
+    records older than `max_age` seconds are dropped on the next access.
+
+    Records are also indexed by channel and author in the order they
+    arrived, keeping at most `max_per_author` per author and channel, so a
+    moderation action can find a user's messages in the channel it happened
+    in without scanning the whole cache.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        max_age: float | None = 3600.0,
+        max_per_author: int = 100,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_per_author = max_per_author
+        self._records: OrderedDict[str, CachedMessage] = OrderedDict()
+        # (channel, author) -> their records by id, oldest first
+        self._authors: dict[tuple[str | None, str], dict[str, CachedMessage]] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, id: str) -> bool:
+        return self.get(id) is not None
+
+    def __iter__(self) -> Iterator[CachedMessage]:
+        self.prune()
+        return iter(tuple(self._records.values()))
+
+    def _expired(self, record: CachedMessage, now: float) -> bool:
+        return self.max_age is not None and now - record.timestamp > self.max_age
+
+    def add(self, message: Message) -> CachedMessage | None:
+        if message.id is None:
+            return None
+        record = CachedMessage.from_message(message)
+        if record.id in self._records:
+            self._discard(self._records[record.id])
+        self._records[record.id] = record
+        self._records.move_to_end(record.id)
+        if record.author is not None:
+            messages = self._authors.setdefault((record.channel, record.author), {})
+            messages[record.id] = record
+            if len(messages) > self.max_per_author:
+                oldest = next(iter(messages))
+                del messages[oldest]
+                self._records.pop(oldest, None)
+        while len(self._records) > self.max_size:
+            self._discard(self._records.popitem(last=False)[1])
+        self.prune(record.timestamp)
+        return record
+
+    def _discard(self, record: CachedMessage) -> None:
+        """Drop a record that left `_records` from the author index."""
+        key = (record.channel, record.author)
+        if (messages := self._authors.get(key)) is None:
+            return
+        messages.pop(record.id, None)
+        if not messages:
+            del self._authors[key]
+
+    def get(self, id: str) -> CachedMessage | None:
+        if (record := self._records.get(id)) is None:
+            return None
+        if self._expired(record, time.time()):
+            del self._records[id]
+            self._discard(record)
+            return None
+        self._records.move_to_end(id)
+        return record
+
+    def pop(self, id: str) -> CachedMessage | None:
+        record = self._records.pop(id, None)
+        if record is None:
+            return None
+        self._discard(record)
+        if self._expired(record, time.time()):
+            return None
+        return record
+
+    def _keys(self, author: str, channel: str | None) -> list[tuple[str | None, str]]:
+        author = author.lower()
+        if channel is not None:
+            return [(channel.lower(), author)]
+        return [key for key in self._authors if key[1] == author]
+
+    def by_author(
+        self, author: str, within: float | None = None, channel: str | None = None
+    ) -> list[CachedMessage]:
+        """The author's cached messages, oldest first, optionally only the last `within` seconds.
+
+        Only those in `channel` if it's given, otherwise from every channel.
+        """
+        now = time.time()
+        since = now - within if within is not None else float("-inf")
+        records = [
+            record
+            for key in self._keys(author, channel)
+            for record in self._authors.get(key, {}).values()
+            if record.timestamp >= since and not self._expired(record, now)
+        ]
+        if channel is None:
+            records.sort(key=lambda record: record.timestamp)
+        return records
+
+    def purge_author(
+        self, author: str, channel: str | None = None
+    ) -> list[CachedMessage]:
+        """Remove and return the author's cached messages in `channel`, or every channel, oldest first."""
+        now = time.time()
+        records = []
+        for key in self._keys(author, channel):
+            for id, record in self._authors.pop(key, {}).items():
+                self._records.pop(id, None)
+                if not self._expired(record, now):
+                    records.append(record)
+        if channel is None:
+            records.sort(key=lambda record: record.timestamp)
+        return records
+
+    def prune(self, now: float | None = None) -> None:
+        if self.max_age is None:
+            return
+        now = time.time() if now is None else now
+        records = self._records
+        while records:
+            record = next(iter(records.values()))
+            if not self._expired(record, now):
+                break
+            self._discard(records.popitem(last=False)[1])
+
+    def clear(self, channel: str | None = None) -> None:
+        """Drop every record, or only those of `channel`."""
+        if channel is None:
+            self._records.clear()
+            self._authors.clear()
+            return
+        channel = channel.lower()
+        for id in [id for id, r in self._records.items() if r.channel == channel]:
+            del self._records[id]
+        for key in [key for key in self._authors if key[0] == channel]:
+            del self._authors[key]
+
+
+class TTLCache(Generic[K, V]):
+    """A mapping bounded by count and by age, like MessageCache but for any value.
+
+    `get` returns `default` (MISSING unless given) for absent or expired keys
+    so a cached None, e.g. "no such user", can be told apart from a miss.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 300.0):
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key) is not MISSING
+
+    def get(self, key: K, default: Any = MISSING) -> V | Any:
+        if (entry := self._entries.get(key)) is None:
+            return default
+        value, expires = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K, default: Any = MISSING) -> V | Any:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
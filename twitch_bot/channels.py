@@ -0,0 +1,112 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, Mapping, TYPE_CHECKING
+import time
+
+if TYPE_CHECKING:
+    from twitch_bot import Channel, User
+
+__all__ = ("ChannelState", "Channels")
+
+
+class ChannelState:
+    """What the client knows about one channel it serves."""
+
+    __slots__ = ("name", "cogs", "token", "channel", "streamer", "live", "joined")
+
+    def __init__(
+        self,
+        name: str,
+        cogs: Iterable[str] | None = None,
+        token: str | None = None,
+    ) -> None:
+        self.name = name.lower().lstrip("#")
+        # None means every cog
+        self.cogs: frozenset[str] | None = None if cogs is None else frozenset(cogs)
+        # the broadcaster's own user token, for EventSub topics needing their consent
+        self.token = token
+        self.channel: Channel | None = None
+        self.streamer: User | None = None
+        self.live = False
+        self.joined: float | None = None
+
+    def __repr__(self) -> str:
+        return f"<ChannelState name={self.name} live={self.live}>"
+
+    def allows(self, cog: str | None) -> bool:
+        return cog is None or self.cogs is None or cog in self.cogs
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "cogs": None if self.cogs is None else sorted(self.cogs),
+            "joined": self.joined is not None,
+            "live": self.live,
+        }
+
+
+class Channels:
+    """The channels the client serves, from the "channels" setting.
+
+    Either a list of channel names or a mapping of name to options, where
+    `{"cogs": ["Clips"]}` limits that channel to the listed cogs and
+    `{"token": "..."}` is the broadcaster's user token, see
+    SubscriptionManager. The first
+    channel is the home channel, `Client.channel` and `Client.streamer`.
+    """
+
+    def __init__(self, config: Iterable[str] | Mapping[str, dict] = ()) -> None:
+        self._states: dict[str, ChannelState] = {}
+        if isinstance(config, Mapping):
+            for name, options in config.items():
+                options = options or {}
+                self.add(name, options.get("cogs"), options.get("token"))
+        else:
+            for name in config:
+                self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __iter__(self) -> Iterator[ChannelState]:
+        return iter(tuple(self._states.values()))
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower().lstrip("#") in self._states
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._states)
+
+    @property
+    def home(self) -> ChannelState | None:
+        return next(iter(self._states.values()), None)
+
+    def get(self, name: str) -> ChannelState | None:
+        return self._states.get(name.lower().lstrip("#"))
+
+    def add(
+        self,
+        name: str,
+        cogs: Iterable[str] | None = None,
+        token: str | None = None,
+    ) -> ChannelState:
+        state = ChannelState(name, cogs, token)
+        return self._states.setdefault(state.name, state)
+
+    def remove(self, name: str) -> ChannelState | None:
+        return self._states.pop(name.lower().lstrip("#"), None)
+
+    def joined(self, channel: Channel) -> ChannelState:
+        state = self.get(channel.name) or self.add(channel.name)
+        state.channel = channel
+        state.joined = time.time()
+        return state
+
+    def allows(self, channel: str, cog: str | None) -> bool:
+        """Whether `cog` handles `channel`, channels we weren't configured for allow every cog."""
+        state = self.get(channel)
+        return state is None or state.allows(cog)
+
+    @property
+    def live(self) -> set[str]:
+        return {state.name for state in self._states.values() if state.live}
@@ -0,0 +1,18 @@
+import argparse
+
+__all__ = ("parser",)
+
+
+def parser() -> argparse.ArgumentParser:
+    """The arguments of `python -m twitch_bot`, see __main__."""
+    parser = argparse.ArgumentParser(prog="twitch_bot")
+    parser.add_argument(
+        "--headless", action="store_true", help="run without the GUI or importing Qt"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="spread the channels across this many headless worker processes",
+    )
+    return parser
@@ -1,18 +1,40 @@
 from typing import Coroutine
-import traceback
-import importlib
 import asyncio
 import inspect
-import json
+import time
 import sys
 import os
-import re
 
-from twitch_bot import MainWindow, Message, Channel
-from twitch_bot.QtGui import QIcon
-from twitch_bot.QtWidgets import QApplication
+from twitch_bot import HEADLESS, Message, Channel, User, irc
 from twitch_bot.ext import commands, eventsub, routines
+from twitch_bot.cache import MessageCache
+from twitch_bot.cogloader import CogLoader, LazyCommand
+from twitch_bot.subscriptions import SubscriptionManager
+from twitch_bot.dispatch import EventCoalescer
+from twitch_bot.outbound import SendQueue
+from twitch_bot.help import HelpIndex, chunk
+from twitch_bot.helix import HelixCache
+from twitch_bot.metrics import Metrics
+from twitch_bot.perf import JSONLinesExporter, Profiler, PrometheusExporter
+from twitch_bot.watchdog import LoopMonitor, Watchdog, monitored_loop
+from twitch_bot.executor import Executor
+from twitch_bot.scheduler import Scheduler
+from twitch_bot.channels import Channels, ChannelState
+from twitch_bot.archive import ChatArchive
+from twitch_bot.filters import MessageFilter
+from twitch_bot.settings import Settings, read
+from twitch_bot.logwriter import LogWriter, writer
+
+if HEADLESS:
+    from twitch_bot.headless import HeadlessWindow
+else:
+    from twitch_bot import MainWindow
+    from twitch_bot.QtGui import QIcon
+    from twitch_bot.QtWidgets import QApplication
+    from twitch_bot.eventloop import QtEventLoop, QtSelector
 from twitchio.ext.commands import Bot
+from twitchio.ext.commands.stringparser import StringParser
+from twitchio.ext.commands.utils import _CaseInsensitiveDict
 
 __all__ = ("Client",)
 
@@ -21,21 +43,115 @@ sys.path.append(os.path.join(sys.path[0], "site-packages"))
 
 class Client(Bot):
     def __init__(self, *args, **kwargs) -> None:
+        # the watchdog reads when the loop is busy from its selector
+        monitor = None
+        if HEADLESS:
+            self.application = None
+            if (loop := kwargs.pop("loop", None)) is None:
+                loop, monitor = monitored_loop()
+        else:
+            self.application = QApplication([])
+            self.application.setWindowIcon(QIcon("icons/twitch.ico"))
+            # the asyncio loop owns the process lifetime, see MainWindow.close
+            self.application.setQuitOnLastWindowClosed(False)
+            if (loop := kwargs.pop("loop", None)) is None:
+                monitor = LoopMonitor(QtSelector())
+                loop = QtEventLoop(monitor)
+        # twitchio's Bot drops the loop kwarg and uses get_event_loop()
+        asyncio.set_event_loop(loop)
+        # log_path, log_max_bytes, ... before the window starts the writer
+        writer.configure(
+            **{
+                name: kwargs.pop(f"log_{name}")
+                for name in LogWriter.OPTIONS
+                if f"log_{name}" in kwargs
+            }
+        )
+        self._messages = MessageCache(
+            kwargs.pop("max_messages", 10_000),
+            kwargs.pop("message_ttl", 3600.0),
+            kwargs.pop("max_messages_per_user", 100),
+        )
+        self.channels = Channels(kwargs.pop("channels", ()))
+        self.cog_loader = CogLoader(self, lazy=kwargs.pop("lazy_cogs", True))
+        poll = kwargs.pop("settings_poll", 2.0)
+        # with the GUI the CogWatcher sees settings.json change
+        self.settings = Settings(
+            self, self.cog_loader.path, poll=poll if HEADLESS else 0
+        )
+        exports = kwargs.pop("profile_export", {})
+        exporters = []
+        if "jsonl" in exports:
+            exporters.append(JSONLinesExporter(exports["jsonl"]))
+        if "prometheus" in exports:
+            exporters.append(PrometheusExporter(exports["prometheus"]))
+        self.profiler = Profiler(
+            self,
+            enabled=kwargs.pop("profile", False),
+            exporters=exporters,
+            interval=kwargs.pop("profile_interval", 60.0),
+        )
+        self.profiler.instrument_client()
+        coalesced = kwargs.pop("coalesce_events", ())
+        self.coalescer = EventCoalescer(
+            self,
+            self._dispatch,
+            EventCoalescer.PROGRESS_EVENTS if coalesced is True else coalesced,
+            kwargs.pop("coalesce_window", 0.1),
+        )
+        self.outbound = SendQueue(
+            self,
+            max_pending=kwargs.pop("max_outbound", 100),
+            merge=kwargs.pop("merge_outbound", True),
+        )
+        self.help = HelpIndex()
+        self.helix = HelixCache(self, ttl=kwargs.pop("helix_ttl", 300.0))
+        self.metrics = Metrics(self)
+        self.watchdog = Watchdog(
+            self,
+            monitor,
+            threshold=kwargs.pop("watchdog_threshold", 0.25),
+            dump_tasks=kwargs.pop("watchdog_dump_tasks", False),
+        )
+        self.scheduler = Scheduler(self)
+        self.filters = MessageFilter()
+        # opt-in, set "archive" to the database path
+        archive = kwargs.pop("archive", None)
+        retention = kwargs.pop("archive_retention_days", 90)
+        self.archive = (
+            ChatArchive(self, archive, retention=retention and retention * 86400.0)
+            if archive
+            else None
+        )
+        self.executor = Executor(
+            self,
+            threads=kwargs.pop("thread_workers", 8),
+            processes=kwargs.pop("process_workers", None),
+            per_cog=kwargs.pop("cog_concurrency", 2),
+        )
+        # names and aliases -> commands, rebuilt on first lookup after a change
+        self._index: dict[str, commands.Command | None] | None = None
         super().__init__(*args, **kwargs)
+        # the index is a plain dict, looked up lowercased like twitchio's
+        self._case_insensitive = isinstance(self._commands, _CaseInsensitiveDict)
+        # with fixed prefixes, messages that can't be commands are dropped early
+        prefix = self._prefix
+        self._prefixes: tuple[str, ...] | None = (
+            (prefix,)
+            if isinstance(prefix, str)
+            else tuple(prefix) if isinstance(prefix, (list, tuple, set)) else None
+        )
         self._token: str = kwargs.get("token") or args[0]
         self._es = eventsub.EventSubWSClient(self)
-        self._messages: dict[str, Message] = {}
-        self.routines: dict[str, tuple[routines.Routine]] = {}
-        self.application = QApplication([])
-        self.application.setWindowIcon(QIcon("icons/twitch.ico"))
-        self.window = MainWindow(self)
-        self.streamer = None
+        self.subscriptions = SubscriptionManager(self, self._es)
+        self.window = HeadlessWindow(self) if HEADLESS else MainWindow(self)
+        if "log_capacity" in kwargs:
+            self.window.logs.setCapacity(kwargs["log_capacity"])
         self._tasks: set[asyncio.Task] = set()
 
     @staticmethod
-    def load_settings() -> None:
-        with open("data/settings.json") as f:
-            return json.load(f)
+    def load_settings() -> dict:
+        return read("data/settings.json")
 
     def create_task(self, coro: Coroutine) -> asyncio.Task:
         if not inspect.iscoroutine(coro):
@@ -45,39 +161,88 @@ class Client(Bot):
         self._tasks.add(task)
         return task
 
-    def add_cogs(self) -> None:
-        for path in os.listdir("cogs"):
-            if os.path.isfile(f"cogs/{path}"):
-                continue
-            if "settings.json" not in os.listdir(f"cogs/{path}"):
-                continue
-            try:
-                mod = importlib.import_module(f"cogs.{path}")
-                mod.setup(self.window.client)
-            except Exception as e:
-                print(f"Unable to load cog: {path.capitalize()}")
-                traceback.print_exception(type(e), e, e.__traceback__)
+    async def add_cogs(self) -> None:
+        await self.cog_loader.load_all()
+        self.subscriptions.refresh()
+        self.sync_subscriptions()
+        self.window.cogWatcher.watch(self.cog_loader.path)
 
     def add_cog(self, cog: commands.Cog) -> None:
         if not isinstance(cog, commands.Cog):
             raise TypeError("Cog must be of type twitchio.ext.commands.Cog")
-        super().add_cog(cog)
-        task_list = tuple(
-            getattr(cog, attr)
-            for attr in dir(cog)
-            if isinstance(getattr(cog, attr, None), routines.Routine)
-        )
-        if task_list:
-            self.routines[cog.name] = task_list
+        # before anything is registered, a cog with bad settings or filter
+        # patterns doesn't load
+        self.settings.add(cog)
+        try:
+            rules = self.filters.compile(
+                cog.name, cog.filter_terms, cog.filter_patterns
+            )
+            super().add_cog(cog)
+        except Exception:
+            self.settings.remove(cog)
+            raise
+        for name in cog.__routines__:
+            routine = getattr(cog, name)
+            if not isinstance(routine, routines.Job):
+                # plain twitchio routines run from the scheduler too
+                routine = routines.Job.adopt(routine, cog)
+            self.scheduler.add(routine)
+        for rule in rules:
+            self.filters.add_rule(rule)
+        self.help.add(cog)
         self.window.stack.addCog(cog)
+        if self.subscriptions.declare(self.subscriptions.of(cog)):
+            self.sync_subscriptions()
 
     def remove_cog(self, cog: commands.Cog) -> None:
-        tasks = self.routines.pop(cog.name, ())
-        for task in tasks:
-            task.stop()
+        self.scheduler.remove_cog(cog)
+        self.executor.cancel(cog.name)
+        self.filters.remove(cog.name)
+        self.settings.remove(cog)
 
         self.window.stack.removeCog(cog)
-        return super().remove_cog(cog.name)
+        self.help.remove(cog)
+        super().remove_cog(cog.name)
+        self.subscriptions.refresh()
+
+    def add_command(self, command: commands.Command) -> None:
+        try:
+            super().add_command(command)
+        finally:
+            self._index = None
+
+    def remove_command(self, name: str) -> None:
+        try:
+            super().remove_command(name)
+        finally:
+            self._index = None
+
+    def _find_command(self, name: str) -> commands.Command | None:
+        if self._index is None:
+            # keys are lowercase already if the dicts are case insensitive
+            index: dict[str, commands.Command | None] = dict(self.commands)
+            # aliases win over a command of the same name, like in twitchio
+            for alias, target in self._command_aliases.items():
+                index[alias] = (
+                    self.commands[target] if target in self.commands else None
+                )
+            self._index = index
+        return self._index.get(name.lower() if self._case_insensitive else name)
+
+    def run_event(self, event_name: str, *args) -> None:
+        if self.coalescer.wants(event_name):
+            return self.coalescer.submit(event_name, args)
+        self.coalescer.before(event_name, args)
+        return self._dispatch(event_name, *args)
+
+    def _dispatch(self, event_name: str, *args) -> None:
+        return super().run_event(event_name, *args)
+
+    def add_event(self, callback, name: str = None) -> None:
+        super().add_event(callback, name)
+        # timed in place, registered_callbacks keeps the callback itself
+        listeners = self._events[name or callback.__name__]
+        listeners[-1] = self.profiler.listener(listeners[-1])
 
     def remove_event(self, callback) -> bool:
         if ret := super().remove_event(callback):
@@ -85,57 +250,195 @@ class Client(Bot):
         return ret
 
     async def event_raw_data(self, data: str):
-        match = re.match(r"[\S\s]+target-msg-id=([\S\s]+);[\S\s]+CLEARMSG[\S\s]+", data)
-        if match and (message := self._messages.pop(match.groups()[0], None)):
-            return self.run_event("message_delete", message)
-        if "CLEARCHAT" in data:
-            return self.run_event("message_clear")
+        if "CLEAR" not in data:
+            # cheap reject for the PRIVMSG majority, the parser confirms the rest
+            return
+        for line in irc.split_lines(data):
+            tags, _, command, params = irc.split_line(line)
+            if command == "CLEARMSG":
+                channel, content = irc.split_params(params)
+                tags = irc.parse_tags(tags, irc.CLEARMSG_TAGS)
+                message = self._messages.pop(tags.get("target-msg-id"))
+                if self.archive is not None:
+                    self.archive.delete(tags.get("target-msg-id"))
+                event = irc.MessageDelete(channel, content, tags, message)
+                self.run_event("message_delete", event)
+            elif command == "CLEARCHAT":
+                channel, login = irc.split_params(params)
+                tags = irc.parse_tags(tags, irc.CLEARCHAT_TAGS)
+                if self.archive is not None:
+                    if login is None:
+                        self.archive.clear(channel.lstrip("#"))
+                    else:
+                        self.archive.purge(channel.lstrip("#"), login)
+                # a /clear or timeout only applies to the channel it happened in
+                if login is None:
+                    self._messages.clear(channel.lstrip("#"))
+                    self.run_event("message_clear", irc.MessageClear(channel, tags))
+                else:
+                    self.run_event(
+                        "user_timeout", irc.UserTimeout(channel, login, tags)
+                    )
+                    # bans and timeouts both arrive as CLEARCHAT with a login
+                    messages = self._messages.purge_author(login, channel.lstrip("#"))
+                    self.run_event("messages_purged", login, messages)
+
+    @staticmethod
+    def _command_text(message: Message) -> str:
+        # replies start with the @mention of whoever they reply to
+        if "reply-parent-msg-id" in message.tags:
+            return message.content.partition(" ")[2]
+        return message.content
+
+    async def handle_commands(self, message: Message) -> None:
+        if self._prefixes is not None and not self._command_text(message).startswith(
+            self._prefixes
+        ):
+            # most chat isn't a command, skip building a Context for it
+            return
+        await self.invoke(await self.get_context(message))
+
+    async def get_context(self, message: Message, *, cls=None) -> commands.Context:
+        cls = cls or commands.Context
+        content = self._command_text(message)
+        if self._prefixes is None:
+            prefix = await self.get_prefix(message)
+        else:
+            prefix = next((p for p in self._prefixes if content.startswith(p)), None)
+        if not prefix:
+            return cls(message=message, prefix=prefix, valid=False, bot=self)
+
+        view = StringParser()
+        parsed = view.process_string(content[len(prefix) :].lstrip())
+        name = parsed.pop(0, None)
+        if name is None or (command := self._find_command(name)) is None:
+            context = cls(
+                message=message,
+                bot=self,
+                prefix=prefix,
+                command=None,
+                valid=False,
+                view=view,
+            )
+            error = (
+                commands.CommandNotFound(f'No command "{name}" was found.', name)
+                if name is not None
+                else commands.CommandNotFound("No valid command was passed.", "")
+            )
+            self.run_event("command_error", context, error)
+            return context
+
+        if isinstance(command, LazyCommand):
+            self.cog_loader.load(command.spec.name)
+            command = self.get_command(command.name)
+            if command is None:
+                return cls(
+                    message=message,
+                    bot=self,
+                    prefix=prefix,
+                    command=None,
+                    valid=False,
+                    view=view,
+                )
+        return cls(
+            message=message,
+            bot=self,
+            prefix=prefix,
+            command=command,
+            valid=True,
+            view=view,
+        )
+
+    def recent_messages(
+        self, user: str, within: float | None = None, channel: str | None = None
+    ) -> list:
+        """Cached messages from `user`, oldest first, optionally only the last `within` seconds or in `channel`."""
+        return self._messages.by_author(user, within, channel)
+
+    async def invoke(self, context: commands.Context) -> None:
+        if not context.prefix or not context.is_valid:
+            return
+        if context.cog is not None and not self.channels.allows(
+            context.channel.name, context.cog.name
+        ):
+            # a per-channel cog that doesn't handle this channel
+            return
+        start = time.perf_counter()
+        try:
+            await super().invoke(context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.record_command(elapsed)
+            if self.profiler.enabled:
+                self.profiler.record("command", context.command.name, elapsed)
+
+    @property
+    def channel(self) -> Channel | None:
+        return home.channel if (home := self.channels.home) else None
+
+    @property
+    def streamer(self) -> User | None:
+        return home.streamer if (home := self.channels.home) else None
 
     async def event_ready(self):
+        self.metrics.start()
+        self.profiler.start()
+        self.watchdog.start()
+        self.scheduler.start()
+        self.settings.start()
+        if self.archive is not None:
+            self.archive.start()
         print(f"Logged in as {self.nick}")
-        await self.join_channels([self.nick])
-        self.add_cogs()
+        if not self.channels:
+            self.channels.add(self.nick)
+        await self.join_channels(self.channels.names)
+        await self.add_cogs()
         self.window.showMaximized()
 
     async def event_message(self, message: Message) -> None:
         if message.echo:
-            message._author = self.channel.get_chatter(self.streamer.name)
-        self._messages[message.id] = message
+            message._author = message.channel.get_chatter(self.nick)
+        self._messages.add(message)
+        if self.archive is not None:
+            self.archive.add(message)
+        self.metrics.record_message()
+        # one pass over every cog's rules, before any command runs
+        if not message.echo and self.filters and (hit := self.filters.check(message)):
+            self.run_event("filter_hit", hit)
         return await super().event_message(message)
 
     async def event_channel_joined(self, channel: Channel):
-        self.streamer = await channel.user()
-        self.channel = channel
-
-        # fmt: off
-        tasks = {
-            channel.send("Srpbotz has joined the chat"),
-            self._es.subscribe_channel_stream_start(self.streamer, self._token),
-            self._es.subscribe_channel_stream_end(self.streamer, self._token),
-            self._es.subscribe_channel_bans(self.streamer, self._token),
-            self._es.subscribe_channel_raid(self._token, to_broadcaster=self.streamer),
-            self._es.subscribe_channel_follows_v2(self.streamer, self.streamer, self._token),
-            self._es.subscribe_channel_subscriptions(self.streamer, self._token),
-            self._es.subscribe_channel_subscription_messages(self.streamer, self._token),
-            self._es.subscribe_channel_subscription_gifts(self.streamer, self._token),
-            self._es.subscribe_channel_cheers(self.streamer, self._token),
-            self._es.subscribe_channel_points_redeemed(self.streamer, self._token),
-            self._es.subscribe_channel_prediction_begin(self.streamer, self._token),
-            self._es.subscribe_channel_prediction_progress(self.streamer, self._token),
-            self._es.subscribe_channel_prediction_lock(self.streamer, self._token),
-            self._es.subscribe_channel_prediction_end(self.streamer, self._token),
-            self._es.subscribe_channel_poll_begin(self.streamer, self._token),
-            self._es.subscribe_channel_poll_progress(self.streamer, self._token),
-            self._es.subscribe_channel_poll_end(self.streamer, self._token),
-            self._es.subscribe_channel_hypetrain_begin(self.streamer, self._token),
-            self._es.subscribe_channel_hypetrain_progress(self.streamer, self._token),
-            self._es.subscribe_channel_hypetrain_end(self.streamer, self._token)
-        }
-        # fmt: on
+        state = self.channels.joined(channel)
+        state.streamer = await self.helix.user(channel.name)
 
         async with asyncio.TaskGroup() as tg:
-            for task in tasks:
-                tg.create_task(task)
+            tg.create_task(self.outbound.send(channel, "Srpbotz has joined the chat"))
+            tg.create_task(self.subscriptions.sync(state.streamer))
+
+        # stream_start/end only tell us about changes
+        try:
+            stream = await self.helix.stream(state.streamer.id)
+        except Exception as e:
+            self.window.log(f"Couldn't check if {channel.name} is live: {e}")
+        else:
+            self._set_live(state, stream is not None)
+
+    def _set_live(self, state: ChannelState | None, live: bool) -> None:
+        if state is not None:
+            state.live = live
+            self.scheduler.set_live(state.name, live)
+
+    async def event_eventsub_notification_stream_start(self, event) -> None:
+        self._set_live(self.channels.get(event.data.broadcaster.name), True)
+
+    async def event_eventsub_notification_stream_end(self, event) -> None:
+        self._set_live(self.channels.get(event.data.broadcaster.name), False)
+
+    def sync_subscriptions(self) -> asyncio.Task | None:
+        streamers = [state.streamer for state in self.channels if state.streamer]
+        if not streamers or self.loop.is_closed():
+            return None
+        return self.create_task(self.subscriptions.sync_all(streamers))
 
     async def event_error(self, error: Exception, data: str = None):
         return await super().event_error(error, data)
@@ -146,54 +449,89 @@ class Client(Bot):
         command = ctx.command
         if isinstance(error, commands.errors.CommandNotFound):
             return
+        if self.profiler.enabled and isinstance(command, commands.Command):
+            self.profiler.record_error("command", command.name)
         if isinstance(command, commands.Command) and command.has_error_handler():
             return
         return await super().event_command_error(ctx.command, error)
 
-    @routines.routine(seconds=1e-4)
-    async def process_events(self) -> None:
-        self.application.processEvents()
-
     def run(self) -> None:
         self.window.systemTray.show()
-        self.process_events.start()
         return super().run()
 
     async def close(self) -> None:
-        await self.channel.send("Srpbotz has left the chat")
+        for state in self.channels:
+            if state.channel is not None:
+                await self.outbound.send(
+                    state.channel, "Srpbotz has left the chat", wait=False
+                )
+        await self.outbound.stop()
+        await self.subscriptions.close()
+        self.metrics.stop()
+        self.watchdog.stop()
+        self.scheduler.stop()
+        self.settings.stop()
+        await self.profiler.stop()
+        await self.executor.shutdown()
+        if self.archive is not None:
+            await self.loop.run_in_executor(None, self.archive.stop)
+        self.coalescer.flush()
         self.run_event("close")
-        self.process_events.stop()
         await asyncio.sleep(0.5)
-        return await super().close()
+        await super().close()
+        # a request still in flight while closing opens a new session, close it
+        # before run() closes the loop under it
+        if self._http.session is not None and not self._http.session.closed:
+            await self._http.session.close()
 
     @commands.command()
     async def cmds(self, ctx: commands.Context, name: str):
-        if not (cog := self.cogs.get(name)):
+        if (page := self.help.page(name)) is None:
             return await ctx.reply(f"Cog {name} couldn't be found")
-
-        cmds = []
-        commands = list(cog._commands.values())
-        if not commands:
+        if not page:
             return await ctx.send(f"Cog {name} doesn't have any commands")
+        for msg in page:
+            await ctx.send(msg)
 
-        for command in commands:
-            cmd = f"*{command.name}"
-            params = list(command.params.values())
-            if len(params) > 2:
-                for param in params[2:]:
-                    if param.default == param.empty:
-                        cmd += f" <{param.name}>"
-                    else:
-                        cmd += f"({param.name})"
-            cmds.append(cmd)
+    @commands.command()
+    async def perf(self, ctx: commands.Context, count: int = 5):
+        if not self.profiler.enabled:
+            return await ctx.reply("Profiling is off, set profile in settings.json")
+        if not (slowest := self.profiler.slowest(count)):
+            return await ctx.reply("Nothing has been timed yet")
+        entries = (
+            f"{stats.kind} {stats.name} {stats.histogram.mean * 1000:.1f}ms avg, "
+            f"{stats.histogram.max * 1000:.1f}ms max ({stats.histogram.count}x"
+            + (f", {stats.errors} errors)" if stats.errors else ")")
+            for stats in slowest
+        )
+        for msg in chunk(entries, "Slowest: "):
+            await ctx.send(msg)
 
-        msg = f"{', '.join(cmds)}. <> = required, () = optional"
-        await ctx.send(msg)
+    @commands.command()
+    async def search(self, ctx: commands.Context, *, query: str):
+        if not (ctx.author.is_mod or ctx.author.is_broadcaster):
+            return
+        if self.archive is None:
+            return await ctx.reply(
+                "The chat archive is off, set archive in settings.json"
+            )
+        if not self.archive.enabled:
+            return await ctx.reply("The chat archive couldn't be opened, see the logs")
+        found = await self.archive.search(query, channel=ctx.channel.name, limit=5)
+        if not found:
+            return await ctx.reply(f"Nothing found for {query}")
+        entries = (
+            f"[{time.strftime('%d %b %H:%M', time.localtime(message.timestamp))}] "
+            f"{message.author}: {message.content[:120]}"
+            + (" (deleted)" if message.deleted else "")
+            for message in found
+        )
+        for msg in chunk(entries, f"{len(found)} found: "):
+            await ctx.send(msg)
 
     @cmds.error
     async def cmds_error(self, ctx: commands.Context, error: Exception):
         if isinstance(error, commands.MissingRequiredArgument):
-            cogs = [cog.name for cog in self.cogs.values() if cog.commands.values()]
-            return await ctx.reply(
-                f"Format: `*cmds <cog>`. Available cogs: {', '.join(cogs)}. Note: Case Sensitive"
-            )
+            for msg in self.help.overview:
+                await ctx.reply(msg)
@@ -0,0 +1,251 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from types import ModuleType
+from functools import partial
+import traceback
+import importlib
+import asyncio
+import logging
+import json
+import time
+import sys
+import os
+
+from twitch_bot.ext import commands
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+
+__all__ = ("CogSpec", "CogLoader", "LazyCommand")
+
+
+class CogSpec:
+    """A cog found under `cogs/`, described by the "manifest" key of its settings.json.
+
+    ```json
+    {"manifest": {"lazy": true, "commands": ["roll"], "events": ["raid"],
+                  "subscriptions": ["raid"]}}
+    ```
+
+    A lazy cog is only imported once one of its commands is used or one of
+    its events is dispatched. Cogs without a manifest are loaded at startup.
+    """
+
+    __slots__ = ("name", "module", "lazy", "commands", "events", "subscriptions")
+
+    def __init__(self, name: str, module: str, manifest: dict) -> None:
+        self.name = name
+        self.module = module
+        self.commands: tuple[str, ...] = tuple(manifest.get("commands", ()))
+        self.events: tuple[str, ...] = tuple(
+            event.removeprefix("event_") for event in manifest.get("events", ())
+        )
+        self.subscriptions: tuple[str, ...] = tuple(manifest.get("subscriptions", ()))
+        # a lazy cog nobody can trigger would never load
+        self.lazy = bool(manifest.get("lazy")) and bool(self.commands or self.events)
+
+    @classmethod
+    def from_path(cls, root: str, name: str) -> CogSpec:
+        try:
+            with open(os.path.join(root, name, "settings.json")) as f:
+                manifest = json.load(f).get("manifest", {})
+        except (ValueError, AttributeError):
+            manifest = {}
+        return cls(name, f"{root.replace(os.sep, '.')}.{name}", manifest)
+
+    def __repr__(self) -> str:
+        return f"<CogSpec name={self.name} lazy={self.lazy}>"
+
+
+async def _not_loaded(ctx: commands.Context) -> None: ...
+
+
+class LazyCommand(commands.Command):
+    """Placeholder for a command of a cog that hasn't been imported yet."""
+
+    def __init__(self, name: str, spec: CogSpec) -> None:
+        super().__init__(name, _not_loaded)
+        self.spec = spec
+
+
+class CogLoader:
+    def __init__(
+        self,
+        client: Client,
+        path: str = "cogs",
+        *,
+        lazy: bool = True,
+        workers: int | None = None,
+    ) -> None:
+        self.client = client
+        self.path = path
+        self.lazy = lazy
+        self.workers = workers
+        self.specs: dict[str, CogSpec] = {}
+        # name -> (import seconds, setup seconds, status)
+        self.timings: dict[str, tuple[float, float, str]] = {}
+        self._pending: dict[str, list] = {}
+
+    def discover(self) -> list[CogSpec]:
+        specs = []
+        for name in sorted(os.listdir(self.path)):
+            if os.path.isfile(os.path.join(self.path, name)):
+                continue
+            if "settings.json" not in os.listdir(os.path.join(self.path, name)):
+                continue
+            specs.append(CogSpec.from_path(self.path, name))
+        self.specs = {spec.name: spec for spec in specs}
+        return specs
+
+    async def load_all(self) -> None:
+        eager = []
+        for spec in self.discover():
+            if self.lazy and spec.lazy:
+                self._defer(spec)
+            else:
+                eager.append(spec)
+
+        pool = ThreadPoolExecutor(self.workers, thread_name_prefix="cog-import")
+
+        async def load(spec: CogSpec) -> None:
+            future = pool.submit(self._import, spec)
+            # setup touches the GUI so it stays on the loop, as each import lands
+            self._setup(spec, *await asyncio.wrap_future(future))
+
+        try:
+            await asyncio.gather(*(load(spec) for spec in eager))
+        finally:
+            pool.shutdown(wait=False)
+        print(self.report())
+
+    def load(self, name: str) -> bool:
+        """Import and set up a deferred cog now. Returns whether it loaded."""
+        spec = self.specs[name]
+        self._undefer(spec)
+        self._setup(spec, *self._import(spec))
+        status = self.timings[name][2]
+        imported, setup, _ = self.timings[name]
+        print(f"Loaded lazy cog {name} ({(imported + setup) * 1000:.1f}ms, {status})")
+        return status == "loaded"
+
+    def reload(self, name: str) -> bool:
+        """Unload a cog, drop its modules and load it again from disk."""
+        start = time.perf_counter()
+        old = self.specs.get(name)
+        if old is not None:
+            for cog in tuple(self.client.cogs.values()):
+                if self._owns(old, cog):
+                    self.client.remove_cog(cog)
+            self._undefer(old)
+            for module in tuple(sys.modules):
+                if module == old.module or module.startswith(f"{old.module}."):
+                    del sys.modules[module]
+        importlib.invalidate_caches()
+
+        if not os.path.isfile(os.path.join(self.path, name, "settings.json")):
+            self.specs.pop(name, None)
+            self.timings.pop(name, None)
+            self.client.window.log(f"Unloaded removed cog {name}", logging.INFO)
+            return False
+
+        spec = self.specs[name] = CogSpec.from_path(self.path, name)
+        if (
+            self.lazy
+            and spec.lazy
+            and (old is None or old.lazy and self.is_pending(name))
+        ):
+            self._defer(spec)
+            status = "lazy"
+        else:
+            self._setup(spec, *self._import(spec))
+            status = self.timings[name][2]
+        elapsed = (time.perf_counter() - start) * 1000
+        self.client.window.log(
+            f"Reloaded cog {name} in {elapsed:.1f}ms ({status})", logging.INFO
+        )
+        return status != "failed"
+
+    def _import(
+        self, spec: CogSpec
+    ) -> tuple[ModuleType | None, float, Exception | None]:
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(spec.module)
+        except Exception as e:
+            return None, time.perf_counter() - start, e
+        return module, time.perf_counter() - start, None
+
+    def _setup(
+        self,
+        spec: CogSpec,
+        module: ModuleType | None,
+        imported: float,
+        error: Exception | None,
+    ) -> None:
+        start = time.perf_counter()
+        try:
+            if error is not None:
+                raise error
+            module.setup(self.client)
+        except Exception as e:
+            print(f"Unable to load cog: {spec.name.capitalize()}")
+            traceback.print_exception(type(e), e, e.__traceback__)
+            self.timings[spec.name] = (imported, time.perf_counter() - start, "failed")
+        else:
+            self.timings[spec.name] = (imported, time.perf_counter() - start, "loaded")
+
+    def _defer(self, spec: CogSpec) -> None:
+        listeners = []
+        for name in spec.commands:
+            if self.client.get_command(name) is None:
+                self.client.add_command(LazyCommand(name, spec))
+        for event in spec.events:
+            listener = self._listener(spec, event)
+            self.client.add_event(listener, f"event_{event}")
+            listeners.append(listener)
+        self._pending[spec.name] = listeners
+        self.timings[spec.name] = (0.0, 0.0, "lazy")
+
+    def _undefer(self, spec: CogSpec) -> None:
+        for name in spec.commands:
+            if isinstance(self.client.get_command(name), LazyCommand):
+                self.client.remove_command(name)
+        for listener in self._pending.pop(spec.name, ()):
+            self.client.remove_event(listener)
+
+    def _listener(self, spec: CogSpec, event: str) -> partial:
+        # a partial like cog listeners, Cog._load_methods expects `.args`
+        return partial(self._wake, spec, f"event_{event}")
+
+    async def _wake(self, spec: CogSpec, event: str, *args) -> None:
+        if spec.name not in self._pending or not self.load(spec.name):
+            return
+        # the cog missed the event that woke it up
+        for callback, name in tuple(self.client.registered_callbacks.items()):
+            if name != event or not isinstance(callback, partial):
+                continue
+            cog = callback.args[0] if callback.args else None
+            if isinstance(cog, commands.Cog) and self._owns(spec, cog):
+                self.client.loop.create_task(callback(*args))
+
+    @staticmethod
+    def _owns(spec: CogSpec, cog: commands.Cog) -> bool:
+        module = type(cog).__module__
+        return module == spec.module or module.startswith(f"{spec.module}.")
+
+    def is_pending(self, name: str) -> bool:
+        return name in self._pending
+
+    def report(self) -> str:
+        lines = [f"{'Cog':<24}{'Import':>10}{'Setup':>10}  Status"]
+        total = 0.0
+        for name, (imported, setup, status) in sorted(
+            self.timings.items(), key=lambda item: -(item[1][0] + item[1][1])
+        ):
+            total += imported + setup
+            lines.append(
+                f"{name:<24}{imported * 1000:>8.1f}ms{setup * 1000:>8.1f}ms  {status}"
+            )
+        lines.append(f"{'Total':<24}{total * 1000:>18.1f}ms")
+        return "\n".join(lines)
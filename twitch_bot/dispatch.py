@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import Any, Callable, Iterable, TYPE_CHECKING
+from collections import Counter
+import asyncio
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+
+__all__ = ("EventCoalescer",)
+
+
+class EventCoalescer:
+    """Delivers only the latest payload of high-frequency events.
+
+    The first occurrence of a coalesced event for a broadcaster opens a
+    window of `window` seconds; occurrences inside it replace the pending
+    payload and the listeners receive the last one when the window closes.
+    A window of 0 coalesces everything dispatched before the loop's next
+    iteration. Events that aren't coalesced never pass through here and
+    keep their order, except that they first deliver what's pending for
+    the same broadcaster and family, so a hypetrain_progress never arrives
+    after its hypetrain_end.
+    """
+
+    PROGRESS_EVENTS = (
+        "eventsub_notification_hypetrain_progress",
+        "eventsub_notification_poll_progress",
+        "eventsub_notification_prediction_progress",
+        "eventsub_notification_channel_goal_progress",
+    )
+
+    def __init__(
+        self,
+        client: Client,
+        dispatch: Callable[..., None],
+        events: Iterable[str] = (),
+        window: float = 0.1,
+    ) -> None:
+        self.client = client
+        self.events: set[str] = set(events)
+        self.window = window
+        self.received: Counter[str] = Counter()
+        self.delivered: Counter[str] = Counter()
+        self._dispatch = dispatch
+        # (event name, broadcaster id) -> (payload, the timer delivering it)
+        self._pending: dict[tuple[str, Any], tuple[tuple, asyncio.Handle]] = {}
+
+    def wants(self, event_name: str) -> bool:
+        return event_name in self.events
+
+    @staticmethod
+    def _broadcaster(args: tuple) -> Any:
+        """The broadcaster id of an EventSub payload, None for anything else."""
+        data = getattr(args[0], "data", None) if args else None
+        return getattr(getattr(data, "broadcaster", None), "id", None)
+
+    def submit(self, event_name: str, args: tuple) -> None:
+        self.received[event_name] += 1
+        key = (event_name, self._broadcaster(args))
+        if (pending := self._pending.get(key)) is not None:
+            self._pending[key] = (args, pending[1])
+            return
+        if self.window > 0:
+            timer = self.client.loop.call_later(self.window, self._flush, key)
+        else:
+            timer = self.client.loop.call_soon(self._flush, key)
+        self._pending[key] = (args, timer)
+
+    def before(self, event_name: str, args: tuple) -> None:
+        """Deliver what's pending of `event_name`'s family for its broadcaster."""
+        if not self._pending:
+            return
+        broadcaster = self._broadcaster(args)
+        for key in tuple(self._pending):
+            name, id = key
+            # hypetrain_progress -> hypetrain_begin, hypetrain_end, ...
+            if id == broadcaster and event_name.startswith(name.rpartition("_")[0]):
+                self._pending[key][1].cancel()
+                self._flush(key)
+
+    def _flush(self, key: tuple[str, Any]) -> None:
+        if (pending := self._pending.pop(key, None)) is None:
+            return
+        event_name = key[0]
+        self.delivered[event_name] += 1
+        self._dispatch(event_name, *pending[0])
+
+    def flush(self) -> None:
+        """Deliver every pending payload now."""
+        for key in tuple(self._pending):
+            self._pending[key][1].cancel()
+            self._flush(key)
+
+    def stats(self) -> dict[str, tuple[int, int]]:
+        """Event name -> (received, delivered)."""
+        return {
+            name: (self.received[name], self.delivered[name]) for name in self.received
+        }
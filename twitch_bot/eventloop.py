@@ -0,0 +1,118 @@
+from __future__ import annotations
+from typing import Any, Callable, TYPE_CHECKING
+import selectors
+import asyncio
+import math
+
+from twitch_bot.QtCore import (
+    QCoreApplication,
+    QEventLoop,
+    QSocketNotifier,
+    QTimer,
+    Qt,
+)
+
+if TYPE_CHECKING:
+    from twitch_bot.watchdog import LoopMonitor
+
+__all__ = ("QtSelector", "QtEventLoop")
+
+
+class QtSelector(selectors.DefaultSelector):
+    """A selector that blocks inside Qt's event dispatcher instead of the OS.
+
+    Every registered file descriptor gets a QSocketNotifier, so while asyncio
+    waits for IO the GUI keeps running and nothing has to poll.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._notifiers: dict[int, tuple[QSocketNotifier, ...]] = {}
+        self._eventLoop = QEventLoop()
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._eventLoop.quit)
+        self._waiting = False
+
+    def _addNotifiers(self, key: selectors.SelectorKey) -> None:
+        notifiers = []
+        for event, type in (
+            (selectors.EVENT_READ, QSocketNotifier.Type.Read),
+            (selectors.EVENT_WRITE, QSocketNotifier.Type.Write),
+        ):
+            if key.events & event:
+                notifier = QSocketNotifier(key.fd, type)
+                notifier.activated.connect(self.wakeup)
+                notifiers.append(notifier)
+        self._notifiers[key.fd] = tuple(notifiers)
+
+    def _removeNotifiers(self, fd: int) -> None:
+        for notifier in self._notifiers.pop(fd, ()):
+            notifier.setEnabled(False)
+
+    def register(self, fileobj, events: int, data: Any = None) -> selectors.SelectorKey:
+        key = super().register(fileobj, events, data)
+        self._addNotifiers(key)
+        return key
+
+    def unregister(self, fileobj) -> selectors.SelectorKey:
+        key = super().unregister(fileobj)
+        self._removeNotifiers(key.fd)
+        return key
+
+    def modify(self, fileobj, events: int, data: Any = None) -> selectors.SelectorKey:
+        key = super().modify(fileobj, events, data)
+        self._removeNotifiers(key.fd)
+        self._addNotifiers(key)
+        return key
+
+    def select(self, timeout: float | None = None):
+        if timeout is not None and timeout <= 0 or super().select(0):
+            # asyncio is busy, give the GUI a turn without blocking
+            QCoreApplication.processEvents()
+        else:
+            self._wait(timeout)
+        return super().select(0)
+
+    def _wait(self, timeout: float | None) -> None:
+        if timeout is not None:
+            self._timer.start(math.ceil(timeout * 1000))
+        self._waiting = True
+        try:
+            self._eventLoop.exec()
+        finally:
+            self._waiting = False
+            self._timer.stop()
+
+    def wakeup(self) -> None:
+        if self._waiting:
+            self._eventLoop.quit()
+
+    def close(self) -> None:
+        for fd in tuple(self._notifiers):
+            self._removeNotifiers(fd)
+        return super().close()
+
+
+class QtEventLoop(asyncio.SelectorEventLoop):
+    """An asyncio event loop whose idle time is spent in Qt's event loop.
+
+    Callbacks scheduled from Qt slots wake the loop immediately, so GUI
+    actions such as `MainWindow.close` don't wait on the next IO event.
+    """
+
+    def __init__(self, selector: QtSelector | LoopMonitor | None = None) -> None:
+        super().__init__(selector or QtSelector())
+
+    def call_soon(self, callback: Callable, *args, context=None) -> asyncio.Handle:
+        handle = super().call_soon(callback, *args, context=context)
+        self._selector.wakeup()
+        return handle
+
+    def call_at(
+        self, when: float, callback: Callable, *args, context=None
+    ) -> asyncio.TimerHandle:
+        handle = super().call_at(when, callback, *args, context=context)
+        self._selector.wakeup()
+        return handle
@@ -0,0 +1,186 @@
+from __future__ import annotations
+from concurrent.futures import (
+    Executor as _Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable, TypeVar, TYPE_CHECKING
+from collections import Counter
+from functools import partial
+import multiprocessing
+import asyncio
+import os
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+
+__all__ = ("Executor",)
+
+T = TypeVar("T")
+
+
+class Executor:
+    """Runs blocking cog work off the event loop.
+
+    `run_in_thread` is for blocking IO (files, sync HTTP clients, TTS
+    engines) and `run_in_process` for CPU-bound work, whose function and
+    arguments must be picklable. Each owner (a cog name) may have at most
+    `per_cog` calls in flight, the rest wait on the loop where they can
+    still be cancelled. Jobs only reach a pool once it has a free worker,
+    so nothing piles up in a queue we can't cancel.
+
+    Cancelling an owner's work, e.g. when its cog is removed, stops the
+    callers from waiting. A thread or process that already started keeps
+    running until its function returns, Python can't interrupt it, and keeps
+    its worker until then.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        *,
+        threads: int = 8,
+        processes: int | None = None,
+        per_cog: int = 2,
+    ) -> None:
+        self.client = client
+        self.per_cog = per_cog
+        self.workers = {"thread": threads, "process": processes or os.cpu_count() or 1}
+        self.queued: Counter[str] = Counter()
+        self.running: Counter[str] = Counter()
+        self.completed: Counter[str] = Counter()
+        self._pools: dict[str, _Executor] = {}
+        self._slots = {kind: asyncio.Semaphore(n) for kind, n in self.workers.items()}
+        self._limits: dict[str, asyncio.Semaphore] = {}
+        self._owned: dict[str | None, set[asyncio.Task]] = {}
+
+    def _pool(self, kind: str) -> _Executor:
+        # created on first use, most sessions never start a process
+        if (pool := self._pools.get(kind)) is None:
+            if kind == "thread":
+                pool = ThreadPoolExecutor(
+                    self.workers[kind], thread_name_prefix="cog-worker"
+                )
+            else:
+                # forking a process that runs Qt isn't safe
+                context = multiprocessing.get_context("spawn")
+                pool = ProcessPoolExecutor(self.workers[kind], mp_context=context)
+            self._pools[kind] = pool
+        return pool
+
+    def _limit(self, owner: str | None) -> asyncio.Semaphore | None:
+        if owner is None:
+            return None
+        if (limit := self._limits.get(owner)) is None:
+            limit = self._limits[owner] = asyncio.Semaphore(self.per_cog)
+        return limit
+
+    async def run_in_thread(
+        self, func: Callable[..., T], *args, owner: str | None = None, **kwargs
+    ) -> T:
+        return await self._submit("thread", partial(func, *args, **kwargs), owner)
+
+    async def run_in_process(
+        self, func: Callable[..., T], *args, owner: str | None = None, **kwargs
+    ) -> T:
+        return await self._submit("process", partial(func, *args, **kwargs), owner)
+
+    async def _submit(self, kind: str, func: Callable[[], T], owner: str | None) -> T:
+        task = self.client.loop.create_task(self._run(kind, func, owner))
+        owned = self._owned.setdefault(owner, set())
+        owned.add(task)
+        task.add_done_callback(owned.discard)
+        return await task
+
+    async def _run(self, kind: str, func: Callable[[], Any], owner: str | None) -> Any:
+        limit = self._limit(owner)
+        slot = self._slots[kind]
+        self.queued[kind] += 1
+        try:
+            if limit is not None:
+                await limit.acquire()
+            try:
+                await slot.acquire()
+            except BaseException:
+                if limit is not None:
+                    limit.release()
+                raise
+        finally:
+            self.queued[kind] -= 1
+
+        self.running[kind] += 1
+        try:
+            future = self._pool(kind).submit(func)
+        except BaseException:
+            self._finished(kind, slot, limit)
+            raise
+        # the job holds its slot until it returns, not until we stop waiting on it
+        future.add_done_callback(partial(self._done, kind, slot, limit))
+        return await asyncio.wrap_future(future, loop=self.client.loop)
+
+    def _done(
+        self,
+        kind: str,
+        slot: asyncio.Semaphore,
+        limit: asyncio.Semaphore | None,
+        future: Future,
+    ) -> None:
+        # called on the pool's thread
+        try:
+            self.client.loop.call_soon_threadsafe(self._finished, kind, slot, limit)
+        except RuntimeError:
+            # the loop is closed, nobody is waiting for a slot anymore
+            pass
+
+    def _finished(
+        self, kind: str, slot: asyncio.Semaphore, limit: asyncio.Semaphore | None
+    ) -> None:
+        self.running[kind] -= 1
+        self.completed[kind] += 1
+        slot.release()
+        if limit is not None:
+            limit.release()
+
+    def cancel(self, owner: str) -> int:
+        """Cancel everything `owner` is waiting on. Returns how many calls were cancelled."""
+        tasks = self._owned.pop(owner, set())
+        self._limits.pop(owner, None)
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **{
+                kind: {
+                    "workers": workers,
+                    "queued": self.queued[kind],
+                    "running": self.running[kind],
+                    "completed": self.completed[kind],
+                }
+                for kind, workers in self.workers.items()
+            },
+            "owners": {
+                owner: len(tasks) for owner, tasks in self._owned.items() if tasks
+            },
+        }
+
+    async def shutdown(self, timeout: float = 10.0) -> None:
+        """Cancel everything and wait up to `timeout` seconds for jobs that already started."""
+        for owner in tuple(self._owned):
+            self.cancel(owner)
+        pools = tuple(self._pools.values())
+        self._pools.clear()
+        if not pools:
+            return
+        loop = self.client.loop
+        waits = [
+            loop.run_in_executor(None, partial(pool.shutdown, cancel_futures=True))
+            for pool in pools
+        ]
+        _, pending = await asyncio.wait(waits, timeout=timeout)
+        if pending:
+            self.client.window.log(
+                f"Blocking cog work still running after {timeout}s, not waiting for it"
+            )
@@ -1,15 +1,91 @@
 from __future__ import annotations
 from typing import Any, Callable, Sequence, TypeVar
+import inspect
 
+from twitch_bot.outbound import Priority
 from twitchio.ext import commands
-from twitchio.ext.commands.core import Group, Context, cooldown
+from twitchio.ext.commands.core import EMPTY, Group, cooldown
+from twitchio.ext.commands.errors import (
+    ArgumentParsingFailed,
+    BadArgument,
+    UnionArgumentParsingFailed,
+)
 
 __all__ = ("Command", "command", "Group", "Context", "cooldown")
 
 
+class Context(commands.Context):
+    """Sends and replies go through the client's outbound queue."""
+
+    async def send(self, content: str, priority=Priority.COMMAND) -> None:
+        return await self.bot.outbound.send(self, content, priority)
+
+    async def reply(self, content: str, priority=Priority.COMMAND) -> None:
+        return await self.bot.outbound.reply(self, content, priority)
+
+
 class Command(commands.Command):
+    """Resolves each parameter's converter once instead of on every invocation."""
+
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
+        # parameter name -> converter, filled on first use
+        self._converters: dict[str, Callable[..., Any]] = {}
+
+    def _converter(self, param: inspect.Parameter) -> Callable[..., Any]:
+        converter = param.annotation
+        if converter is param.empty:
+            if param.default in (param.empty, None):
+                converter = str
+            else:
+                converter = type(param.default)
+        # twitchio only passes the context through, none of its converters use it
+        return self._resolve_converter(param.name, converter, None)
+
+    async def _convert_types(
+        self, context: Context, param: inspect.Parameter, parsed: str
+    ) -> Any:
+        try:
+            convert = self._converters[param.name]
+        except KeyError:
+            convert = self._converters[param.name] = self._converter(param)
+        try:
+            argument = convert(context, parsed)
+            if inspect.iscoroutine(argument):
+                argument = await argument
+        except BadArgument as e:
+            if e.name is None:
+                e.name = param.name
+            raise
+        except Exception as e:
+            raise ArgumentParsingFailed(
+                f"Failed to parse `{parsed}` for argument {param.name}",
+                original=e,
+                argname=param.name,
+                expected=None,
+            ) from e
+        return argument
+
+    def resolve_union_callback(
+        self, name: str, converter: Any
+    ) -> Callable[[Context, str], Any]:
+        args = converter.__args__
+        underlying = [self._resolve_converter(name, arg, None) for arg in args]
+
+        async def resolve(context: Context, arg: str) -> Any:
+            for convert in underlying:
+                try:
+                    result = convert(context, arg)
+                    if inspect.iscoroutine(result):
+                        result = await result
+                except Exception:
+                    continue
+                if result is EMPTY:
+                    break
+                return result
+            raise UnionArgumentParsingFailed(name, args)
+
+        return resolve
 
     def has_error_handler(self) -> bool:
         return bool(self.event_error)
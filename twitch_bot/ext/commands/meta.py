@@ -1,22 +1,55 @@
 from __future__ import annotations
-from typing import Any, TYPE_CHECKING
+from typing import Any, Callable, TypeVar, TYPE_CHECKING
 import traceback
-import json
+import copy
 
-from twitch_bot.QtCore import QObject
-from twitchio.ext import commands
+from twitch_bot import HEADLESS
+from twitch_bot.scheduler import Scheduled
+from twitchio.ext import commands, routines
 
 if TYPE_CHECKING:
-    from twitch_bot import Client
+    from twitch_bot import Channel, Client
 
 
 __all__ = ("Cog",)
 
+T = TypeVar("T")
 
-class CogMeta(type(commands.Cog), type(QObject)): ...
 
+if HEADLESS:
+    CogMeta = type(commands.Cog)
+    _bases = (commands.Cog,)
+else:
+    from twitch_bot.QtCore import QObject
+
+    class CogMeta(type(commands.Cog), type(QObject)): ...
+
+    _bases = (commands.Cog, QObject)
+
+
+class Cog(*_bases, metaclass=CogMeta):
+    # EventSub topics this cog listens to, see SubscriptionManager
+    subscriptions: tuple[str, ...] = ()
+    # banned terms and regex patterns matched by the client's MessageFilter,
+    # hits arrive as `event_filter_hit`
+    filter_terms: tuple[str, ...] = ()
+    filter_patterns: tuple[str, ...] = ()
+    # expected types of settings.json keys, see twitch_bot.settings.validate
+    settings_schema: dict[str, Any] = {}
+    # names of the cog's routines, collected once per class
+    __routines__: tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        names = {}
+        for base in reversed(cls.__mro__):
+            for name, value in vars(base).items():
+                if isinstance(value, (routines.Routine, Scheduled)):
+                    names[name] = None
+                else:
+                    names.pop(name, None)
+        cls.__routines__ = tuple(names)
 
-class Cog(commands.Cog, QObject, metaclass=CogMeta):
     def __init__(self, client: Client) -> None:
         super().__init__()
         self.client = client
@@ -48,9 +81,31 @@ class Cog(commands.Cog, QObject, metaclass=CogMeta):
 
     def unload(self) -> None: ...
 
+    def handles(self, channel: str | Channel) -> bool:
+        """Whether this cog runs in `channel`, see Channels. Commands are filtered already, events aren't."""
+        name = channel if isinstance(channel, str) else channel.name
+        return self.client.channels.allows(name, self.name)
+
+    async def run_in_thread(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run blocking IO on the client's thread pool, cancelled when the cog is removed."""
+        return await self.client.executor.run_in_thread(
+            func, *args, owner=self.name, **kwargs
+        )
+
+    async def run_in_process(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run CPU-bound work on the client's process pool, cancelled when the cog is removed."""
+        return await self.client.executor.run_in_process(
+            func, *args, owner=self.name, **kwargs
+        )
+
+    @property
+    def cached_settings(self) -> dict:
+        """This cog's settings.json, cached by the client. Shared, don't modify it.
+
+        Not `settings`, cogs often keep their own copy under that name.
+        """
+        return self.client.settings.of(self)
+
     def load_settings(self) -> Any:
-        try:
-            with open(f"{__package__}/settings.json") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        """A copy of `cached_settings` the cog can modify."""
+        return copy.deepcopy(self.cached_settings)
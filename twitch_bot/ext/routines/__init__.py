@@ -1 +1,2 @@
 from twitchio.ext.routines import *
+from twitch_bot.scheduler import Job, Scheduled, scheduled
@@ -0,0 +1,428 @@
+from __future__ import annotations
+from collections import deque
+from typing import Iterable, Iterator, TYPE_CHECKING
+import unicodedata
+import time
+import re
+
+if TYPE_CHECKING:
+    from twitch_bot import Message
+
+__all__ = ("FilterHit", "FilterRule", "MessageFilter", "fold", "normalize")
+
+# look-alikes and leetspeak, applied after normalize so only lowercase is left
+_FOLD = str.maketrans(
+    {
+        "0": "o",
+        "1": "i",
+        "3": "e",
+        "4": "a",
+        "5": "s",
+        "7": "t",
+        "8": "b",
+        "9": "g",
+        "@": "a",
+        "$": "s",
+        "|": "l",
+        "+": "t",
+        "€": "e",
+        # Cyrillic and Greek letters that pass for Latin ones
+        "а": "a",
+        "е": "e",
+        "о": "o",
+        "р": "p",
+        "с": "c",
+        "у": "y",
+        "х": "x",
+        "і": "i",
+        "ј": "j",
+        "ѕ": "s",
+        "α": "a",
+        "ε": "e",
+        "ι": "i",
+        "κ": "k",
+        "ν": "v",
+        "ο": "o",
+        "ρ": "p",
+        "τ": "t",
+        "υ": "u",
+        "χ": "x",
+    }
+)
+_INVISIBLE = dict.fromkeys(
+    map(ord, "\u00ad\u034f\u180e\u200b\u200c\u200d\u2060\u2061\u2062\u2063\ufeff"),
+    None,
+)
+
+
+def normalize(text: str) -> str:
+    """Casefolded, without accents, invisible characters or compatibility forms like ｆｕｌｌｗｉｄｔｈ."""
+    if text.isascii():
+        return text.casefold()
+    text = unicodedata.normalize("NFKD", text.translate(_INVISIBLE))
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def fold(text: str) -> str:
+    """`normalize` plus leetspeak and look-alike letters, what terms are matched against."""
+    return normalize(text).translate(_FOLD)
+
+
+_SPECIAL = frozenset(".^$*+?{}[]\\|()")
+
+
+def _prefix(pattern: str) -> str:
+    """Literal text every match of `pattern` starts with, or "" when there's none to go by."""
+    depth = 0
+    escaped = in_class = False
+    for char in pattern:
+        # a top-level alternative could start with anything
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char in "()":
+            depth += 1 if char == "(" else -1
+        elif char == "|" and depth == 0:
+            return ""
+
+    literal = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            char = pattern[index + 1 : index + 2]
+            # \d, \b and friends aren't literals
+            if not char or char.isalnum():
+                break
+            index += 2
+        elif char in _SPECIAL:
+            break
+        else:
+            index += 1
+        if pattern[index : index + 1] in ("?", "*", "{"):
+            # may not be there at all
+            break
+        literal.append(char)
+    prefix = "".join(literal)
+    return prefix.casefold() if len(prefix) >= 2 and prefix.isascii() else ""
+
+
+class FilterRule:
+    """A banned term, or with `regex` a pattern, registered by `owner`.
+
+    Terms are folded and matched as whole words unless `word` is False.
+    Patterns are matched case-insensitively against the normalized message,
+    without leetspeak folding, each compiled on its own.
+    """
+
+    __slots__ = ("pattern", "owner", "regex", "word", "name", "_key", "_compiled")
+
+    def __init__(
+        self,
+        pattern: str,
+        owner: str | None = None,
+        *,
+        regex: bool = False,
+        word: bool = True,
+        name: str | None = None,
+    ) -> None:
+        self.pattern = pattern
+        self.owner = owner
+        self.regex = regex
+        self.word = word
+        self.name = name or pattern
+        # what the automaton looks for, a pattern's literal start if it has one
+        self._key = _prefix(pattern) if regex else fold(pattern)
+        self._compiled = re.compile(pattern, re.IGNORECASE) if regex else None
+
+    def __repr__(self) -> str:
+        return f"<FilterRule name={self.name!r} owner={self.owner}>"
+
+
+class FilterHit:
+    """Every rule a message matched, dispatched once per message as `filter_hit`."""
+
+    __slots__ = ("message", "matches")
+
+    def __init__(self, message: Message, matches: list[tuple[FilterRule, str]]) -> None:
+        self.message = message
+        # (rule, the folded or normalized text it matched)
+        self.matches = matches
+
+    def __repr__(self) -> str:
+        return f"<FilterHit rules={len(self.matches)} message={self.message.id}>"
+
+    @property
+    def rules(self) -> list[FilterRule]:
+        return [rule for rule, _ in self.matches]
+
+    def by(self, owner: str | None) -> list[tuple[FilterRule, str]]:
+        """The matches of the rules `owner` registered, a cog only acts on its own."""
+        return [match for match in self.matches if match[0].owner == owner]
+
+
+class _Automaton:
+    """Aho–Corasick over the rules' keys.
+
+    Removing a rule only forgets it, `find` skips rules that aren't live
+    any more, so the failure links stay valid until the next `link`. The
+    trie is rebuilt from scratch once removed rules outnumber the live ones.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._own: list[list[FilterRule]] = [[]]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[FilterRule, ...]] = [()]
+        self._nodes: dict[FilterRule, int] = {}
+        self._removed = 0
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __iter__(self) -> Iterator[FilterRule]:
+        return iter(self._nodes)
+
+    def add(self, rule: FilterRule) -> None:
+        goto, own = self._goto, self._own
+        state = 0
+        for char in rule._key:
+            if (following := goto[state].get(char)) is None:
+                following = goto[state][char] = len(goto)
+                goto.append({})
+                own.append([])
+            state = following
+        own[state].append(rule)
+        self._nodes[rule] = state
+        self.dirty = True
+
+    def discard(self, rule: FilterRule) -> bool:
+        if (state := self._nodes.pop(rule, None)) is None:
+            return False
+        self._own[state].remove(rule)
+        self._removed += 1
+        return True
+
+    def link(self) -> None:
+        if self._removed > len(self._nodes):
+            rules = list(self._nodes)
+            self.clear()
+            for rule in rules:
+                self.add(rule)
+        if not self.dirty:
+            return
+        goto, own = self._goto, self._own
+        fail = [0] * len(goto)
+        out: list[tuple[FilterRule, ...]] = [()] * len(goto)
+        queue = deque()
+        for state in goto[0].values():
+            out[state] = tuple(own[state])
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, following in goto[state].items():
+                back = fail[state]
+                while back and char not in goto[back]:
+                    back = fail[back]
+                back = goto[back].get(char, 0)
+                fail[following] = back
+                # a match here also ends every shorter key it has as a suffix
+                out[following] = (*own[following], *out[back])
+                queue.append(following)
+        self._fail, self._out = fail, out
+        self.dirty = False
+
+    def find(self, text: str, found: list[tuple[int, FilterRule]]) -> None:
+        """Add (end index, rule) to `found` for every key in `text`."""
+        goto, fail, out, live = self._goto, self._fail, self._out, self._nodes
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.extend((index, rule) for rule in out[state] if rule in live)
+
+
+class _Index:
+    """A large automaton linked now and then and a small one for what was added since.
+
+    Adding rules only relinks the small one until it grows past an eighth
+    of the large one, then it's merged in. Costs a second scan per message.
+    """
+
+    MERGE_AT = 1000
+
+    def __init__(self) -> None:
+        self._base = _Automaton()
+        self._recent = _Automaton()
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._recent)
+
+    def add(self, rule: FilterRule) -> None:
+        self._recent.add(rule)
+
+    def discard(self, rule: FilterRule) -> None:
+        self._base.discard(rule) or self._recent.discard(rule)
+
+    def link(self) -> None:
+        if len(self._recent) > max(self.MERGE_AT, len(self._base) // 8):
+            for rule in self._recent:
+                self._base.add(rule)
+            self._recent.clear()
+        self._base.link()
+        self._recent.link()
+
+    def find(self, text: str) -> list[tuple[int, FilterRule]]:
+        found: list[tuple[int, FilterRule]] = []
+        if self._base:
+            self._base.find(text, found)
+        if self._recent:
+            self._recent.find(text, found)
+        return found
+
+
+def _is_word(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (
+        end == len(text) or not text[end].isalnum()
+    )
+
+
+class MessageFilter:
+    """Matches every message against the banned terms and patterns of all cogs in one pass.
+
+    Terms go into one Aho–Corasick automaton, so a message costs a single
+    scan however many terms and cogs there are. Patterns that start with
+    literal text go into a second one keyed on it and only run where it
+    shows up, the rest are searched one by one. An alternation of them would
+    report only one rule per position and breaks patterns with inline flags
+    or backreferences. Rules are registered
+    per owner, usually a cog's name, and removed together with `remove`.
+    Changes apply on the next `check`, see _Index for what that costs.
+    """
+
+    def __init__(self) -> None:
+        self._rules: dict[str | None, list[FilterRule]] = {}
+        self._terms = _Index()
+        self._triggers = _Index()
+        # patterns without a literal start
+        self._patterns: dict[FilterRule, None] = {}
+        self._dirty = False
+        self.hits = 0
+        # seconds the last rebuild took
+        self.build_time = 0.0
+
+    def __len__(self) -> int:
+        return sum(map(len, self._rules.values()))
+
+    def __bool__(self) -> bool:
+        return any(self._rules.values())
+
+    def add(
+        self,
+        owner: str | None,
+        terms: Iterable[str] = (),
+        patterns: Iterable[str] = (),
+        *,
+        word: bool = True,
+    ) -> list[FilterRule]:
+        """Register `terms` and regex `patterns` for `owner`. Raises re.error for bad patterns."""
+        rules = self.compile(owner, terms, patterns, word=word)
+        for rule in rules:
+            self.add_rule(rule)
+        return rules
+
+    @staticmethod
+    def compile(
+        owner: str | None,
+        terms: Iterable[str] = (),
+        patterns: Iterable[str] = (),
+        *,
+        word: bool = True,
+    ) -> list[FilterRule]:
+        """The rules `add` would register, without registering them. Raises re.error for bad patterns."""
+        rules = [FilterRule(term, owner, word=word) for term in terms if term.strip()]
+        rules.extend(FilterRule(pattern, owner, regex=True) for pattern in patterns)
+        return rules
+
+    def add_rule(self, rule: FilterRule) -> None:
+        self._rules.setdefault(rule.owner, []).append(rule)
+        if not rule.regex:
+            self._terms.add(rule)
+        elif rule._key:
+            self._triggers.add(rule)
+        else:
+            self._patterns[rule] = None
+        self._dirty = True
+
+    def remove(self, owner: str | None) -> int:
+        """Drop every rule `owner` registered. Returns how many."""
+        rules = self._rules.pop(owner, ())
+        for rule in rules:
+            self._forget(rule)
+        return len(rules)
+
+    def discard(self, rule: FilterRule) -> None:
+        if rule in (owned := self._rules.get(rule.owner, ())):
+            owned.remove(rule)
+            self._forget(rule)
+
+    def _forget(self, rule: FilterRule) -> None:
+        if not rule.regex:
+            self._terms.discard(rule)
+        elif rule._key:
+            self._triggers.discard(rule)
+        else:
+            self._patterns.pop(rule, None)
+        self._dirty = True
+
+    def build(self) -> None:
+        start = time.perf_counter()
+        # cleared first, a failing rebuild is reported once instead of on every message
+        self._dirty = False
+        self._terms.link()
+        self._triggers.link()
+        self.build_time = time.perf_counter() - start
+
+    def match(self, text: str) -> list[tuple[FilterRule, str]]:
+        if self._dirty:
+            self.build()
+        normalized = normalize(text)
+        matches = []
+        seen = set()
+        if self._terms:
+            folded = normalized.translate(_FOLD)
+            for end, rule in self._terms.find(folded):
+                start = end + 1 - len(rule._key)
+                if rule in seen or (rule.word and not _is_word(folded, start, end + 1)):
+                    continue
+                seen.add(rule)
+                matches.append((rule, folded[start : end + 1]))
+        if self._triggers:
+            for end, rule in self._triggers.find(normalized):
+                if rule in seen:
+                    continue
+                found = rule._compiled.match(normalized, end + 1 - len(rule._key))
+                if found is not None:
+                    seen.add(rule)
+                    matches.append((rule, found.group()))
+        for rule in self._patterns:
+            if (found := rule._compiled.search(normalized)) is not None:
+                matches.append((rule, found.group()))
+        return matches
+
+    def check(self, message: Message) -> FilterHit | None:
+        if not (matches := self.match(message.content)):
+            return None
+        self.hits += 1
+        return FilterHit(message, matches)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+from typing import Any, TYPE_CHECKING
+import logging
+import sys
+
+from twitch_bot.logwriter import logger, writer
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+
+__all__ = ("HeadlessWindow",)
+
+
+class _Sink:
+    """Accepts and ignores any GUI call a cog might make."""
+
+    def __getattr__(self, name: str) -> Any:
+        return _Sink()
+
+    def __call__(self, *args, **kwargs) -> None:
+        return None
+
+
+class HeadlessLogs(_Sink):
+    def __init__(self) -> None:
+        writer.start()
+
+    def log(self, text: str, level=logging.ERROR):
+        print(text, file=sys.stderr if level >= logging.WARNING else sys.stdout)
+        logger.log(msg=text, level=level)
+
+
+class HeadlessSystemTray(_Sink):
+    def showMessage(self, msg: str, time: int = 3000):
+        logger.info(msg)
+
+
+class HeadlessWindow(_Sink):
+    """Stands in for MainWindow when running with --headless.
+
+    Logging calls go to the console and the log file, everything else is a no-op.
+    """
+
+    def __init__(self, client: Client) -> None:
+        self.client = client
+        self.logs = HeadlessLogs()
+        self.systemTray = HeadlessSystemTray()
+        self.stack = _Sink()
+        self.sidebar = _Sink()
+        self.menubar = _Sink()
+
+    @property
+    def application(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.client.loop.create_task(self.client.close()).add_done_callback(
+            lambda _: self.client.loop.stop()
+        )
+
+    def showMessage(self, message: str, time=3000):
+        self.systemTray.showMessage(message, time)
+
+    def log(self, text: str, level=logging.ERROR):
+        self.logs.log(text, level)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+from typing import Any, Iterable, TYPE_CHECKING
+from collections import Counter
+import asyncio
+
+from twitch_bot.cache import MISSING, TTLCache
+
+if TYPE_CHECKING:
+    from twitch_bot import Client, User
+    from twitchio.models import ChannelInfo, Stream
+
+__all__ = ("HelixCache",)
+
+
+class HelixCache:
+    """Caches Helix user, channel and stream lookups for the client and cogs.
+
+    Lookups that miss wait `delay` seconds so concurrent requests for
+    different ids of the same kind go out as one bulk call of up to 100.
+    Concurrent requests for the same key share that call. Results, including
+    "not found", are kept for `ttl` seconds (`stream_ttl` for streams, which
+    change far more often) and the least recently used ones are evicted past
+    `max_size`.
+
+    Kinds are "login" and "id" for users, "channel" for channel info by
+    broadcaster id and "stream" for live streams by user id.
+    """
+
+    BATCH_SIZE = 100
+    KINDS = ("login", "id", "channel", "stream")
+
+    def __init__(
+        self,
+        client: Client,
+        *,
+        ttl: float = 300.0,
+        stream_ttl: float = 60.0,
+        max_size: int = 1000,
+        delay: float = 0.005,
+    ) -> None:
+        self.client = client
+        self.delay = delay
+        self._caches: dict[str, TTLCache] = {
+            kind: TTLCache(max_size, stream_ttl if kind == "stream" else ttl)
+            for kind in self.KINDS
+        }
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        # lookups that joined a request already in flight
+        self.shared: Counter[str] = Counter()
+        self.requests: Counter[str] = Counter()
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self._queued: dict[str, list[str]] = {}
+
+    @staticmethod
+    def _key(kind: str, key: str | int) -> str:
+        return str(key).lower() if kind == "login" else str(key)
+
+    async def get(self, kind: str, key: str | int) -> Any:
+        key = self._key(kind, key)
+        if (value := self._caches[kind].get(key)) is not MISSING:
+            self.hits[kind] += 1
+            return value
+        if (future := self._inflight.get((kind, key))) is not None:
+            self.shared[kind] += 1
+            return await asyncio.shield(future)
+
+        self.misses[kind] += 1
+        future = self._inflight[kind, key] = self.client.loop.create_future()
+        if kind not in self._queued:
+            self._queued[kind] = []
+            self.client.loop.call_later(self.delay, self._flush, kind)
+        self._queued[kind].append(key)
+        return await asyncio.shield(future)
+
+    async def user(
+        self, name: str | None = None, *, id: int | None = None
+    ) -> User | None:
+        if id is not None:
+            return await self.get("id", id)
+        return await self.get("login", name)
+
+    async def users(
+        self, names: Iterable[str] = (), ids: Iterable[int] = ()
+    ) -> list[User]:
+        users = await asyncio.gather(
+            *(self.get("login", name) for name in names),
+            *(self.get("id", id) for id in ids),
+        )
+        return [user for user in users if user is not None]
+
+    async def channel(self, broadcaster_id: int) -> ChannelInfo | None:
+        return await self.get("channel", broadcaster_id)
+
+    async def stream(self, user_id: int) -> Stream | None:
+        """The user's live stream, None while they're offline."""
+        return await self.get("stream", user_id)
+
+    def invalidate(self, kind: str | None = None, key: str | int | None = None) -> None:
+        for name in (kind,) if kind else self.KINDS:
+            if key is None:
+                self._caches[name].clear()
+            else:
+                self._caches[name].pop(self._key(name, key))
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            kind: {
+                "hits": self.hits[kind],
+                "misses": self.misses[kind],
+                "shared": self.shared[kind],
+                "requests": self.requests[kind],
+                "size": len(self._caches[kind]),
+            }
+            for kind in self.KINDS
+        }
+
+    def _flush(self, kind: str) -> None:
+        keys = self._queued.pop(kind)
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[start : start + self.BATCH_SIZE]
+            self.client.create_task(self._fetch(kind, batch))
+
+    async def _fetch(self, kind: str, keys: list[str]) -> None:
+        self.requests[kind] += 1
+        client = self.client
+        # force skips twitchio's own user cache, this one replaces it
+        try:
+            if kind == "login":
+                found = {
+                    user.name.lower(): user
+                    for user in await client.fetch_users(names=keys, force=True)
+                }
+            elif kind == "id":
+                found = {
+                    str(user.id): user
+                    for user in await client.fetch_users(ids=keys, force=True)
+                }
+            elif kind == "channel":
+                found = {
+                    str(channel.user.id): channel
+                    for channel in await client.fetch_channels(keys)
+                }
+            else:
+                found = {
+                    str(stream.user.id): stream
+                    for stream in await client.fetch_streams(user_ids=keys)
+                }
+        except Exception as e:
+            for key in keys:
+                future = self._inflight.pop((kind, key))
+                future.set_exception(e)
+                # every waiter gets it, don't warn about the shared future
+                future.exception()
+            return
+
+        if kind in ("login", "id"):
+            # a user fetched by login is also known by id and vice versa
+            for user in found.values():
+                self._caches["login"].set(user.name.lower(), user)
+                self._caches["id"].set(str(user.id), user)
+        for key in keys:
+            value = found.get(key)
+            self._caches[kind].set(key, value)
+            self._inflight.pop((kind, key)).set_result(value)
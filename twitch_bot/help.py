@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from twitch_bot.ext import commands
+
+__all__ = ("CommandInfo", "HelpIndex")
+
+# Twitch rejects longer PRIVMSGs
+MAX_LENGTH = 500
+LEGEND = ". <> = required, () = optional"
+
+
+def chunk(items: Iterable[str], head: str = "", tail: str = "") -> tuple[str, ...]:
+    """Join items with ", " into messages of at most MAX_LENGTH.
+
+    `head` starts the first message and `tail` ends the last one, or is sent
+    on its own if it doesn't fit.
+    """
+    chunks, current = [], head
+    for item in items:
+        if current == head:
+            candidate = head + item
+        else:
+            candidate = f"{current}, {item}"
+        if len(candidate) > MAX_LENGTH and current != head:
+            chunks.append(current)
+            candidate = item
+        current = candidate
+    if current == head:
+        return (head.removesuffix(": ") + tail,) if head else ()
+    if len(current) + len(tail) <= MAX_LENGTH:
+        chunks.append(current + tail)
+    else:
+        chunks.extend((current, tail.removeprefix(". ")))
+    return tuple(chunks)
+
+
+class CommandInfo:
+    __slots__ = ("name", "aliases", "cog", "usage")
+
+    def __init__(self, command: commands.Command, prefix: str) -> None:
+        self.name: str = command.name
+        self.aliases: tuple[str, ...] = tuple(command.aliases or ())
+        self.cog: str = command.cog.name if command.cog else ""
+        usage = f"{prefix}{command.name}"
+        # the first two are self and ctx
+        for param in list(command.params.values())[2:]:
+            if param.default == param.empty:
+                usage += f" <{param.name}>"
+            else:
+                usage += f"({param.name})"
+        self.usage = usage
+
+    def matches(self, query: str) -> bool:
+        return any(query in name for name in (self.name, *self.aliases))
+
+    def __repr__(self) -> str:
+        return f"<CommandInfo usage={self.usage!r} cog={self.cog}>"
+
+
+class HelpIndex:
+    """Command metadata and pre-rendered `cmds` output, kept per cog.
+
+    Entries are built when a cog is added and dropped when it's removed,
+    so answering `cmds` is a dict lookup. Rendered pages are already split
+    into messages that fit in a single PRIVMSG.
+    """
+
+    def __init__(self, prefix: str = "*") -> None:
+        self.prefix = prefix
+        self._commands: dict[str, tuple[CommandInfo, ...]] = {}
+        self._pages: dict[str, tuple[str, ...]] = {}
+        self._cogs: tuple[str, ...] | None = None
+        self._overview: tuple[str, ...] | None = None
+
+    def add(self, cog: commands.Cog) -> None:
+        infos = tuple(
+            CommandInfo(command, self.prefix) for command in cog._commands.values()
+        )
+        self._commands[cog.name] = infos
+        self._pages[cog.name] = chunk((info.usage for info in infos), tail=LEGEND)
+        self._cogs = self._overview = None
+
+    def remove(self, cog: commands.Cog) -> None:
+        self._commands.pop(cog.name, None)
+        self._pages.pop(cog.name, None)
+        self._cogs = self._overview = None
+
+    def commands(self, cog: str) -> tuple[CommandInfo, ...] | None:
+        return self._commands.get(cog)
+
+    def page(self, cog: str) -> tuple[str, ...] | None:
+        """The `cmds` messages for a cog, empty if it has no commands, None if unknown."""
+        return self._pages.get(cog)
+
+    @property
+    def cogs(self) -> tuple[str, ...]:
+        """Cogs that have at least one command."""
+        if self._cogs is None:
+            self._cogs = tuple(name for name, infos in self._commands.items() if infos)
+        return self._cogs
+
+    @property
+    def overview(self) -> tuple[str, ...]:
+        """How to use `cmds` and which cogs it knows about."""
+        if self._overview is None:
+            self._overview = chunk(
+                self.cogs,
+                f"Format: `{self.prefix}cmds <cog>`. Available cogs: ",
+                ". Note: Case Sensitive",
+            )
+        return self._overview
+
+    def get(self, name: str) -> CommandInfo | None:
+        for infos in self._commands.values():
+            for info in infos:
+                if name == info.name or name in info.aliases:
+                    return info
+        return None
+
+    def search(self, query: str) -> list[CommandInfo]:
+        query = query.lower().removeprefix(self.prefix)
+        return [
+            info
+            for infos in self._commands.values()
+            for info in infos
+            if info.matches(query)
+        ]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+from typing import Container, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from twitch_bot.cache import CachedMessage
+
+__all__ = ("MessageDelete", "MessageClear", "UserTimeout")
+
+CLEARMSG_TAGS = frozenset(("login", "room-id", "target-msg-id", "tmi-sent-ts"))
+CLEARCHAT_TAGS = frozenset(("ban-duration", "room-id", "target-user-id", "tmi-sent-ts"))
+_ESCAPES = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+
+
+def split_lines(data: str) -> Iterator[str]:
+    for line in data.split("\r\n"):
+        if line:
+            yield line
+
+
+def split_line(data: str) -> tuple[str, str, str, str]:
+    """Split a raw line into (tags, prefix, command, params) without parsing the tags."""
+    tags = prefix = ""
+    if data[:1] == "@":
+        tags, _, data = data[1:].partition(" ")
+    if data[:1] == ":":
+        prefix, _, data = data[1:].partition(" ")
+    command, _, params = data.partition(" ")
+    return tags, prefix, command, params
+
+
+def unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    chars = []
+    it = iter(value)
+    for char in it:
+        if char == "\\":
+            char = _ESCAPES.get(next(it, ""), "")
+        chars.append(char)
+    return "".join(chars)
+
+
+def parse_tags(tags: str, wanted: Container[str] | None = None) -> dict[str, str]:
+    parsed = {}
+    for tag in tags.split(";"):
+        key, _, value = tag.partition("=")
+        if wanted is None or key in wanted:
+            parsed[key] = unescape(value)
+    return parsed
+
+
+def split_params(params: str) -> tuple[str, str | None]:
+    """Split params into the channel and the trailing parameter, if any."""
+    if params[:1] == ":":
+        return "", params[1:]
+    channel, sep, trailing = params.partition(" :")
+    return channel, trailing if sep else None
+
+
+class MessageDelete:
+    """Payload of `message_delete`, sent for CLEARMSG.
+
+    `message` is the cached record of the deleted message, or None when it
+    has already been evicted from the cache.
+    """
+
+    __slots__ = ("id", "login", "content", "channel", "tags", "message")
+
+    def __init__(
+        self,
+        channel: str,
+        content: str | None,
+        tags: dict[str, str],
+        message: CachedMessage | None,
+    ) -> None:
+        self.id = tags.get("target-msg-id")
+        self.login = tags.get("login")
+        self.content = content
+        self.channel = channel.lstrip("#")
+        self.tags = tags
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"<MessageDelete id={self.id} login={self.login}>"
+
+
+class MessageClear:
+    """Payload of `message_clear`, sent when a moderator clears the whole chat."""
+
+    __slots__ = ("channel", "tags")
+
+    def __init__(self, channel: str, tags: dict[str, str]) -> None:
+        self.channel = channel.lstrip("#")
+        self.tags = tags
+
+    def __repr__(self) -> str:
+        return f"<MessageClear channel={self.channel}>"
+
+
+class UserTimeout:
+    """Payload of `user_timeout`, sent when a chatter is timed out or banned.
+
+    `duration` is None for a permanent ban.
+    """
+
+    __slots__ = ("user_id", "login", "duration", "channel", "tags")
+
+    def __init__(self, channel: str, login: str | None, tags: dict[str, str]) -> None:
+        self.user_id = tags.get("target-user-id")
+        self.login = login
+        duration = tags.get("ban-duration")
+        self.duration = int(duration) if duration else None
+        self.channel = channel.lstrip("#")
+        self.tags = tags
+
+    @property
+    def is_ban(self) -> bool:
+        return self.duration is None
+
+    def __repr__(self) -> str:
+        return f"<UserTimeout login={self.login} duration={self.duration}>"
@@ -0,0 +1,235 @@
+from __future__ import annotations
+from logging.handlers import QueueHandler
+from pathlib import Path
+import traceback
+import threading
+import atexit
+import logging
+import shutil
+import queue
+import time
+import gzip
+import sys
+import os
+
+__all__ = ("LogWriter", "logger", "writer")
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def __init__(self, writer: LogWriter) -> None:
+        super().__init__(writer._queue)
+        self.writer = writer
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # format on the writer thread, only make the record safe to pass over
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.writer._put(record, record.levelno)
+
+
+class LogWriter:
+    """Writes log records and redirected output to a file on a background thread.
+
+    Records are queued by `handler` and `write` without touching the disk.
+    The writer drains the queue in batches, flushes once per batch, rotates
+    the file by size and/or age and can gzip rotated files.
+
+    When the queue is full because the disk can't keep up, records below
+    WARNING are dropped. WARNING and above evict the oldest queued entry
+    instead, so errors are the last thing to be lost. The number of dropped
+    entries is written to the file once the writer catches up.
+
+    The module's `writer` starts with the defaults, the client applies the
+    log_* settings to it with `configure`.
+    """
+
+    OPTIONS = ("path", "max_bytes", "interval", "backup_count", "compress")
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        formatter: logging.Formatter | None = None,
+        max_bytes: int = 5 * 2**20,
+        interval: float | None = None,
+        backup_count: int = 5,
+        compress: bool = False,
+        queue_size: int = 10_000,
+        flush_interval: float = 0.5,
+        batch_size: int = 500,
+    ) -> None:
+        self.path = Path(path)
+        self.formatter = formatter or logging.Formatter()
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+
+        # _put runs on whichever thread logs
+        self._dropped_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._partial: dict[int, str] = {}
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self._file = None
+        self._rollover_at = None
+        self.handler = _DroppingQueueHandler(self)
+
+    def _put(self, item, level: int) -> None:
+        try:
+            return self._queue.put_nowait(item)
+        except queue.Full:
+            pass
+        if level >= logging.WARNING:
+            try:
+                self._queue.get_nowait()
+                self._queue.put_nowait(item)
+            except (queue.Empty, queue.Full):
+                pass
+        with self._dropped_lock:
+            self.dropped += 1
+
+    def write(self, text: str, level=logging.INFO) -> None:
+        """Queue raw stream output. Lines are timestamped as they complete."""
+        self._put((level, text, time.time()), level)
+
+    def configure(self, **options) -> None:
+        """Change any of OPTIONS, restarting the writer thread if it's running."""
+        if unknown := options.keys() - set(self.OPTIONS):
+            raise TypeError(f"Unknown LogWriter options: {', '.join(sorted(unknown))}")
+        running = self.running
+        # closes the file, the next batch opens the new one
+        self.stop()
+        for name, value in options.items():
+            setattr(self, name, Path(value) if name == "path" else value)
+        if running:
+            self.start()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="twitch-bot-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Write everything still queued and close the file."""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception:
+                # sys.stderr is redirected back into this writer
+                traceback.print_exc(file=sys.__stderr__)
+        self._close()
+
+    def _format(self, item) -> str:
+        if isinstance(item, logging.LogRecord):
+            return self.formatter.format(item) + "\n"
+
+        level, text, created = item
+        lines = (self._partial.pop(level, "") + text).split("\n")
+        self._partial[level] = lines.pop()
+        text = ""
+        for line in lines:
+            record = self._record(level, line)
+            record.created = created
+            text += self.formatter.format(record) + "\n"
+        return text
+
+    @staticmethod
+    def _record(level: int, message: str) -> logging.LogRecord:
+        return logging.makeLogRecord(
+            {"levelno": level, "levelname": logging.getLevelName(level), "msg": message}
+        )
+
+    def _write_batch(self, batch: list) -> None:
+        text = "".join(self._format(item) for item in batch)
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            record = self._record(logging.WARNING, f"{dropped} log entries dropped")
+            text += self.formatter.format(record) + "\n"
+        if not text:
+            return
+        if self._file is None:
+            self._open()
+        elif self._should_rollover():
+            self._rotate()
+        self._file.write(text)
+        self._file.flush()
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self.interval is not None:
+            self._rollover_at = time.time() + self.interval
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _should_rollover(self) -> bool:
+        if self._rollover_at is not None and time.time() >= self._rollover_at:
+            return True
+        return bool(self.max_bytes) and self._file.tell() >= self.max_bytes
+
+    def _backup(self, index: int) -> Path:
+        suffix = f".{index}.gz" if self.compress else f".{index}"
+        return self.path.with_name(self.path.name + suffix)
+
+    def _rotate(self) -> None:
+        self._close()
+        if self.backup_count > 0:
+            self._backup(self.backup_count).unlink(missing_ok=True)
+            for index in range(self.backup_count - 1, 0, -1):
+                if (backup := self._backup(index)).exists():
+                    backup.replace(self._backup(index + 1))
+            if self.compress:
+                with open(self.path, "rb") as src, gzip.open(
+                    self._backup(1), "wb"
+                ) as dst:
+                    shutil.copyfileobj(src, dst)
+                self.path.unlink()
+            else:
+                self.path.replace(self._backup(1))
+        else:
+            self.path.unlink(missing_ok=True)
+        self._open()
+
+
+logger = logging.getLogger("twitch-bot")
+formatter = logging.Formatter("%(levelname)s:%(asctime)s: %(message)s")
+writer = LogWriter("twitch-bot.log", formatter=formatter)
+logger.addHandler(writer.handler)
+atexit.register(writer.stop)
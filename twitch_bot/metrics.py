@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import Iterator, TYPE_CHECKING
+from collections import deque
+import statistics
+import asyncio
+import time
+import sys
+import os
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+
+__all__ = ("Metrics", "Series")
+
+
+class Series:
+    """The last `size` samples of one metric as (time, value) pairs."""
+
+    __slots__ = ("name", "unit", "_samples")
+
+    def __init__(self, name: str, unit: str = "", size: int = 120) -> None:
+        self.name = name
+        self.unit = unit
+        self._samples: deque[tuple[float, float]] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def __iter__(self) -> Iterator[tuple[float, float]]:
+        return iter(self._samples)
+
+    def append(self, timestamp: float, value: float) -> None:
+        self._samples.append((timestamp, value))
+
+    @property
+    def last(self) -> float | None:
+        return self._samples[-1][1] if self._samples else None
+
+    def max(self) -> float:
+        return max((value for _, value in self._samples), default=0.0)
+
+
+def _rss() -> int | None:
+    """Resident memory in bytes, None where it can't be read."""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if sys.platform == "win32":
+        # no /proc and no resource module, install psutil for the metric
+        return None
+    import resource
+
+    # peak rather than current, but better than nothing
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Metrics:
+    """Samples bot health every `interval` seconds into fixed-size series.
+
+    Counters are bumped from the hot paths and only turned into samples by
+    the sampling task, so recording costs an addition. Event-loop lag is how
+    late the sampling task's own sleep wakes up.
+    """
+
+    def __init__(self, client: Client, *, size: int = 120, interval: float = 1.0):
+        self.client = client
+        self.interval = interval
+        self.series: dict[str, Series] = {
+            series.name: series
+            for series in (
+                Series("messages", "/s", size),
+                Series("lag", "ms", size),
+                Series("command p50", "ms", size),
+                Series("command p90", "ms", size),
+                Series("command p99", "ms", size),
+                Series("outbound", "", size),
+                Series("executor", "", size),
+                Series("cache", "KiB", size),
+                Series("cpu", "%", size),
+                Series("rss", "MiB", size),
+            )
+        }
+        self.messages = 0
+        self._commands: deque[float] = deque(maxlen=1024)
+        self._task: asyncio.Task | None = None
+        self._cpu = time.process_time()
+
+    def __getitem__(self, name: str) -> Series:
+        return self.series[name]
+
+    def record_message(self) -> None:
+        self.messages += 1
+
+    def record_command(self, seconds: float) -> None:
+        self._commands.append(seconds * 1000)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = self.client.loop.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.sample(now - last)
+            last = now
+
+    def _cache_size(self) -> float:
+        """Estimated from the newest records, walking all of them every tick isn't cheap."""
+        cache = self.client._messages
+        if not (count := len(cache._records)):
+            return 0.0
+        recent = list(cache._records.values())[-64:]
+        size = sum(
+            sys.getsizeof(record)
+            + sys.getsizeof(record.content)
+            + sys.getsizeof(record.id)
+            for record in recent
+        )
+        return size / len(recent) * count / 1024
+
+    def sample(self, elapsed: float) -> None:
+        now = time.time()
+        self["messages"].append(now, self.messages / elapsed)
+        self.messages = 0
+        self["lag"].append(now, max(0.0, elapsed - self.interval) * 1000)
+
+        if len(self._commands) >= 2:
+            p50, p90, p99 = (
+                statistics.quantiles(self._commands, n=100)[i] for i in (49, 89, 98)
+            )
+        else:
+            p50 = p90 = p99 = self._commands[0] if self._commands else 0.0
+        self._commands.clear()
+        self["command p50"].append(now, p50)
+        self["command p90"].append(now, p90)
+        self["command p99"].append(now, p99)
+
+        self["outbound"].append(now, self.client.outbound.depth)
+        self["executor"].append(now, sum(self.client.executor.queued.values()))
+        self["cache"].append(now, self._cache_size())
+        cpu = time.process_time()
+        self["cpu"].append(now, (cpu - self._cpu) / elapsed * 100)
+        self._cpu = cpu
+        if (rss := _rss()) is not None:
+            self["rss"].append(now, rss / 2**20)
@@ -0,0 +1,265 @@
+from __future__ import annotations
+from typing import Awaitable, Callable, Iterator, TYPE_CHECKING
+from dataclasses import dataclass, field
+from collections import deque
+from enum import IntEnum
+import itertools
+import asyncio
+import heapq
+import time
+
+from twitchio.abcs import limiter
+from twitchio.cooldowns import RateBucket
+from twitchio.ext import commands
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+    from twitchio.abcs import Messageable
+
+__all__ = ("Priority", "SendQueue", "TokenBucket")
+
+
+class Priority(IntEnum):
+    MODERATION = 0
+    COMMAND = 1
+    CHAT = 2
+
+
+class TokenBucket:
+    """`rate` tokens, each one comes back `period` seconds after it's spent.
+
+    Twitch counts messages over a sliding window, a bucket that refills
+    continuously would let a full burst plus the refill land in one window.
+    """
+
+    def __init__(self, rate: int, period: float) -> None:
+        self.rate = rate
+        self.period = period
+        self._spent: deque[float] = deque()
+
+    def _refill(self, now: float) -> None:
+        while self._spent and now - self._spent[0] >= self.period:
+            self._spent.popleft()
+
+    @property
+    def tokens(self) -> int:
+        self._refill(time.monotonic())
+        return self.rate - len(self._spent)
+
+    def delay(self) -> float:
+        """Seconds until a token is available."""
+        now = time.monotonic()
+        self._refill(now)
+        if len(self._spent) < self.rate:
+            return 0.0
+        return self._spent[0] + self.period - now
+
+    def take(self) -> None:
+        self._spent.append(time.monotonic())
+
+
+@dataclass(order=True)
+class _Outgoing:
+    priority: int
+    sequence: int
+    channel: str = field(compare=False)
+    content: str = field(compare=False)
+    mod: bool = field(compare=False)
+    send: Callable[[], Awaitable[None]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class SendQueue:
+    """Central outbound chat queue.
+
+    Messages go out in priority order (moderation, then command replies,
+    then everything else) through a per-channel token bucket sized to
+    Twitch's limit for the bot: 100 per 30s when it's a moderator or the
+    broadcaster, 20 otherwise. The same limits also hold for the account
+    across channels, so every message takes a token from the account's mod
+    bucket too and messages where it isn't a moderator from its other
+    bucket. The first message in priority order whose buckets have a token
+    goes out, a channel at its limit doesn't hold up the others. It also
+    waits on twitchio's own limiter so `send` never fails with
+    IRCCooldownError.
+
+    Identical pending messages to the same channel are sent once when
+    `merge` is set. Once `max_pending` messages are queued, `send` waits
+    for room, which is how callers feel backpressure.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        *,
+        max_pending: int = 100,
+        merge: bool = True,
+        # Twitch counts messages as they arrive, leave a second for jitter
+        period: float = RateBucket.IRC + 1.0,
+    ) -> None:
+        self.client = client
+        self.max_pending = max_pending
+        self.merge = merge
+        self.period = period
+        self.sent = 0
+        self._heap: list[_Outgoing] = []
+        self._merged: dict[tuple[str, str, int], _Outgoing] = {}
+        self._buckets: dict[tuple[str | None, bool], TokenBucket] = {}
+        self._sequence = itertools.count()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._worker: asyncio.Task | None = None
+        self._current: _Outgoing | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._heap)
+
+    def buckets(self, item: _Outgoing) -> tuple[TokenBucket, ...]:
+        """The channel's bucket and the account's ones `item` takes a token from."""
+        buckets = (self.bucket(item.channel, item.mod), self.bucket(None, True))
+        return buckets if item.mod else (*buckets, self.bucket(None, False))
+
+    def bucket(self, channel: str | None, mod: bool) -> TokenBucket:
+        """The bucket of `channel`, of the account with None."""
+        if (bucket := self._buckets.get((channel, mod))) is None:
+            rate = RateBucket.MODLIMIT if mod else RateBucket.IRCLIMIT
+            bucket = self._buckets[channel, mod] = TokenBucket(rate, self.period)
+        return bucket
+
+    async def send(
+        self,
+        channel: Messageable,
+        content: str,
+        priority: Priority = Priority.CHAT,
+        *,
+        wait: bool = True,
+    ) -> None:
+        """Queue a message. With `wait`, returns once it has been sent."""
+        # the channel itself, a Context would send back through this queue
+        target = channel._fetch_channel()
+        await self._put(channel, content, priority, lambda: target.send(content), wait)
+
+    async def reply(
+        self,
+        ctx: commands.Context,
+        content: str,
+        priority: Priority = Priority.COMMAND,
+        *,
+        wait: bool = True,
+    ) -> None:
+        reply = commands.Context.reply
+        await self._put(ctx, content, priority, lambda: reply(ctx, content), wait)
+
+    async def _put(
+        self,
+        target: Messageable,
+        content: str,
+        priority: Priority,
+        send: Callable[[], Awaitable[None]],
+        wait: bool,
+    ) -> None:
+        channel = target._fetch_channel().name
+        key = (channel, content, priority)
+        if self.merge and (pending := self._merged.get(key)):
+            return await asyncio.shield(pending.future) if wait else None
+
+        async with self._space:
+            await self._space.wait_for(lambda: len(self._heap) < self.max_pending)
+        item = _Outgoing(
+            priority,
+            next(self._sequence),
+            channel,
+            content,
+            target._bot_is_mod(),
+            send,
+            self.client.loop.create_future(),
+        )
+        heapq.heappush(self._heap, item)
+        if self.merge:
+            self._merged[key] = item
+        self._ready.set()
+        self.start()
+        if wait:
+            await asyncio.shield(item.future)
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = self.client.loop.create_task(self._run())
+
+    async def drain(self) -> None:
+        """Wait until everything queued so far has been sent."""
+        futures = [item.future for item in self._heap]
+        if self._current is not None:
+            futures.append(self._current.future)
+        if futures:
+            await asyncio.gather(*futures, return_exceptions=True)
+
+    async def stop(self) -> None:
+        await self.drain()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            if not self._heap:
+                self._ready.clear()
+                continue
+
+            item, delay = self._next()
+            if item is None:
+                # a higher priority message may arrive while we wait for a token
+                await asyncio.sleep(delay)
+                continue
+
+            if item is self._heap[0]:
+                heapq.heappop(self._heap)
+            else:
+                self._heap.remove(item)
+                heapq.heapify(self._heap)
+            self._merged.pop((item.channel, item.content, item.priority), None)
+            async with self._space:
+                self._space.notify()
+            for bucket in self.buckets(item):
+                bucket.take()
+            self._current = item
+            try:
+                await item.send()
+            except Exception as e:
+                item.future.set_exception(e)
+                # reported here, don't warn again if nobody awaited it
+                item.future.exception()
+                self.client.run_event("error", e)
+            else:
+                self.sent += 1
+                item.future.set_result(None)
+            finally:
+                self._current = None
+
+    def _next(self) -> tuple[_Outgoing | None, float]:
+        """The first message in priority order that can go out now, or how long until one can."""
+        shortest = float("inf")
+        for item in self._ordered():
+            delay = max(
+                *(bucket.delay() for bucket in self.buckets(item)),
+                self._twitchio_delay(item),
+            )
+            if not delay:
+                return item, 0.0
+            shortest = min(shortest, delay)
+        return None, shortest
+
+    def _ordered(self) -> Iterator[_Outgoing]:
+        # usually the first one goes out, only sort when it has to wait
+        yield self._heap[0]
+        yield from sorted(self._heap)[1:]
+
+    @staticmethod
+    def _twitchio_delay(item: _Outgoing) -> float:
+        # RateBucket.update counts a message, only read it here
+        bucket = limiter.get_bucket(item.channel, "mod" if item.mod else "irc")
+        if not bucket.limited:
+            return 0.0
+        return max(0.0, bucket._reset - time.time())
@@ -0,0 +1,309 @@
+from __future__ import annotations
+from typing import Callable, Iterable, TYPE_CHECKING
+from abc import ABC, abstractmethod
+from functools import partial, wraps
+from bisect import bisect_left
+import inspect
+import asyncio
+import json
+import time
+import os
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+
+__all__ = (
+    "Exporter",
+    "Histogram",
+    "HandlerStats",
+    "JSONLinesExporter",
+    "PrometheusExporter",
+    "Profiler",
+    "TimedListener",
+)
+
+
+class Histogram:
+    """Handler durations in fixed buckets, Prometheus style."""
+
+    # upper bounds in seconds, the last bucket is +Inf
+    BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class HandlerStats:
+    __slots__ = ("kind", "name", "histogram", "errors")
+
+    def __init__(self, kind: str, name: str) -> None:
+        self.kind = kind
+        self.name = name
+        self.histogram = Histogram()
+        self.errors = 0
+
+    def copy(self) -> HandlerStats:
+        stats = HandlerStats(self.kind, self.name)
+        stats.histogram.counts = self.histogram.counts.copy()
+        stats.histogram.count = self.histogram.count
+        stats.histogram.sum = self.histogram.sum
+        stats.histogram.max = self.histogram.max
+        stats.errors = self.errors
+        return stats
+
+    def to_dict(self) -> dict:
+        histogram = self.histogram
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "count": histogram.count,
+            "errors": self.errors,
+            "sum": histogram.sum,
+            "mean": histogram.mean,
+            "p50": histogram.quantile(0.5),
+            "p99": histogram.quantile(0.99),
+            "max": histogram.max,
+        }
+
+
+class Exporter(ABC):
+    """Receives a snapshot of every handler's stats from Profiler.export.
+
+    Runs on a worker thread, so it may block on IO.
+    """
+
+    @abstractmethod
+    def export(self, stats: list[HandlerStats]) -> None: ...
+
+
+class JSONLinesExporter(Exporter):
+    """Appends one JSON object per handler and export."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = path
+
+    def export(self, stats: list[HandlerStats]) -> None:
+        now = time.time()
+        with open(self.path, "a", encoding="utf-8") as f:
+            for handler in stats:
+                f.write(json.dumps({"time": now, **handler.to_dict()}) + "\n")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusExporter(Exporter):
+    """Rewrites a file in the Prometheus text format, e.g. for node_exporter's textfile collector."""
+
+    def __init__(self, path: str | os.PathLike, prefix: str = "twitch_bot") -> None:
+        self.path = path
+        self.prefix = prefix
+
+    @staticmethod
+    def _labels(handler: HandlerStats, **extra: str) -> str:
+        labels = {"kind": handler.kind, "name": handler.name, **extra}
+        return (
+            "{"
+            + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+            + "}"
+        )
+
+    def render(self, stats: list[HandlerStats]) -> str:
+        name = f"{self.prefix}_handler_seconds"
+        errors = f"{self.prefix}_handler_errors_total"
+        lines = [
+            f"# HELP {name} Time spent in commands, event listeners and routines.",
+            f"# TYPE {name} histogram",
+        ]
+        for handler in stats:
+            histogram = handler.histogram
+            cumulative = 0
+            for bound, count in zip((*Histogram.BOUNDS, "+Inf"), histogram.counts):
+                cumulative += count
+                labels = self._labels(handler, le=str(bound))
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(handler)} {histogram.sum}")
+            lines.append(f"{name}_count{self._labels(handler)} {histogram.count}")
+        lines.append(f"# HELP {errors} Exceptions raised by handlers.")
+        lines.append(f"# TYPE {errors} counter")
+        for handler in stats:
+            lines.append(f"{errors}{self._labels(handler)} {handler.errors}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, stats: list[HandlerStats]) -> None:
+        # scrapers must never see a half written file
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(self.render(stats))
+        os.replace(temp, self.path)
+
+
+def handler_name(callback: Callable) -> str:
+    if isinstance(callback, partial):
+        owner = callback.args[0] if callback.args else None
+        func = callback.func
+        if hasattr(owner, "name"):
+            return f"{owner.name}.{getattr(func, '__name__', func)}"
+        return getattr(func, "__qualname__", repr(func))
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class TimedListener:
+    """An event listener wrapped by `Profiler.listener` when it's registered.
+
+    Equal to the callback it wraps, so remove_event still finds it.
+    """
+
+    __slots__ = ("callback", "_timed")
+
+    def __init__(self, profiler: Profiler, callback: Callable) -> None:
+        self.callback = callback
+        self._timed = profiler.wrap("event", handler_name(callback), callback)
+
+    def __call__(self, *args):
+        return self._timed(*args)
+
+    def __eq__(self, other: object) -> bool:
+        return self is other or self.callback == other
+
+    def __hash__(self) -> int:
+        return hash(self.callback)
+
+    def __getattr__(self, name: str):
+        return getattr(self.callback, name)
+
+
+class Profiler:
+    """Opt-in latency and error accounting for commands, listeners and routines.
+
+    Listeners are wrapped when they're registered and the client's own
+    event methods when it's created, twitchio dispatches to them as usual.
+    While disabled the only cost is a flag check per command, listener call
+    and routine iteration. Stats are kept per (kind, name) and handed to the
+    exporters every `interval` seconds.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        *,
+        enabled: bool = False,
+        exporters: Iterable[Exporter] = (),
+        interval: float = 60.0,
+    ) -> None:
+        self.client = client
+        self.enabled = enabled
+        self.exporters = list(exporters)
+        self.interval = interval
+        self.stats: dict[tuple[str, str], HandlerStats] = {}
+        self._task: asyncio.Task | None = None
+
+    def _stats(self, kind: str, name: str) -> HandlerStats:
+        if (stats := self.stats.get((kind, name))) is None:
+            stats = self.stats[kind, name] = HandlerStats(kind, name)
+        return stats
+
+    def record(self, kind: str, name: str, seconds: float) -> None:
+        self._stats(kind, name).histogram.observe(seconds)
+
+    def record_error(self, kind: str, name: str) -> None:
+        self._stats(kind, name).errors += 1
+
+    def slowest(self, count: int = 5, kind: str | None = None) -> list[HandlerStats]:
+        stats = [s for s in self.stats.values() if kind is None or s.kind == kind]
+        stats.sort(key=lambda s: s.histogram.mean, reverse=True)
+        return stats[:count]
+
+    def reset(self) -> None:
+        self.stats.clear()
+
+    def wrap(self, kind: str, name: str, func: Callable) -> Callable:
+        """`func` timed while the profiler is enabled, errors are recorded and raised again."""
+        if getattr(func, "__profiler__", None) is self:
+            return func
+
+        @wraps(func)
+        async def timed(*args, **kwargs):
+            if not self.enabled:
+                return await func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                self.record_error(kind, name)
+                raise
+            finally:
+                self.record(kind, name, time.perf_counter() - start)
+
+        timed.__profiler__ = self
+        return timed
+
+    def listener(self, callback: Callable) -> TimedListener:
+        if isinstance(callback, TimedListener):
+            return callback
+        return TimedListener(self, callback)
+
+    def instrument_client(self) -> None:
+        """Time the client's own event methods, twitchio calls them by name."""
+        client = self.client
+        for name in dir(type(client)):
+            if name.startswith("event_") and inspect.iscoroutinefunction(
+                getattr(type(client), name)
+            ):
+                method = getattr(client, name)
+                setattr(client, name, self.wrap("event", handler_name(method), method))
+
+    def start(self) -> None:
+        if self.exporters and (self._task is None or self._task.done()):
+            self._task = self.client.loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.export()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.export()
+
+    async def export(self) -> None:
+        if not (self.enabled and self.exporters and self.stats):
+            return
+        # the exporters run on another thread while handlers keep recording
+        stats = [stats.copy() for stats in self.stats.values()]
+        for exporter in self.exporters:
+            try:
+                await self.client.loop.run_in_executor(None, exporter.export, stats)
+            except Exception as e:
+                self.client.window.log(f"{type(exporter).__name__} failed: {e}")
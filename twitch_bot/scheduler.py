@@ -0,0 +1,402 @@
+from __future__ import annotations
+from typing import Any, Callable, Coroutine, TYPE_CHECKING
+from itertools import count
+import asyncio
+import random
+import heapq
+import math
+import time
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+    from twitch_bot.ext import commands, routines
+
+__all__ = ("Job", "Scheduled", "Scheduler", "scheduled")
+
+
+class Scheduled:
+    """A cog method the client's Scheduler calls periodically, see `scheduled`.
+
+    Like a twitchio Routine, accessing it on a cog instance gives that cog its
+    own Job, which is what gets scheduled and can be paused or resumed.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[Any], Coroutine],
+        interval: float,
+        *,
+        align: bool = False,
+        offset: float = 0.0,
+        jitter: float = 0.0,
+        live_only: bool = False,
+        wait_first: bool = False,
+        iterations: int | None = None,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("A scheduled routine needs a positive interval")
+        if not asyncio.iscoroutinefunction(func):
+            raise TypeError("Scheduled routines must be coroutine functions")
+        self.func = func
+        self.interval = interval
+        self.align = align
+        self.offset = offset
+        self.jitter = jitter
+        self.live_only = live_only
+        self.wait_first = wait_first
+        # like twitchio, 0 means forever
+        self.iterations = iterations or None
+
+    @classmethod
+    def from_routine(cls, routine: routines.Routine) -> Scheduled:
+        """The schedule of a twitchio Routine, its interval, iterations and wait_first.
+
+        A routine with a `time` runs daily at that time, as an aligned job.
+        """
+        if routine._time is not None:
+            return cls(
+                routine._coro,
+                86400,
+                align=True,
+                offset=routine._time.timestamp() % 86400,
+                iterations=routine._iterations,
+            )
+        return cls(
+            routine._coro,
+            routine._delta,
+            wait_first=routine._wait_first,
+            iterations=routine._iterations,
+        )
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        job = Job(self, instance)
+        setattr(instance, self.func.__name__, job)
+        return job
+
+
+def scheduled(
+    *,
+    seconds: float = 0,
+    minutes: float = 0,
+    hours: float = 0,
+    align: bool = False,
+    offset: float = 0.0,
+    jitter: float = 0.0,
+    live_only: bool = False,
+    wait_first: bool = False,
+    iterations: int | None = None,
+) -> Callable[[Callable[[Any], Coroutine]], Scheduled]:
+    """Run a cog method every `seconds + minutes + hours` while the cog is loaded.
+
+    With `align` runs land on wall clock multiples of the interval plus
+    `offset`, e.g. every minute on the minute. Each run is delayed by up to
+    `jitter` random seconds. `live_only` routines are paused while none of
+    the channels the cog handles are live. A run that is still going when
+    the next one is due makes the scheduler skip that run. With `iterations`
+    the routine stops after that many runs.
+    """
+    interval = seconds + minutes * 60 + hours * 3600
+
+    def decorator(func: Callable[[Any], Coroutine]) -> Scheduled:
+        return Scheduled(
+            func,
+            interval,
+            align=align,
+            offset=offset,
+            jitter=jitter,
+            live_only=live_only,
+            wait_first=wait_first,
+            iterations=iterations,
+        )
+
+    return decorator
+
+
+class Job:
+    __slots__ = (
+        "routine",
+        "cog",
+        "name",
+        "paused",
+        "due",
+        "remaining",
+        "runs",
+        "skipped",
+        "errors",
+        "last",
+        "total",
+        "max",
+        "_scheduler",
+        "_entry",
+        "_task",
+    )
+
+    def __init__(self, routine: Scheduled, cog: commands.Cog) -> None:
+        self.routine = routine
+        self.cog = cog
+        self.name = f"{cog.name}.{routine.func.__name__}"
+        self.paused = False
+        self.due: float | None = None
+        # runs left to start, None runs forever
+        self.remaining = routine.iterations
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last = 0.0
+        self.total = 0.0
+        self.max = 0.0
+        self._scheduler: Scheduler | None = None
+        self._entry: list | None = None
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def adopt(cls, routine: routines.Routine, cog: commands.Cog) -> Job:
+        """Take over a cog's twitchio Routine, the Job replaces it on the cog.
+
+        A routine the cog already started stops running its own task and the
+        job runs in its place, one that hasn't been started waits for
+        `start()` like the routine would.
+        """
+        job = cls(Scheduled.from_routine(routine), cog)
+        if started := routine._task is not None and not routine._task.done():
+            routine.cancel()
+        job.paused = not started
+        setattr(cog, routine._coro.__name__, job)
+        return job
+
+    def __repr__(self) -> str:
+        return f"<Job {self.name} every {self.routine.interval}s>"
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.runs if self.runs else 0.0
+
+    def pause(self) -> None:
+        self.paused = True
+        if self._scheduler is not None:
+            self._scheduler._unschedule(self)
+
+    def resume(self) -> None:
+        self.paused = False
+        if self._scheduler is not None:
+            self._scheduler._schedule(self)
+
+    # the twitchio Routine names, so adopted routines keep working
+
+    def start(self) -> None:
+        if self.remaining == 0:
+            self.remaining = self.routine.iterations
+        self.paused = False
+        if self._scheduler is not None:
+            self._scheduler._schedule(self, first=True)
+
+    def stop(self) -> None:
+        """Pause after the current run, if any."""
+        self.pause()
+
+    def cancel(self) -> None:
+        self.pause()
+        if self.running:
+            self._task.cancel()
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "interval": self.routine.interval,
+            "paused": self.paused,
+            "remaining": self.remaining,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "last": self.last,
+            "mean": self.mean,
+            "max": self.max,
+        }
+
+
+class Scheduler:
+    """Runs every cog's routines from one task and one timer.
+
+    That includes plain twitchio Routines, which the client adopts as jobs
+    when their cog is added, see `Job.adopt`.
+
+    Jobs sit in a heap ordered by when they're due, the task sleeps until the
+    first one and then starts every job due within `resolution` seconds, so
+    routines with nearby deadlines share a wakeup. Each run is its own task,
+    a slow routine never delays the others.
+
+    Live-only jobs leave the heap while none of the channels their cog
+    handles are live and come back on stream_start. Run time is kept per job
+    and recorded by the profiler when it's enabled.
+    """
+
+    def __init__(self, client: Client, *, resolution: float = 0.01) -> None:
+        self.client = client
+        self.resolution = resolution
+        self.jobs: dict[str, Job] = {}
+        # names of the channels that are live
+        self.live: set[str] = set()
+        self.wakeups = 0
+        self._heap: list[list] = []
+        self._counter = count()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.client.loop
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = self.loop.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for job in self.jobs.values():
+            if job.running:
+                job._task.cancel()
+
+    def add(self, job: Job) -> None:
+        if job.name in self.jobs:
+            self.remove(self.jobs[job.name])
+        job._scheduler = self
+        self.jobs[job.name] = job
+        self._schedule(job, first=True)
+
+    def remove(self, job: Job) -> None:
+        self._unschedule(job)
+        if job.running:
+            job._task.cancel()
+        job._scheduler = None
+        self.jobs.pop(job.name, None)
+
+    def remove_cog(self, cog: commands.Cog) -> None:
+        for job in tuple(self.jobs.values()):
+            if job.cog is cog:
+                self.remove(job)
+
+    def set_live(self, channel: str, live: bool) -> None:
+        if live == (channel in self.live):
+            return
+        if live:
+            self.live.add(channel)
+        else:
+            self.live.discard(channel)
+        for job in self.jobs.values():
+            if not job.routine.live_only:
+                continue
+            if not self._on_air(job):
+                self._unschedule(job)
+            elif job._entry is None:
+                self._schedule(job, first=True)
+
+    def _on_air(self, job: Job) -> bool:
+        channels = self.client.channels
+        return any(channels.allows(channel, job.cog.name) for channel in self.live)
+
+    def stats(self) -> list[dict]:
+        return [job.to_dict() for job in self.jobs.values()]
+
+    def _next(self, job: Job, now: float) -> float:
+        routine = job.routine
+        if routine.align:
+            # line up with the wall clock, the heap itself runs on loop time
+            wall = time.time()
+            # a run may start up to `resolution` early, don't land on its slot again
+            slot = (
+                math.floor((wall + self.resolution - routine.offset) / routine.interval)
+                + 1
+            ) * routine.interval + routine.offset
+            due = now + slot - wall
+        else:
+            due = now + routine.interval
+        if routine.jitter:
+            due += random.uniform(0, routine.jitter)
+        return due
+
+    def _schedule(self, job: Job, *, first: bool = False) -> None:
+        if job.paused or job._scheduler is not self or job.remaining == 0:
+            return
+        if job.routine.live_only and not self._on_air(job):
+            return
+        self._unschedule(job)
+        now = self.loop.time()
+        routine = job.routine
+        if first and not routine.wait_first and not routine.align:
+            job.due = now + (random.uniform(0, routine.jitter) if routine.jitter else 0)
+        else:
+            job.due = self._next(job, now)
+        job._entry = [job.due, next(self._counter), job]
+        heapq.heappush(self._heap, job._entry)
+        if self._heap[0] is job._entry:
+            self._wake.set()
+
+    def _unschedule(self, job: Job) -> None:
+        # heap entries are dropped lazily when they reach the top
+        if job._entry is not None:
+            job._entry[2] = None
+            job._entry = None
+        job.due = None
+
+    async def _run(self) -> None:
+        heap = self._heap
+        while True:
+            while heap and heap[0][2] is None:
+                heapq.heappop(heap)
+            self._wake.clear()
+            if not heap:
+                await self._wake.wait()
+                continue
+            delay = heap[0][0] - self.loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                    # something earlier was scheduled
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+            self.wakeups += 1
+            now = self.loop.time()
+            horizon = now + self.resolution
+            while heap and heap[0][0] <= horizon:
+                _, _, job = heapq.heappop(heap)
+                if job is None:
+                    continue
+                job._entry = None
+                if job.running:
+                    job.skipped += 1
+                else:
+                    job._task = self.loop.create_task(self._call(job))
+                    if job.remaining is not None:
+                        job.remaining -= 1
+                self._schedule(job)
+
+    async def _call(self, job: Job) -> None:
+        profiler = self.client.profiler
+        start = time.perf_counter()
+        try:
+            await job.routine.func(job.cog)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.errors += 1
+            if profiler.enabled:
+                profiler.record_error("routine", job.name)
+            self.client.run_event("error", e)
+        finally:
+            elapsed = time.perf_counter() - start
+            job.runs += 1
+            job.last = elapsed
+            job.total += elapsed
+            if elapsed > job.max:
+                job.max = elapsed
+            if profiler.enabled:
+                profiler.record("routine", job.name, elapsed)
@@ -0,0 +1,208 @@
+from __future__ import annotations
+from typing import Any, TYPE_CHECKING
+import asyncio
+import logging
+import copy
+import json
+import os
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+    from twitch_bot.ext import commands
+
+__all__ = ("Settings", "diff", "read", "validate")
+
+_MISSING = object()
+# path -> (mtime, parsed), for read()
+_files: dict[str, tuple[int, dict]] = {}
+
+
+def _load(path: str) -> tuple[int, dict]:
+    """Modification time and contents of a settings file, (0, {}) if there's none."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0, {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    return mtime, data
+
+
+def read(path: str) -> dict:
+    """A copy of the JSON object in `path`, only parsed again once the file changed."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = 0
+    if (cached := _files.get(path)) is None or cached[0] != mtime:
+        cached = _files[path] = _load(path)
+    return copy.deepcopy(cached[1])
+
+
+def validate(settings: dict, schema: dict[str, Any], prefix: str = "") -> list[str]:
+    """What's wrong with `settings` according to `schema`, nothing if they match.
+
+    A schema maps keys to a type, a tuple of types or a nested schema for a
+    dict. Keys it doesn't mention and missing keys are fine, ints pass as
+    floats and bools don't pass as ints.
+    """
+    errors = []
+    for key, expected in schema.items():
+        if (value := settings.get(key, _MISSING)) is _MISSING:
+            continue
+        if isinstance(expected, dict):
+            if not isinstance(value, dict):
+                errors.append(f"{prefix}{key} should be an object")
+            else:
+                errors.extend(validate(value, expected, f"{prefix}{key}."))
+            continue
+        types = expected if isinstance(expected, tuple) else (expected,)
+        accepted = (*types, int) if float in types else types
+        if (isinstance(value, bool) and bool not in types) or not isinstance(
+            value, accepted
+        ):
+            names = " or ".join(t.__name__ for t in types)
+            errors.append(
+                f"{prefix}{key} should be {names}, not {type(value).__name__}"
+            )
+    return errors
+
+
+def diff(old: dict, new: dict) -> dict[str, tuple[Any, Any]]:
+    """Top-level keys whose value changed, key -> (old, new). Added or removed keys have None on the other side."""
+    return {
+        key: (old.get(key), new.get(key))
+        for key in old.keys() | new.keys()
+        if old.get(key, _MISSING) != new.get(key, _MISSING)
+    }
+
+
+class Settings:
+    """Each cog's settings.json, parsed once and kept until the file changes.
+
+    Cogs read theirs through `Cog.cached_settings` without touching the
+    disk. A cog can declare a `settings_schema`, checked when it's added and
+    on every reload; a file that no longer matches keeps the last good
+    settings. Changes come from the CogWatcher with the GUI and from
+    polling the files every `poll` seconds headless. Each loaded cog of the
+    directory gets `settings_changed(cog, diff)` with what changed, see
+    `diff`, except for manifest changes, which need the cog reloaded.
+    """
+
+    def __init__(self, client: Client, path: str = "cogs", *, poll: float = 0) -> None:
+        self.client = client
+        self.path = path
+        self.poll = poll
+        # cog directory -> (mtime, settings)
+        self._cache: dict[str, tuple[int, dict]] = {}
+        self._cogs: dict[str, list[commands.Cog]] = {}
+        self._task: asyncio.Task | None = None
+
+    def name(self, cog: commands.Cog) -> str | None:
+        """The directory under `path` a cog was loaded from, None for cogs from elsewhere."""
+        root = f"{self.path.replace(os.sep, '.')}."
+        module = type(cog).__module__
+        if not module.startswith(root):
+            return None
+        return module.removeprefix(root).partition(".")[0]
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name, "settings.json")
+
+    def get(self, name: str) -> dict:
+        """The cached settings of the cog directory `name`. Shared, don't modify them."""
+        if (cached := self._cache.get(name)) is None:
+            cached = self._cache[name] = _load(self.file(name))
+        return cached[1]
+
+    def of(self, cog: commands.Cog) -> dict:
+        return {} if (name := self.name(cog)) is None else self.get(name)
+
+    def add(self, cog: commands.Cog) -> None:
+        """Start sending `cog` its changes. Raises ValueError if its settings don't match its schema."""
+        if (name := self.name(cog)) is None:
+            return
+        if errors := validate(self.get(name), cog.settings_schema):
+            raise ValueError(f"Invalid settings for {cog.name}: {'; '.join(errors)}")
+        self._cogs.setdefault(name, []).append(cog)
+
+    def remove(self, cog: commands.Cog) -> None:
+        if (name := self.name(cog)) is None:
+            return
+        cogs = self._cogs.get(name, [])
+        if cog in cogs:
+            cogs.remove(cog)
+        if not cogs:
+            # read again if the cog comes back, its code may expect something else
+            self._cogs.pop(name, None)
+            self._cache.pop(name, None)
+
+    def changed(self, name: str) -> bool:
+        """Whether `name`'s settings.json was modified since it was last read."""
+        if (cached := self._cache.get(name)) is None:
+            return False
+        try:
+            mtime = os.stat(self.file(name)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
+        return mtime != cached[0]
+
+    def reload(self, name: str) -> bool:
+        """Read `name`'s settings.json again and tell its cogs what changed.
+
+        Returns False when that isn't enough: nothing of it is loaded, the
+        file is gone or its manifest changed, and the cog needs reloading.
+        """
+        if (cached := self._cache.get(name)) is None:
+            return False
+        try:
+            mtime, settings = _load(self.file(name))
+        except ValueError as e:
+            self.client.window.log(f"Keeping the old settings of {name}: {e}")
+            return True
+        if not mtime or settings.get("manifest") != cached[1].get("manifest"):
+            return False
+
+        cogs = self._cogs.get(name, ())
+        for cog in cogs:
+            if errors := validate(settings, cog.settings_schema):
+                self.client.window.log(
+                    f"Keeping the old settings of {name}, {cog.name}: {'; '.join(errors)}"
+                )
+                return True
+        self._cache[name] = (mtime, settings)
+        if changes := diff(cached[1], settings):
+            self.client.window.log(
+                f"Settings of {name} changed: {', '.join(sorted(changes))}",
+                logging.INFO,
+            )
+            for cog in cogs:
+                self.client.run_event("settings_changed", cog, changes)
+        return True
+
+    def start(self) -> None:
+        if self.poll > 0 and (self._task is None or self._task.done()):
+            self._task = self.client.loop.create_task(self._watch())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll)
+            # one stat per cached file, only changed ones are read
+            for name, (mtime, settings) in tuple(self._cache.items()):
+                try:
+                    current = os.stat(self.file(name)).st_mtime_ns
+                except FileNotFoundError:
+                    current = 0
+                if current == mtime:
+                    continue
+                # a file that's kept broken is only reported once
+                self._cache[name] = (current, settings)
+                if not self.reload(name):
+                    self.client.cog_loader.reload(name)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Iterable, Mapping
+import multiprocessing
+import threading
+import logging
+import asyncio
+import zlib
+import time
+import os
+
+from twitch_bot.headless import HeadlessLogs
+
+__all__ = ("Shard", "Supervisor", "assign")
+
+# summed across workers, everything else takes the worst worker
+SUMMED = ("messages", "outbound", "executor", "cache", "cpu", "rss")
+
+
+def assign(
+    channels: Iterable[str] | Mapping[str, dict], shards: int
+) -> list[list[str] | dict[str, dict]]:
+    """Split channels across `shards`, by a hash of the name so a channel stays on its shard."""
+    buckets: list[dict[str, Any]] = [{} for _ in range(shards)]
+    options = channels if isinstance(channels, Mapping) else dict.fromkeys(channels)
+    for name, value in options.items():
+        buckets[zlib.crc32(name.lower().encode()) % shards][name] = value
+    if isinstance(channels, Mapping):
+        return buckets
+    return [list(bucket) for bucket in buckets]
+
+
+def _worker(
+    settings: dict,
+    shard: int,
+    conn: Connection,
+    interval: float,
+    initializer: Callable[[], None] | None,
+) -> None:
+    # a shard is a whole bot without a window, Qt stays in the supervisor's terminal
+    os.environ["TWITCH_BOT_HEADLESS"] = "1"
+    if initializer is not None:
+        initializer()
+
+    from twitch_bot import Client
+
+    client = Client(**settings)
+    report = client.loop.create_task(_report(client, shard, conn, interval))
+    # a pipe isn't a socket on Windows, the proactor loop can't add_reader it
+    threading.Thread(
+        target=_listen,
+        args=(client, conn, report),
+        name=f"twitch-bot-shard-{shard}-control",
+        daemon=True,
+    ).start()
+    client.run()
+
+
+def _listen(client, conn: Connection, report: asyncio.Task) -> None:
+    while True:
+        try:
+            command = conn.recv()
+        except (EOFError, OSError):
+            # the supervisor is gone
+            command = "stop"
+        try:
+            client.loop.call_soon_threadsafe(_command, client, command, report)
+        except RuntimeError:
+            # the loop closed on its own
+            return
+        if command == "stop":
+            return
+
+
+def _command(client, command: str, report: asyncio.Task) -> None:
+    if command == "stop":
+        report.cancel()
+        client.window.close()
+
+
+async def _report(client, shard: int, conn: Connection, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        metrics = client.metrics
+        conn.send(
+            {
+                "shard": shard,
+                "pid": os.getpid(),
+                "time": time.time(),
+                "channels": [state.to_dict() for state in client.channels],
+                "metrics": {
+                    name: series.last
+                    for name, series in metrics.series.items()
+                    if series.last is not None
+                },
+            }
+        )
+
+
+class Shard:
+    __slots__ = ("id", "settings", "process", "conn", "report", "restarts", "due")
+
+    def __init__(self, id: int, settings: dict) -> None:
+        self.id = id
+        self.settings = settings
+        self.process: multiprocessing.Process | None = None
+        self.conn: Connection | None = None
+        self.report: dict | None = None
+        self.restarts = 0
+        # when a dead worker should be started again
+        self.due: float | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class Supervisor:
+    """Runs the bot as `shards` worker processes, each with its own share of the channels.
+
+    Every worker is a headless Client with its own IRC connection and event
+    loop. Workers report their latest metrics every `interval` seconds and
+    `metrics()` combines them. A worker that dies is started again after
+    `restart_delay` seconds. `initializer` is called in each worker before
+    the client is created and has to be picklable.
+    """
+
+    def __init__(
+        self,
+        settings: dict,
+        shards: int,
+        *,
+        interval: float = 5.0,
+        restart_delay: float = 5.0,
+        initializer: Callable[[], None] | None = None,
+    ) -> None:
+        if shards < 1:
+            raise ValueError("Need at least one shard")
+        channels = settings.get("channels") or ()
+        self.interval = interval
+        self.restart_delay = restart_delay
+        self.initializer = initializer
+        # a shard without channels would join the bot's own
+        self.shards = [
+            Shard(id, {**settings, "channels": share})
+            for id, share in enumerate(assign(channels, shards))
+            if share
+        ]
+        if not self.shards:
+            raise ValueError("Sharding needs channels in the settings")
+        self.logs = HeadlessLogs()
+        self._context = multiprocessing.get_context("spawn")
+        self._stopping = False
+
+    def start(self) -> None:
+        for shard in self.shards:
+            self._spawn(shard)
+
+    def _spawn(self, shard: Shard) -> None:
+        ours, theirs = self._context.Pipe()
+        shard.conn = ours
+        shard.due = None
+        shard.process = self._context.Process(
+            target=_worker,
+            args=(shard.settings, shard.id, theirs, self.interval, self.initializer),
+            name=f"twitch-bot-shard-{shard.id}",
+            daemon=True,
+        )
+        shard.process.start()
+        # the child has its own copy now
+        theirs.close()
+        self.logs.log(
+            f"Shard {shard.id} started (pid {shard.process.pid}) "
+            f"for {', '.join(shard.settings['channels']) or 'no channels'}",
+            logging.INFO,
+        )
+
+    def poll(self, timeout: float | None = None) -> None:
+        """Handle worker reports and exits for up to `timeout` seconds."""
+        now = time.monotonic()
+        for shard in self.shards:
+            if shard.due is not None and now >= shard.due and not self._stopping:
+                shard.restarts += 1
+                self._spawn(shard)
+
+        waiting = {}
+        for shard in self.shards:
+            if shard.conn is not None:
+                waiting[shard.conn] = shard
+            if shard.process is not None and shard.due is None:
+                waiting[shard.process.sentinel] = shard
+        if due := [shard.due for shard in self.shards if shard.due is not None]:
+            until = max(0.0, min(due) - now)
+            timeout = until if timeout is None else min(timeout, until)
+
+        for ready in wait(tuple(waiting), timeout):
+            shard = waiting[ready]
+            if ready is shard.conn:
+                try:
+                    shard.report = shard.conn.recv()
+                except (EOFError, OSError):
+                    shard.conn.close()
+                    shard.conn = None
+            elif shard.due is None:
+                self._exited(shard)
+
+    def _exited(self, shard: Shard) -> None:
+        shard.process.join()
+        self.logs.log(
+            f"Shard {shard.id} exited with code {shard.process.exitcode}, "
+            f"restarting in {self.restart_delay}s",
+            logging.WARNING,
+        )
+        shard.due = time.monotonic() + self.restart_delay
+
+    def metrics(self) -> dict[str, float]:
+        """The latest metrics of every worker, summed or the worst of them."""
+        combined: dict[str, float] = {}
+        for shard in self.shards:
+            if shard.report is None:
+                continue
+            for name, value in shard.report["metrics"].items():
+                if name in SUMMED:
+                    combined[name] = combined.get(name, 0.0) + value
+                else:
+                    combined[name] = max(combined.get(name, 0.0), value)
+        return combined
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "shard": shard.id,
+                "pid": shard.process.pid if shard.process else None,
+                "alive": shard.alive,
+                "restarts": shard.restarts,
+                "channels": (
+                    shard.report["channels"]
+                    if shard.report
+                    else list(shard.settings["channels"])
+                ),
+            }
+            for shard in self.shards
+        ]
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Ask every worker to close the client, killing any that don't within `timeout`."""
+        self._stopping = True
+        for shard in self.shards:
+            if shard.conn is not None and shard.alive:
+                try:
+                    shard.conn.send("stop")
+                except OSError:
+                    pass
+        deadline = time.monotonic() + timeout
+        for shard in self.shards:
+            if shard.process is None:
+                continue
+            shard.process.join(max(0.0, deadline - time.monotonic()))
+            if shard.process.is_alive():
+                shard.process.kill()
+                shard.process.join()
+            if shard.conn is not None:
+                shard.conn.close()
+                shard.conn = None
+
+    def run(self) -> None:
+        self.start()
+        last = time.monotonic()
+        try:
+            while True:
+                self.poll(self.interval)
+                if time.monotonic() - last >= self.interval:
+                    last = time.monotonic()
+                    metrics = self.metrics()
+                    self.logs.log(
+                        "Shards: "
+                        + ", ".join(
+                            f"{name} {value:.1f}" for name, value in metrics.items()
+                        ),
+                        logging.INFO,
+                    )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
@@ -0,0 +1,223 @@
+from __future__ import annotations
+from typing import Iterable, TYPE_CHECKING
+import inspect
+import asyncio
+import random
+import json
+
+from twitch_bot import Unauthorized
+from twitch_bot.ext import eventsub
+
+if TYPE_CHECKING:
+    from twitch_bot import Client, User
+    from twitch_bot.ext import commands
+
+__all__ = ("SubscriptionManager",)
+
+
+class SubscriptionManager:
+    """Keeps the EventSub subscriptions the client and its cogs need.
+
+    Topics are the suffix of an `EventSubWSClient.subscribe_channel_*` method,
+    e.g. "raid" or "poll_progress". Cogs declare theirs with a `subscriptions`
+    class attribute (or the "subscriptions" key of a lazy cog's manifest).
+    A loaded cog that declares none but listens to EventSub notifications
+    gets FALLBACK, every topic the client subscribed to before cogs
+    declared theirs.
+
+    The desired set is saved to `path` so the next start can subscribe before
+    the cogs finish loading. Every channel's broadcaster gets the same topics,
+    `sync` only subscribes to those that aren't already active for that
+    broadcaster, a few at a time, retrying each one with exponential
+    backoff. twitchio resubscribes a websocket's topics when it reconnects,
+    so a topic stays active until `close`.
+
+    Most topics need the broadcaster's authorization. They're subscribed
+    with the "token" of the channel's settings, or the bot's token in its own
+    channel. Other channels only get the PUBLIC topics, the rest is skipped
+    and logged once per channel.
+    """
+
+    # needed by the client itself
+    BASE = ("stream_start", "stream_end", "bans")
+    # readable with any user token
+    PUBLIC = frozenset(("stream_start", "stream_end", "raid", "update"))
+    # for cogs that handle EventSub notifications without declaring topics
+    FALLBACK = (
+        "stream_start",
+        "stream_end",
+        "bans",
+        "raid",
+        "follows_v2",
+        "subscriptions",
+        "subscription_messages",
+        "subscription_gifts",
+        "cheers",
+        "points_redeemed",
+        "prediction_begin",
+        "prediction_progress",
+        "prediction_lock",
+        "prediction_end",
+        "poll_begin",
+        "poll_progress",
+        "poll_end",
+        "hypetrain_begin",
+        "hypetrain_progress",
+        "hypetrain_end",
+    )
+
+    def __init__(
+        self,
+        client: Client,
+        es: eventsub.EventSubWSClient,
+        path: str = "data/subscriptions.json",
+        *,
+        concurrency: int = 4,
+        retries: int = 3,
+        backoff: float = 0.5,
+    ) -> None:
+        self.client = client
+        self.es = es
+        self.path = path
+        self.retries = retries
+        self.backoff = backoff
+        self.desired: set[str] = set(self.BASE) | self._read()
+        # (topic, broadcaster id)
+        self._active: set[tuple[str, int]] = set()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        # broadcaster id -> topics already reported as unauthorized
+        self._skipped: dict[int, set[str]] = {}
+        # cogs already reported as falling back
+        self._undeclared: set[str] = set()
+
+    def _read(self) -> set[str]:
+        try:
+            with open(self.path) as f:
+                return set(json.load(f).get("topics", ()))
+        except (OSError, ValueError, AttributeError):
+            return set()
+
+    def _write(self) -> None:
+        try:
+            with open(self.path, "w") as f:
+                json.dump({"topics": sorted(self.desired)}, f, indent=4)
+        except OSError as e:
+            self.client.window.log(f"Couldn't save EventSub topics: {e}")
+
+    def active(self, broadcaster: User) -> set[str]:
+        return {topic for topic, id in self._active if id == broadcaster.id}
+
+    def of(self, cog: commands.Cog) -> tuple[str, ...]:
+        """The topics `cog` needs, FALLBACK if it handles notifications without declaring any."""
+        if topics := getattr(cog, "subscriptions", ()):
+            return topics
+        events = getattr(type(cog), "_events", {})
+        if not any(name.startswith("event_eventsub_notification") for name in events):
+            return ()
+        if cog.name not in self._undeclared:
+            self._undeclared.add(cog.name)
+            self.client.window.log(
+                f"{cog.name} handles EventSub notifications without declaring "
+                "subscriptions, subscribing to every default topic."
+            )
+        return self.FALLBACK
+
+    def token(self, broadcaster: User) -> str | None:
+        """The token that can read `broadcaster`'s private topics, if there is one."""
+        if (state := self.client.channels.get(broadcaster.name)) and state.token:
+            return state.token
+        if broadcaster.name.lower() == (self.client.nick or "").lower():
+            return self.client._token
+        return None
+
+    def missing(self, broadcaster: User) -> set[str]:
+        missing = self.desired - self.active(broadcaster)
+        if self.token(broadcaster) is not None:
+            return missing
+        if skipped := missing - self.PUBLIC - self._skipped.get(broadcaster.id, set()):
+            self._skipped.setdefault(broadcaster.id, set()).update(skipped)
+            self.client.window.log(
+                f"No token for {broadcaster.name}, skipping EventSub topics "
+                f"{', '.join(sorted(skipped))}. Add its token to the channel settings."
+            )
+        return missing & self.PUBLIC
+
+    def refresh(self) -> None:
+        """Recompute the desired topics from the loaded and deferred cogs."""
+        desired = set(self.BASE)
+        for cog in self.client.cogs.values():
+            desired.update(self.of(cog))
+        for spec in self.client.cog_loader.specs.values():
+            if self.client.cog_loader.is_pending(spec.name):
+                desired.update(spec.subscriptions)
+        if desired != self.desired:
+            self.desired = desired
+            self._write()
+
+    def declare(self, topics: Iterable[str]) -> bool:
+        """Add topics to the desired set. Returns whether anything new was added."""
+        if not (topics := set(topics) - self.desired):
+            return False
+        self.desired.update(topics)
+        self._write()
+        return True
+
+    async def sync_all(self, broadcasters: Iterable[User]) -> None:
+        for broadcaster in broadcasters:
+            await self.sync(broadcaster)
+
+    async def sync(self, broadcaster: User) -> set[str]:
+        """Subscribe to every missing topic. Returns the topics that failed."""
+        async with self._lock:
+            missing = sorted(self.missing(broadcaster))
+            results = await asyncio.gather(
+                *(self._subscribe(topic, broadcaster) for topic in missing)
+            )
+        return {topic for topic, ok in zip(missing, results) if not ok}
+
+    def _call(self, topic: str, broadcaster: User):
+        method = getattr(self.es, f"subscribe_channel_{topic}", None)
+        if method is None:
+            raise ValueError(f"Unknown EventSub topic: {topic}")
+        token = self.token(broadcaster) or self.client._token
+        params = inspect.signature(method).parameters
+        if "to_broadcaster" in params:
+            return method(token, to_broadcaster=broadcaster)
+        if "moderator" in params:
+            return method(broadcaster, broadcaster, token)
+        return method(broadcaster, token)
+
+    async def _subscribe(self, topic: str, broadcaster: User) -> bool:
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                try:
+                    await self._call(topic, broadcaster)
+                except (Unauthorized, ValueError) as e:
+                    self.client.window.log(f"Couldn't subscribe to {topic}: {e}")
+                    return False
+                except Exception as e:
+                    if attempt == self.retries:
+                        self.client.window.log(
+                            f"Couldn't subscribe to {topic} after {attempt + 1} tries: {e}"
+                        )
+                        return False
+                    delay = self.backoff * 2**attempt
+                    await asyncio.sleep(delay + random.uniform(0, delay / 2))
+                else:
+                    self._active.add((topic, broadcaster.id))
+                    return True
+
+    async def close(self) -> None:
+        """Close the EventSub websockets, twitchio's Client.close leaves them running."""
+        for socket in self.es._sockets:
+            if socket._pump_task is not None:
+                socket._pump_task.cancel()
+            if socket._sock is not None:
+                # twitchio detaches the socket's session, nothing else closes its connector
+                conn = socket._sock._conn
+                await socket._sock.close()
+                if conn is not None:
+                    await conn._connector.close()
+        self.es._sockets.clear()
+        self._active.clear()
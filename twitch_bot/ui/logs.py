@@ -1,67 +1,184 @@
 from __future__ import annotations
 from typing import Optional, Type, TYPE_CHECKING
+from collections import deque
 from pathlib import Path
 import traceback
 import logging
 import sys
 
-from twitch_bot.QtWidgets import QPlainTextEdit, QMessageBox
+from twitch_bot.logwriter import logger, writer
+from twitch_bot.QtCore import QTimer, pyqtSignal
+from twitch_bot.QtGui import QShowEvent, QTextCursor, QTextDocument
+from twitch_bot.QtWidgets import QInputDialog, QPlainTextEdit, QMessageBox
 
 if TYPE_CHECKING:
     from .window import MainWindow
     from types import TracebackType
 
-logger = logging.getLogger("twitch-bot")
-formatter = logging.Formatter("%(levelname)s:%(asctime)s: %(message)s")
-file_handler = logging.FileHandler("twitch-bot.log")
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-
 
 class Stdout:
-    def __init__(self, logs: Logs) -> None:
+    def __init__(self, logs: Logs, level=logging.INFO) -> None:
         self.logs = logs
+        self.level = level
 
     def write(self, text: str):
-        self.logs.setPlainText(f"{self.logs.toPlainText()}{text}")
+        self.logs.write(text, self.level)
+        writer.write(text, self.level)
 
     def flush(self) -> None:
         pass
 
 
 class Logs(QPlainTextEdit):
-    def __init__(self, window: MainWindow) -> None:
+    _scheduleFlush = pyqtSignal()
+
+    def __init__(self, window: MainWindow, capacity: int = 10_000) -> None:
         super().__init__()
         self._window = window
+        # (level, text) chunks, appended from any thread and drained once per frame
+        self._pending: deque[tuple[int, str]] = deque()
+        self._partial: dict[int, str] = {}
+        self._lines: deque[tuple[int, str]] = deque(maxlen=capacity)
+        self._level = logging.NOTSET
+        self._search = ""
+        self._flushScheduled = False
+        self._stale = False
+
+        self._flushTimer = QTimer(self)
+        self._flushTimer.setSingleShot(True)
+        self._flushTimer.setInterval(16)
+        self._flushTimer.timeout.connect(self.flush)
+        self._scheduleFlush.connect(self._startFlushTimer)
 
         action = self.addAction("Hide Logs")
         action.setShortcut("Alt+C")
         action.triggered.connect(
             lambda: self.show() if self.isHidden() else self.hide()
         )
-
-        sys.stdout = sys.stderr = Stdout(self)
+        action = self.addAction("Find")
+        action.setShortcut("Ctrl+F")
+        action.triggered.connect(self.promptSearch)
+        action = self.addAction("Find Next")
+        action.setShortcut("F3")
+        action.triggered.connect(lambda: self.search(self._search))
+
+        sys.stdout = Stdout(self)
+        sys.stderr = Stdout(self, logging.ERROR)
         sys.excepthook = self.excepthook
+        writer.start()
 
         self.setWindowTitle("Logs")
         self.resize(700, 350)
 
         self.setContentsMargins(0, 0, 0, 0)
         self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(capacity)
 
     @property
     def window(self) -> MainWindow:
         return self._window
 
-    def setPlainText(self, text: str | None) -> None:
+    @property
+    def capacity(self) -> int:
+        return self._lines.maxlen
+
+    def setCapacity(self, capacity: int) -> None:
+        self._lines = deque(self._lines, maxlen=capacity)
+        self.setMaximumBlockCount(capacity)
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    def setLevel(self, level: int) -> None:
+        """Only show lines at or above `level`. Hidden lines are kept in the buffer."""
+        self._level = level
+        self.flush()
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._stale = False
+        self._appendLines(line for level, line in self._lines if level >= self._level)
+
+    def showEvent(self, event: QShowEvent | None) -> None:
+        self.flush()
+        if self._stale:
+            self._rebuild()
+        return super().showEvent(event)
+
+    def write(self, text: str, level=logging.INFO) -> None:
+        """Queue text for the next frame. Safe to call from any thread."""
+        self._pending.append((level, text))
+        if not self._flushScheduled:
+            self._flushScheduled = True
+            self._scheduleFlush.emit()
+
+    def _startFlushTimer(self) -> None:
+        if not self._flushTimer.isActive():
+            self._flushTimer.start()
+
+    def flush(self) -> None:
+        self._flushScheduled = False
+        lines = []
+        while self._pending:
+            level, text = self._pending.popleft()
+            *complete, self._partial[level] = (
+                self._partial.get(level, "") + text
+            ).split("\n")
+            lines.extend((level, line) for line in complete)
+        if not lines:
+            return
+        self._lines.extend(lines)
+        if self.isHidden():
+            # laid out in one go by showEvent
+            self._stale = True
+            return
+        self._appendLines(
+            (line for level, line in lines[-self.capacity :] if level >= self._level),
+            clear=False,
+        )
+
+    def _appendLines(self, lines, clear: bool = True) -> None:
         scrollbar = self.verticalScrollBar()
-        value = scrollbar.value()
-        max = scrollbar.maximum()
-        super().setPlainText(text)
-        scrollbar.setValue(scrollbar.maximum()) if value == max else ...
+        atBottom = scrollbar.value() == scrollbar.maximum()
+        if clear:
+            super().setPlainText("\n".join(lines))
+        elif text := "\n".join(lines):
+            self.appendPlainText(text)
+        scrollbar.setValue(scrollbar.maximum()) if atBottom else ...
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._partial.clear()
+        self._lines.clear()
+        self._stale = False
+        return super().clear()
+
+    def search(self, text: str, backward: bool = False) -> bool:
+        """Select the next match for `text`, wrapping around at the end of the log."""
+        self._search = text
+        if not text:
+            return False
+        flags = QTextDocument.FindFlag(0)
+        start = QTextCursor.MoveOperation.Start
+        if backward:
+            flags = QTextDocument.FindFlag.FindBackward
+            start = QTextCursor.MoveOperation.End
+        if self.find(text, flags):
+            return True
+        cursor = self.textCursor()
+        cursor.movePosition(start)
+        self.setTextCursor(cursor)
+        return self.find(text, flags)
+
+    def promptSearch(self) -> None:
+        text, ok = QInputDialog.getText(self, "Find", "Search logs:", text=self._search)
+        if ok:
+            self.search(text)
 
     def log(self, text: str, level=logging.ERROR):
-        print(text)
+        self.write(f"{text}\n", level)
         logger.log(msg=text, level=level)
 
     def excepthook(
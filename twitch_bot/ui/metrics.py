@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import time
+
+from twitch_bot.QtCharts import QChart, QChartView, QLineSeries, QValueAxis
+from twitch_bot.QtCore import QPointF, QTimer, Qt
+from twitch_bot.QtGui import QHideEvent, QPainter, QShowEvent
+from twitch_bot.QtWidgets import QFrame, QGridLayout, QSizePolicy
+
+if TYPE_CHECKING:
+    from .window import MainWindow
+    from twitch_bot import Client
+    from twitch_bot.metrics import Series
+
+__all__ = ("MetricsPage",)
+
+
+class MetricsChart(QChartView):
+    def __init__(self, title: str, series: tuple[Series, ...]) -> None:
+        super().__init__()
+        self.series = series
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.setMinimumHeight(200)
+
+        chart = QChart()
+        chart.setTitle(f"{title} ({series[0].unit})" if series[0].unit else title)
+        chart.legend().setVisible(len(series) > 1)
+        chart.legend().setAlignment(Qt.AlignmentFlag.AlignBottom)
+        self.xAxis = QValueAxis()
+        self.xAxis.setLabelFormat("%d")
+        self.xAxis.setTitleText("seconds ago")
+        self.yAxis = QValueAxis()
+        chart.addAxis(self.xAxis, Qt.AlignmentFlag.AlignBottom)
+        chart.addAxis(self.yAxis, Qt.AlignmentFlag.AlignLeft)
+
+        self.lines: list[QLineSeries] = []
+        for data in series:
+            line = QLineSeries()
+            line.setName(data.name)
+            chart.addSeries(line)
+            line.attachAxis(self.xAxis)
+            line.attachAxis(self.yAxis)
+            self.lines.append(line)
+        self.setChart(chart)
+
+    def redraw(self, now: float) -> None:
+        top = 0.0
+        span = 0.0
+        for line, data in zip(self.lines, self.series):
+            points = [QPointF(timestamp - now, value) for timestamp, value in data]
+            # one replace instead of a repaint per appended point
+            line.replace(points)
+            top = max(top, data.max())
+            if points:
+                span = max(span, -points[0].x())
+        self.xAxis.setRange(-max(span, 1.0), 0)
+        self.yAxis.setRange(0, top * 1.1 or 1.0)
+
+
+class MetricsPage(QFrame):
+    """Live charts of Client.metrics.
+
+    The samples are collected whether or not the page is shown, the charts
+    are only redrawn every `interval` ms while it is visible.
+    """
+
+    def __init__(self, window: MainWindow, interval: int = 1000) -> None:
+        super().__init__(window)
+        self._window = window
+        self.setObjectName("Metrics")
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+        self.setFrameShadow(QFrame.Shadow.Plain)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+
+        self._layout = QGridLayout(self)
+        self.setLayout(self._layout)
+        self.charts: list[MetricsChart] = []
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.redraw)
+
+    @property
+    def window(self) -> MainWindow:
+        return self._window
+
+    @property
+    def client(self) -> Client:
+        return self.window.client
+
+    def _createCharts(self) -> None:
+        metrics = self.client.metrics
+        groups = (
+            ("Chat messages", ("messages",)),
+            ("Event loop lag", ("lag",)),
+            ("Command latency", ("command p50", "command p90", "command p99")),
+            ("Outbound queue", ("outbound",)),
+            ("Executor queue", ("executor",)),
+            ("Message cache", ("cache",)),
+            ("CPU", ("cpu",)),
+            ("Memory", ("rss",)),
+        )
+        for index, (title, names) in enumerate(groups):
+            chart = MetricsChart(title, tuple(metrics[name] for name in names))
+            self._layout.addWidget(chart, index // 2, index % 2)
+            self.charts.append(chart)
+
+    def redraw(self) -> None:
+        now = time.time()
+        for chart in self.charts:
+            chart.redraw(now)
+
+    def showEvent(self, a0: QShowEvent | None) -> None:
+        # charts are built on first show so a bot nobody looks at never pays for them
+        if not self.charts:
+            self._createCharts()
+        self.redraw()
+        self._timer.start()
+        return super().showEvent(a0)
+
+    def hideEvent(self, a0: QHideEvent | None) -> None:
+        self._timer.stop()
+        return super().hideEvent(a0)
@@ -13,6 +13,7 @@ from twitch_bot.QtWidgets import (
     QWidget,
 )
 
+from .metrics import MetricsPage
 
 if TYPE_CHECKING:
     from .window import MainWindow
@@ -94,6 +95,8 @@ class Stack(QStackedWidget):
         scroll.setWidgetResizable(True)
         scroll.setWidget(self.cogsPage)
         self.addWidget(scroll)
+        self.metricsPage = MetricsPage(self.window)
+        self.addWidget(self.metricsPage)
 
     @property
     def window(self) -> MainWindow:
@@ -0,0 +1,89 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from pathlib import Path
+import os
+
+from twitch_bot.QtCore import QFileSystemWatcher, QTimer
+
+if TYPE_CHECKING:
+    from .window import MainWindow
+
+__all__ = ("CogWatcher",)
+
+
+class CogWatcher(QFileSystemWatcher):
+    """Reloads a cog when files under its `cogs/<name>` directory change.
+
+    Changes are debounced so saving several files reloads the cog once.
+    When only its settings.json changed they're applied in place through
+    the client's Settings, unless that needs a reload too.
+    """
+
+    def __init__(self, window: MainWindow, delay: int = 500) -> None:
+        super().__init__(window)
+        self._window = window
+        self._root: Path | None = None
+        # cog -> whether only its settings.json changed
+        self._changed: dict[str, bool] = {}
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay)
+        self._timer.timeout.connect(self.reloadChanged)
+
+        self.fileChanged.connect(self.pathChanged)
+        self.directoryChanged.connect(self.pathChanged)
+
+    @property
+    def window(self) -> MainWindow:
+        return self._window
+
+    def watch(self, root: str) -> None:
+        self._root = Path(root).absolute()
+        self.rewatch()
+
+    def rewatch(self) -> None:
+        # editors often replace files on save, which drops them from the watcher
+        if paths := self.files() + self.directories():
+            self.removePaths(paths)
+        paths = [str(self._root)]
+        for dirpath, dirnames, filenames in os.walk(self._root):
+            dirnames[:] = [name for name in dirnames if name != "__pycache__"]
+            paths.extend(os.path.join(dirpath, name) for name in dirnames)
+            paths.extend(
+                os.path.join(dirpath, name)
+                for name in filenames
+                if name.endswith((".py", ".json"))
+            )
+        self.addPaths(paths)
+
+    def pathChanged(self, path: str) -> None:
+        parts = Path(path).absolute().relative_to(self._root).parts
+        if parts:
+            if parts[1:] == ("settings.json",):
+                only = True
+            elif parts[1:]:
+                only = False
+            else:
+                # the cog's own directory changes too when an editor replaces
+                # a file, but also when one is added or removed
+                only = self.window.client.settings.changed(parts[0])
+            self._changed[parts[0]] = self._changed.get(parts[0], True) and only
+        elif self._root.is_dir():
+            # a cog directory was added or removed
+            known = set(self.window.client.cog_loader.specs)
+            current = {
+                p.name for p in self._root.iterdir() if (p / "settings.json").is_file()
+            }
+            self._changed.update(dict.fromkeys(known ^ current, False))
+        self._timer.start()
+
+    def reloadChanged(self) -> None:
+        changed, self._changed = self._changed, {}
+        loader = self.window.client.cog_loader
+        for name, settings in sorted(changed.items()):
+            if settings and self.window.client.settings.reload(name):
+                continue
+            if (self._root / name).is_dir() or name in loader.specs:
+                loader.reload(name)
+        self.rewatch()
@@ -12,6 +12,7 @@ from .sidebar import Sidebar
 from .stack import Stack
 from .systemtray import SystemTray
 from .logs import Logs
+from .watcher import CogWatcher
 
 if TYPE_CHECKING:
     from twitch_bot import Client
@@ -28,6 +29,7 @@ class MainWindow(QMainWindow):
         self.sidebar = Sidebar(self)
         self.stack = Stack(self)
         self.logs = Logs(self)
+        self.cogWatcher = CogWatcher(self)
 
         action = self.addAction("Logs")
         action.setShortcut("Alt+C")
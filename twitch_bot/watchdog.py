@@ -0,0 +1,181 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from types import FrameType
+import traceback
+import threading
+import selectors
+import asyncio
+import logging
+import time
+import sys
+
+from twitch_bot.ext import commands
+
+if TYPE_CHECKING:
+    from twitch_bot import Client
+
+__all__ = ("LoopMonitor", "Watchdog", "monitored_loop")
+
+
+class Stall:
+    __slots__ = ("started", "stack", "cog")
+
+    def __init__(self, started: float, stack: str, cog: str | None) -> None:
+        self.started = started
+        self.stack = stack
+        self.cog = cog
+
+
+class LoopMonitor:
+    """Wraps an event loop's selector, or its proactor on Windows, to see when it's busy.
+
+    The loop blocks in `select` while it waits for IO or timers, everything
+    after that until the next `select` is callbacks running. `busy_since` is
+    when the loop last came out of `select`, None while it's in there.
+    """
+
+    def __init__(self, selector) -> None:
+        self._selector = selector
+        self.busy_since: float | None = time.monotonic()
+
+    def select(self, timeout: float | None = None):
+        self.busy_since = None
+        try:
+            return self._selector.select(timeout)
+        finally:
+            self.busy_since = time.monotonic()
+
+    def __getattr__(self, name: str):
+        return getattr(self._selector, name)
+
+
+def monitored_loop() -> tuple[asyncio.AbstractEventLoop, LoopMonitor]:
+    """A new event loop of the platform's default type and its LoopMonitor."""
+    if sys.platform == "win32":
+        monitor = LoopMonitor(asyncio.IocpProactor())
+        return asyncio.ProactorEventLoop(monitor), monitor
+    monitor = LoopMonitor(selectors.DefaultSelector())
+    return asyncio.SelectorEventLoop(monitor), monitor
+
+
+class Watchdog:
+    """Notices when something blocks the event loop thread.
+
+    A thread checks the loop's LoopMonitor every `interval` seconds, and once
+    the loop has been running callbacks without getting back to its selector
+    for `threshold` seconds it captures the loop thread's stack, which is
+    the code blocking it, and logs it with the cog the code belongs to. When
+    the loop recovers the total stall is logged, with every task's stack as
+    well if `dump_tasks` is set. `lag` is how long the loop has been busy
+    when the thread last looked.
+
+    The checks only compare timestamps and never wake the loop, the stack is
+    only walked on a stall. Without a monitor, for a loop the client didn't
+    create, the watchdog doesn't run.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        monitor: LoopMonitor | None = None,
+        *,
+        threshold: float = 0.25,
+        interval: float = 0.05,
+        dump_tasks: bool = False,
+    ) -> None:
+        self.client = client
+        self.monitor = monitor
+        self.threshold = threshold
+        self.interval = interval
+        self.dump_tasks = dump_tasks
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._stall: Stall | None = None
+        self._loop_thread: int | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start watching, from the loop's thread."""
+        if self.running or self.monitor is None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="twitch-bot-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _watch(self) -> None:
+        loop = self.client.loop
+        while not self._stopping.wait(self.interval):
+            since = self.monitor.busy_since
+            now = time.monotonic()
+            # stopped or closing isn't blocked, neither is waiting for IO
+            busy = since is not None and loop.is_running()
+            self.lag = now - since if busy else 0.0
+            self.max_lag = max(self.max_lag, self.lag)
+            if self._stall is not None:
+                if not busy or since != self._stall.started:
+                    stall, self._stall = self._stall, None
+                    if loop.is_running():
+                        loop.call_soon_threadsafe(self._recovered, stall, now)
+                continue
+            if not busy or self.lag < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stall = Stall(
+                since, "".join(traceback.format_stack(frame)), self._owner(frame)
+            )
+            self._stall = stall
+            self.stalls += 1
+            # the GUI can't show this until the loop recovers, the log file can
+            self.client.window.log(
+                f"Event loop blocked for over {self.threshold * 1000:.0f}ms"
+                f"{f' in cog {stall.cog}' if stall.cog else ''}:\n{stall.stack}",
+                logging.WARNING,
+            )
+
+    def _recovered(self, stall: Stall, now: float) -> None:
+        # within `interval` of when it really ended
+        message = f"Event loop was blocked for {(now - stall.started) * 1000:.0f}ms"
+        if stall.cog:
+            message += f" by cog {stall.cog}"
+        if self.dump_tasks:
+            message += "\n" + self.task_stacks()
+        self.client.window.log(message, logging.WARNING)
+
+    def _owner(self, frame: FrameType | None) -> str | None:
+        """The innermost cog on the stack, by `self` or by the module it's defined in."""
+        prefix = f"{self.client.cog_loader.path}."
+        while frame is not None:
+            owner = frame.f_locals.get("self")
+            if isinstance(owner, commands.Cog):
+                return owner.name
+            module = frame.f_globals.get("__name__", "")
+            if module.startswith(prefix):
+                return module.removeprefix(prefix).split(".")[0]
+            frame = frame.f_back
+        return None
+
+    def task_stacks(self) -> str:
+        lines = []
+        for task in asyncio.all_tasks(self.client.loop):
+            lines.append(f"{task.get_name()}: {task.get_coro()!r}")
+            frames = ((frame, frame.f_lineno) for frame in task.get_stack())
+            summary = traceback.StackSummary.extract(frames)
+            lines.extend(f"  {line.rstrip()}" for line in summary.format())
+        return "\n".join(lines)